@@ -0,0 +1,104 @@
+"""
+Benchmark: BMO workbook written in one pass vs. xlsxwriter write + openpyxl append.
+
+Builds a synthetic "BMO Report MTD" frame (the outbound report columns, dates
+as bmo-report passes them) and the Summary sheet, then writes the workbook:
+- as bmo-report used to: MTD sheet with DataFrame.to_excel (xlsxwriter), then
+  the workbook reopened with openpyxl in append mode for the Summary sheet,
+- with common.excel.write_workbook, both sheets in one xlsxwriter pass, with
+  and without constant_memory.
+Prints the wall time of each (and the peak traced memory with --memory,
+which slows every writer down several times); the sheets read back from
+every workbook must be identical.
+
+Usage:
+    python benchmarks/bench_bmo_writer.py [rows] [--memory]
+"""
+import sys
+import time
+import tempfile
+import tracemalloc
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+from common.excel import read_excel, write_workbook
+
+MTD_SHEET = 'BMO Report MTD'
+
+
+def make_mtd(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Outbound report rows of one month, shaped like the MTD sheet."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp.today().normalize().replace(day=1)
+    data = {}
+    for i in range(24):
+        data[f"Text col {i}"] = [f"T{i}-{v}" if v % 13 else None for v in rng.integers(0, 900, rows)]
+    data['Release Number'] = rng.integers(2_500_000_000, 2_500_050_000, rows).astype(str)
+    data['Container No.'] = [f"CONT{v:07d}" for v in rng.integers(0, 10_000_000, rows)]
+    data['Piece'] = pd.Series(rng.integers(1, 700, rows)).where(rng.random(rows) > 0.05)
+    data['Power'] = rng.integers(0, 400_000, rows)
+    data['MegaWattage_numeric'] = data['Power'] / 1_000_000
+    for col in ['Release date', 'Agreed Delivery date', 'Delivery date']:
+        days = start - pd.to_timedelta(rng.integers(-20, 60, rows), unit='D')
+        data[col] = pd.Series(days).where(rng.random(rows) > 0.2)
+    data['Outbound date'] = (start + pd.to_timedelta(rng.integers(0, 28, rows), unit='D')).date
+    return pd.DataFrame(data)
+
+
+def make_summary() -> pd.DataFrame:
+    summary = {'Month_Target': 900.0, 'Outbound_Today': 12.34, 'Accumulated_Outbound_MTD': 456.78,
+               'Vs_Target_Outbound_(%)': '50.75%'}
+    return pd.DataFrame([(k, str(v)) for k, v in summary.items()], columns=["JA Solar Logistics Report", "Mwps"])
+
+
+def write_then_append(path: Path, mtd: pd.DataFrame, summary: pd.DataFrame) -> None:
+    with pd.ExcelWriter(path, engine='xlsxwriter') as writer:
+        mtd.to_excel(writer, sheet_name=MTD_SHEET, index=False)
+    with pd.ExcelWriter(path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+        summary.to_excel(writer, sheet_name='Summary', index=False)
+
+
+def measure(label: str, func, memory: bool) -> None:
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    if not memory:
+        print(f"  {label:<36} {seconds:7.2f} s")
+        return
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<36} {seconds:7.2f} s, peak {peak / 1024 / 1024:8.1f} MB")
+
+
+def run(rows: int, memory: bool = False) -> None:
+    mtd, summary = make_mtd(rows), make_summary()
+    print(f"MTD sheet: {rows} rows x {mtd.shape[1]} columns")
+    with tempfile.TemporaryDirectory() as folder:
+        paths = {
+            'xlsxwriter + openpyxl append': Path(folder) / 'two_pass.xlsx',
+            'write_workbook': Path(folder) / 'one_pass.xlsx',
+            'write_workbook, constant_memory': Path(folder) / 'one_pass_constant.xlsx',
+        }
+        sheets = {MTD_SHEET: mtd, 'Summary': summary}
+        measure('xlsxwriter + openpyxl append', lambda: write_then_append(paths['xlsxwriter + openpyxl append'],
+                                                                           mtd, summary), memory)
+        measure('write_workbook', lambda: write_workbook(paths['write_workbook'], sheets, constant_memory=False), memory)
+        measure('write_workbook, constant_memory',
+                lambda: write_workbook(paths['write_workbook, constant_memory'], sheets, constant_memory=True), memory)
+
+        reference = read_excel(paths['xlsxwriter + openpyxl append'], sheet_name=None)
+        for label, path in paths.items():
+            result = read_excel(path, sheet_name=None)
+            assert list(result) == list(reference), f"{label}: sheets {list(result)}"
+            for name in reference:
+                pd.testing.assert_frame_equal(reference[name], result[name])
+        print("  identical sheets read back from every workbook")
+
+
+if __name__ == "__main__":
+    counts = [a for a in sys.argv[1:] if a.isdigit()]
+    run(int(counts[0]) if counts else 50_000, '--memory' in sys.argv[1:])
@@ -0,0 +1,110 @@
+"""
+Benchmark: reading the CDR from CSV vs. from its typed Parquet copy.
+
+Writes a synthetic CDR (the current_report columns plus data_source) as
+CDR_YYYY-MM-DD.csv and, through common.cdr.write_cdr_parquet, as .parquet,
+then times:
+- the former consumer read (pd.read_csv(low_memory=False) + numeric cast),
+- common.cdr.read_cdr on the CSV alone and on the Parquet copy,
+- a projected, filtered read as the RNO and stock reports do it.
+The CSV and Parquet paths of read_cdr must return identical frames (also
+with parse_dates and a date filter), with the dates as written.
+
+Usage:
+    python benchmarks/bench_cdr_formats.py [rows]
+"""
+import sys
+import time
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+from common.cdr import read_cdr, write_cdr_parquet
+from common.daily_report_schema import CDR_SCHEMA, DB_COLUMNS, cast_to_schema
+from common.arrow import PARQUET_SUPPORTED
+
+PROJECTION = ["Ref1", "Container No.", "Piece", "Current_Status", "Outbound date",
+              "Agreed Delivery date", "Delivery date", "Delivery_Status"]
+FILTERS = [('data_source', '==', 'current')]
+DATE_FILTERS = [('Outbound date', '>=', pd.Timestamp('2025-01-01'))]
+DATES = [col for col, kind in CDR_SCHEMA.items() if kind == 'date']
+
+
+def make_cdr(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Combined current + archive rows as create-consolidated-report writes them."""
+    rng = np.random.default_rng(seed)
+    data = {'id': np.arange(1, rows + 1), 'created_at': '2025-06-01T06:00:00+00:00'}
+    for col in DB_COLUMNS:
+        kind = CDR_SCHEMA[col]
+        if kind == 'numeric':
+            data[col] = pd.Series(rng.integers(0, 1000, rows)).astype(object).where(rng.random(rows) > 0.1, None)
+        elif kind == 'date':
+            days = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 700, rows), unit='D')
+            data[col] = pd.Series(days.strftime('%Y-%m-%d')).where(rng.random(rows) > 0.3, None)
+        elif kind == 'category':
+            data[col] = rng.choice(['A', 'B', 'C', None], rows)
+        else:
+            data[col] = [f"{col[:4]}{v}" if v % 11 else None for v in rng.integers(0, 5000, rows)]
+    df = pd.DataFrame(data)
+    df['Release Number'] = rng.integers(2_500_000_000, 2_500_050_000, rows).astype(str)
+    df['Ref1'] = df['Release Number'] + df['Container No.'].astype(str)
+    df['Ref2'] = df['Ref1'] + '620'
+    df['Power'] = rng.integers(0, 400_000, rows)
+    df['MegaWattage'] = df['Power'] / 1_000_000
+    df['Current_Status'] = rng.choice(['On Sea', 'In-Stock', 'Outbounded'], rows)
+    df['Outbound_status'] = rng.choice(['not-outbounded', 'outbound-planned', 'outbounded'], rows)
+    df['Release_Status'] = rng.choice(['Released', 'Not released'], rows)
+    df['Delivery_Status'] = rng.choice(['Full_delivery', 'Partial_delivery'], rows)
+    df['data_source'] = rng.choice(['current', 'archive'], rows, p=[0.3, 0.7])
+    return df
+
+
+def timed(label: str, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"  {label:<42} {time.perf_counter() - start:7.2f} s")
+    return result
+
+
+def run(rows: int) -> None:
+    if not PARQUET_SUPPORTED:
+        print("pyarrow is not installed (pip install pyarrow); nothing to compare")
+        return
+    with tempfile.TemporaryDirectory() as folder:
+        csv_path = Path(folder) / 'CDR_2025-06-01.csv'
+        parquet_path = csv_path.with_suffix('.parquet')
+        cdr = make_cdr(rows)
+        cdr.to_csv(csv_path, index=False)
+        hidden = Path(folder) / 'hidden.parquet'
+        write_cdr_parquet(cdr, hidden)
+        print(f"Synthetic CDR: {rows} rows x {cdr.shape[1]} columns, "
+              f"CSV {csv_path.stat().st_size / 1e6:.1f} MB, Parquet {hidden.stat().st_size / 1e6:.1f} MB")
+
+        timed("read_csv(low_memory=False) + numeric cast",
+              lambda: cast_to_schema(pd.read_csv(csv_path, low_memory=False), CDR_SCHEMA, kinds=('numeric',)))
+        from_csv = timed("read_cdr, CSV", lambda: read_cdr(csv_path))
+        projected_csv = timed("read_cdr, CSV, projected + filtered", lambda: read_cdr(csv_path, PROJECTION, FILTERS))
+        dated_csv = read_cdr(csv_path, PROJECTION, DATE_FILTERS, parse_dates=True)
+        since_csv = read_cdr(csv_path, PROJECTION, DATE_FILTERS)
+
+        hidden.rename(parquet_path)
+        from_parquet = timed("read_cdr, Parquet", lambda: read_cdr(csv_path))
+        projected_parquet = timed("read_cdr, Parquet, projected + filtered",
+                                  lambda: read_cdr(csv_path, PROJECTION, FILTERS))
+        dated_parquet = read_cdr(csv_path, PROJECTION, DATE_FILTERS, parse_dates=True)
+        since_parquet = read_cdr(csv_path, PROJECTION, DATE_FILTERS)
+
+        pd.testing.assert_frame_equal(from_csv, from_parquet)
+        pd.testing.assert_frame_equal(projected_csv, projected_parquet)
+        pd.testing.assert_frame_equal(dated_csv, dated_parquet)
+        pd.testing.assert_frame_equal(since_csv, since_parquet)
+        # The dates come back as written (YYYY-MM-DD, not re-read day-first)
+        written = cdr[DATES].astype(object).where(cdr[DATES].notna(), None)
+        pd.testing.assert_frame_equal(from_parquet[DATES], written)
+        print(f"  identical frames ({len(from_parquet)} rows, {len(projected_parquet)} after the filter)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
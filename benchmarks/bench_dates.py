@@ -0,0 +1,87 @@
+"""
+Benchmark: per-cell parse_mixed_date vs. common.dates.convert_date_column.
+
+Builds a synthetic CDR with the 14 date columns holding a realistic mix of
+ISO strings, day-first strings, Excel serial numbers, datetimes and blanks,
+checks that both implementations give the same output and prints timings.
+
+Usage:
+    python benchmarks/bench_dates.py [rows]
+"""
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+from common.dates import DATE_COLUMNS, convert_date_column
+
+
+def legacy_convert_date_column(series: pd.Series) -> pd.Series:
+    """The per-cell implementation previously copied into the ETL scripts."""
+    def parse_mixed_date(date_val):
+        if pd.isna(date_val) or date_val is None or date_val == '':
+            return None
+        if isinstance(date_val, (pd.Timestamp, datetime)):
+            return date_val.strftime('%Y-%m-%d')
+        if isinstance(date_val, (int, float)):
+            try:
+                converted_date = pd.to_datetime(date_val, origin='1899-12-30', unit='D')
+                return converted_date.strftime('%Y-%m-%d')
+            except:
+                return None
+        try:
+            parsed_date = pd.to_datetime(date_val, format='mixed', dayfirst=True, errors='coerce')
+            if pd.notna(parsed_date):
+                return parsed_date.strftime('%Y-%m-%d')
+        except:
+            pass
+        return None
+
+    return series.apply(parse_mixed_date)
+
+
+def make_synthetic_cdr(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 900, rows), unit='D')
+    serials = (days - pd.Timestamp('1899-12-30')).days.to_numpy()
+    iso = days.strftime('%Y-%m-%d').to_numpy(dtype=object)
+    dayfirst = days.strftime('%d.%m.%Y').to_numpy(dtype=object)
+
+    data = {}
+    for i, col in enumerate(DATE_COLUMNS):
+        kind = rng.integers(0, 10, rows)
+        values = np.full(rows, None, dtype=object)
+        values[kind < 5] = iso[kind < 5]
+        values[(kind >= 5) & (kind < 7)] = dayfirst[(kind >= 5) & (kind < 7)]
+        values[kind == 7] = serials[kind == 7].astype(float)
+        values[kind == 8] = list(days[kind == 8])
+        data[col] = np.roll(values, i)
+    return pd.DataFrame(data)
+
+
+def run(rows: int) -> None:
+    df = make_synthetic_cdr(rows)
+    print(f"Synthetic CDR: {rows} rows x {len(DATE_COLUMNS)} date columns")
+
+    start = time.perf_counter()
+    vectorized = {col: convert_date_column(df[col]) for col in DATE_COLUMNS}
+    vectorized_seconds = time.perf_counter() - start
+    print(f"  vectorized: {vectorized_seconds:8.2f} s")
+
+    start = time.perf_counter()
+    legacy = {col: legacy_convert_date_column(df[col]) for col in DATE_COLUMNS}
+    legacy_seconds = time.perf_counter() - start
+    print(f"  per-cell:   {legacy_seconds:8.2f} s")
+
+    for col in DATE_COLUMNS:
+        expected = [None if pd.isna(v) else v for v in legacy[col]]
+        if vectorized[col].tolist() != expected:
+            raise AssertionError(f"Output mismatch in column {col}")
+    print(f"  outputs identical, speed-up x{legacy_seconds / vectorized_seconds:.1f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
@@ -0,0 +1,70 @@
+"""
+Benchmark: peak memory of the batch ETL vs. the streaming ETL (ETL_STREAMING=1).
+
+Writes synthetic warehouse workbooks to a temporary folder, points ETL.py at
+it and at a local PostgREST stand-in server, and measures the peak traced
+allocation (tracemalloc) of each mode from reading to upload.
+
+Usage:
+    python benchmarks/bench_etl_memory.py [files] [rows_per_file]
+"""
+import os
+import sys
+import time
+import tempfile
+import threading
+import tracemalloc
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(ROOT / 'src' / 'DDP_Tasks'))
+from bench_uploader import StandInPostgrest
+
+
+def write_workbooks(folder: Path, files: int, rows: int, columns) -> None:
+    rng = np.random.default_rng(0)
+    for i in range(files):
+        df = pd.DataFrame({col: rng.integers(0, 10_000, rows).astype(str) for col in columns[:40]})
+        df['Container No.'] = [f"CONT{i:02d}{j:06d}" for j in range(rows)]
+        df['Inbound date'] = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 300, rows), unit='D')
+        df.to_excel(folder / f"warehouse_{i:02d}.xlsx", index=False)
+
+
+def measure(etl, streaming: bool) -> None:
+    etl.STREAMING = streaming
+    tracemalloc.start()
+    start = time.perf_counter()
+    etl.main()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    label = 'streaming' if streaming else 'batch'
+    print(f"  {label:9s}: peak {peak / 1024 / 1024:8.1f} MB, {seconds:6.1f} s")
+
+
+def run(files: int, rows: int) -> None:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInPostgrest)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['SUPABASE_URL'] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ['SUPABASE_KEY'] = 'local-key'
+    os.environ['ETL_INGEST_CACHE'] = '0'
+
+    import ETL
+
+    with tempfile.TemporaryDirectory() as folder:
+        write_workbooks(Path(folder), files, rows, ETL.DB_COLUMNS)
+        ETL.SOURCE_FOLDER = folder
+        print(f"{files} workbooks x {rows} rows")
+        measure(ETL, streaming=False)
+        measure(ETL, streaming=True)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*(args + [8, 3000][len(args):]))
@@ -0,0 +1,167 @@
+"""
+Benchmark: ETL upsert sync (sync_to_supabase) against an in-memory daily_report.
+
+Serves daily_report from a stand-in PostgREST (GET with the filters
+fetch_frame sends, POST insert / upsert on row_key, PATCH by key) through an
+httpx MockTransport, then checks the runs a table switched from append mode
+goes through:
+- first upsert run: the rows inserted in append mode (no row_key) are
+  soft-deleted once, the run's rows take their place,
+- second run with the same rows: nothing sent, nothing deleted,
+- run with some rows gone: only those are soft-deleted,
+- runs without records (no batches, empty batches, streaming over an empty
+  source folder): the table is left untouched.
+
+Usage:
+    python benchmarks/bench_etl_sync.py [rows]
+"""
+import re
+import sys
+import json
+import time
+import tempfile
+import threading
+import importlib.util
+from pathlib import Path
+from urllib.parse import parse_qsl
+import httpx
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+from common.delta import build_row_keys, hash_rows
+
+QUOTED = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+
+class StandInTable:
+    """daily_report rows by id, answering the requests of common.supabase_rest."""
+
+    def __init__(self, rows):
+        self.rows = {row['id']: dict(row) for row in rows}
+        self.next_id = max(self.rows, default=0) + 1
+        # The uploader sends batches from several threads
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _predicate(column, condition):
+        if condition == 'is.null':
+            return lambda row: row.get(column) is None
+        if condition == 'not.is.null':
+            return lambda row: row.get(column) is not None
+        op, _, operand = condition.partition('.')
+        if op == 'gt':
+            return lambda row: row[column] > int(operand)
+        if op == 'lte':
+            return lambda row: row[column] <= int(operand)
+        if op == 'in':
+            wanted = {m.replace('\\"', '"').replace('\\\\', '\\') for m in QUOTED.findall(operand)}
+            if column == 'id':
+                wanted = {int(value) for value in wanted}
+            return lambda row: row.get(column) in wanted
+        raise ValueError(f"Unsupported filter {column}={condition}")
+
+    def _select(self, params):
+        predicates = [self._predicate(column, condition) for column, condition in params
+                      if column not in ('select', 'order', 'limit', 'on_conflict')]
+        return [row for row in self.rows.values() if all(p(row) for p in predicates)]
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        with self.lock:
+            return self._handle(request)
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        params = parse_qsl(request.url.query.decode(), keep_blank_values=True)
+        options = dict(params)
+        if request.method == 'GET':
+            rows = sorted(self._select(params), key=lambda row: row['id'], reverse=options.get('order') == 'id.desc')
+            rows = rows[:int(options.get('limit', len(rows)))]
+            columns = [c.strip('"') for c in options['select'].split(',')]
+            return httpx.Response(200, json=[{c: row.get(c) for c in columns} for row in rows])
+        if request.method == 'POST':
+            by_key = {row['row_key']: row for row in self.rows.values() if row.get('row_key') is not None}
+            for record in json.loads(request.content):
+                if options.get('on_conflict') == 'row_key' and record['row_key'] in by_key:
+                    by_key[record['row_key']].update(record)
+                else:
+                    self.rows[self.next_id] = dict(record, id=self.next_id)
+                    self.next_id += 1
+            return httpx.Response(201)
+        if request.method == 'PATCH':
+            for row in self._select(params):
+                row.update(json.loads(request.content))
+            return httpx.Response(204)
+        return httpx.Response(405)
+
+    def active(self) -> pd.DataFrame:
+        return pd.DataFrame([row for row in self.rows.values() if row.get('deleted_at') is None])
+
+
+def load_etl_module(table: StandInTable):
+    spec = importlib.util.spec_from_file_location('etl', ROOT / 'src' / 'DDP_Tasks' / 'ETL.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.SUPABASE_URL = module.SUPABASE_KEY = 'stand-in'
+    module.create_rest_client = lambda: httpx.Client(transport=httpx.MockTransport(table.handle),
+                                                     base_url='http://stand-in/rest/v1')
+    return module
+
+
+def make_records(module, rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'source_file': rng.choice(['Rotterdam.xlsx', 'Hamburg.xlsx'], rows),
+        'Container No.': [f"CONT{v:07d}" for v in rng.integers(0, rows // 2, rows)],
+        'Release Number': rng.integers(2_500_000_000, 2_500_001_000, rows).astype(str),
+        'Wattage': rng.choice(['580', '620'], rows),
+        'Piece': rng.integers(1, 700, rows).astype(str),
+    })
+    df['row_key'] = build_row_keys(df, module.ROW_KEY_COLUMNS)
+    df['row_hash'] = hash_rows(df, [col for col in module.DB_COLUMNS if col in df.columns])
+    return df.drop(columns=['source_file']).to_dict('records')
+
+
+def timed_sync(module, label: str, batches):
+    start = time.perf_counter()
+    counts = module.sync_to_supabase(batches)
+    print(f"  {label:<34} {time.perf_counter() - start:6.2f} s  {counts}")
+    return counts
+
+
+def run(rows: int) -> None:
+    appended = [{'id': i + 1, 'Container No.': f"OLD{i:07d}", 'row_key': None, 'row_hash': None, 'deleted_at': None}
+                for i in range(rows)]
+    table = StandInTable(appended)
+    module = load_etl_module(table)
+    records = make_records(module, rows)
+    keys = {record['row_key'] for record in records}
+    print(f"daily_report: {rows} rows inserted in append mode, {len(keys)} keyed rows per run")
+
+    counts = timed_sync(module, "first upsert run", [records[:rows // 2], records[rows // 2:]])
+    active = table.active()
+    assert counts['deleted'] == rows and set(active['row_key']) == keys and len(active) == len(keys)
+
+    counts = timed_sync(module, "same rows again", [records])
+    assert counts['inserted'] == counts['updated'] == counts['deleted'] == 0
+    assert len(table.active()) == len(keys)
+
+    kept = records[: rows // 2]
+    counts = timed_sync(module, "half of the rows gone", [kept])
+    assert set(table.active()['row_key']) == {record['row_key'] for record in kept}
+    print("  daily_report holds exactly the rows of each run")
+
+    before = {key: dict(row) for key, row in table.rows.items()}
+    timed_sync(module, "no batches", [])
+    timed_sync(module, "empty batches", [[], []])
+    module.UPLOAD_MODE = 'upsert'
+    with tempfile.TemporaryDirectory() as folder:
+        module.SOURCE_FOLDER = folder
+        files, records_sent, counts = module.stream_to_supabase(['Container No.', 'Release Number'])
+    print(f"  streaming over an empty folder: {files} files, {records_sent} records, {counts}")
+    assert table.rows == before
+    print("  runs without records leave daily_report untouched")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,105 @@
+"""
+Benchmark: full vs. column-projected read of the Europe Stock workbook.
+
+Writes a synthetic "Summary-Europe" sheet with the columns the RNO pipeline
+uses and the ones it drops (common.europe_stock.UNUSED_COLUMNS, including the
+blank 'Unnamed: 66'.. headers), then reads it with every column (as
+load_europe_stock_data used to) and with the projection, per engine. After
+clean_europe_stock both frames must be identical; read time and the
+in-memory size of the loaded frame are printed.
+
+Then load_clean_europe_stock is timed as the two RNO scripts use it in one
+run: the first call parses the workbook and stores the cleaned frame, the
+second is served from the cache, also after the mtime changed (OneDrive
+touching the file) but not after the content changed.
+
+Usage:
+    python benchmarks/bench_europe_stock.py [rows]
+"""
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+from common import excel
+from common.europe_stock import (EUROPE_STOCK_SHEET, UNUSED_COLUMNS, clean_europe_stock, load_europe_stock,
+                                 load_clean_europe_stock)
+
+
+def write_workbook(path: Path, rows: int, seed: int = 0) -> int:
+    """Summary-Europe sheet with 30 used and all unused columns, interleaved; returns the column count."""
+    rng = np.random.default_rng(seed)
+    used = ['Container', 'DN', 'Inv.', 'Sold Date', 'Qty(PC)', 'Customer'] + [f"Europe col {i}" for i in range(24)]
+    unused = sorted(col for col in UNUSED_COLUMNS if not col.startswith('Unnamed') and col != 'Type.2')
+    columns = [col for pair in zip(used, unused) for col in pair] + used[len(unused):] + unused[len(used):]
+    columns += ['Type', 'Type', 'Type'] + [None] * 7
+
+    data = []
+    for i, col in enumerate(columns):
+        if col == 'Sold Date' or i % 7 == 3:
+            days = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 700, rows), unit='D')
+            data.append(pd.Series(days).where(rng.random(rows) > 0.3))
+        elif col in ('DN', 'Qty(PC)') or i % 5 == 1:
+            data.append(pd.Series(rng.integers(0, 5_000_000, rows)).where(rng.random(rows) > 0.2))
+        elif col is None:
+            data.append(pd.Series([None] * rows, dtype=object))
+        else:
+            data.append(pd.Series([f"{str(col)[:4]}-{v}" if v % 9 else None for v in rng.integers(0, 400, rows)]))
+    frame = pd.concat(data, axis=1)
+    frame.columns = [col if col is not None else '' for col in columns]
+    with pd.ExcelWriter(path) as writer:
+        frame.to_excel(writer, sheet_name=EUROPE_STOCK_SHEET, index=False)
+    return len(columns)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def time_cache(path: Path, rows: int) -> None:
+    """First and second load of one run, then after a touch and after a content change."""
+    reference, seconds = timed(lambda: load_clean_europe_stock(path, cache=False))
+    print(f"  no cache           {seconds:6.2f}s")
+    for label in ['first script', 'second script']:
+        df, seconds = timed(lambda: load_clean_europe_stock(path))
+        pd.testing.assert_frame_equal(reference, df)
+        print(f"  {label:18s} {seconds:6.2f}s")
+    os.utime(path, (time.time() + 60, time.time() + 60))
+    df, seconds = timed(lambda: load_clean_europe_stock(path))
+    pd.testing.assert_frame_equal(reference, df)
+    print(f"  touched            {seconds:6.2f}s")
+    write_workbook(path, rows, seed=1)
+    df, seconds = timed(lambda: load_clean_europe_stock(path))
+    pd.testing.assert_frame_equal(load_clean_europe_stock(path, cache=False), df)
+    print(f"  new version        {seconds:6.2f}s")
+
+
+def run(rows: int) -> None:
+    engines = ['openpyxl'] + (['calamine'] if excel.CALAMINE_SUPPORTED else [])
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / 'Europe Stock.xlsx'
+        count = write_workbook(path, rows)
+        print(f"Summary-Europe: {rows} rows x {count} columns")
+        for engine in engines:
+            excel.EXCEL_ENGINE = engine
+            full, full_seconds = timed(lambda: load_europe_stock(path, usecols=None))
+            projected, projected_seconds = timed(lambda: load_europe_stock(path))
+            full_mb = full.memory_usage(deep=True).sum() / 1e6
+            projected_mb = projected.memory_usage(deep=True).sum() / 1e6
+            pd.testing.assert_frame_equal(clean_europe_stock(full), clean_europe_stock(projected))
+            print(f"  {engine:9s}: all {full.shape[1]} columns {full_seconds:6.2f}s ({full_mb:6.1f} MB), "
+                  f"projected {projected.shape[1]} columns {projected_seconds:6.2f}s ({projected_mb:6.1f} MB), "
+                  f"identical cleaned frames")
+        print(f"Cleaned frame cache ({excel.EXCEL_ENGINE}):")
+        time_cache(path, rows)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
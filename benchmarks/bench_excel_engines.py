@@ -0,0 +1,94 @@
+"""
+Benchmark: openpyxl vs. calamine through common.excel.read_excel.
+
+By default writes synthetic workbooks with the shapes the loaders read:
+- the 75-column "Summary-Europe" sheet of the Europe Stock workbook,
+- a 3PL daily report (the daily_report columns),
+- a WMS export with two title rows above the header.
+Each is read with both engines; the frames must be identical (values and
+dtypes) and the read times are printed.
+
+Real workbooks can be passed instead, as path[::sheet] arguments.
+
+Usage:
+    python benchmarks/bench_excel_engines.py [rows]
+    python benchmarks/bench_excel_engines.py "Europe Stock.xlsx::Summary-Europe" daily.xlsx
+"""
+import sys
+import time
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+from common import excel
+from common.daily_report_schema import DB_COLUMNS, DATE_COLUMNS, NUMERIC_COLUMNS
+
+
+def synthetic_frame(columns, rows: int, seed: int) -> pd.DataFrame:
+    """Mixed text / numeric / date columns with gaps, like the real sheets."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i, col in enumerate(columns):
+        if col in DATE_COLUMNS or i % 7 == 3:
+            values = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 700, rows), unit='D')
+            data[col] = pd.Series(values).where(rng.random(rows) > 0.2)
+        elif col in NUMERIC_COLUMNS or i % 5 == 1:
+            data[col] = pd.Series(rng.integers(0, 5000, rows)).where(rng.random(rows) > 0.1)
+        else:
+            data[col] = [f"{col[:6]}-{v}" if v % 9 else None for v in rng.integers(0, 400, rows)]
+    return pd.DataFrame(data)
+
+
+def write_samples(folder: Path, rows: int):
+    europe_columns = [f"Europe col {i}" for i in range(70)] + ['Sold Date', 'Release Number',
+                                                              'Container No.', 'Qty(PC)', 'Customer']
+    europe = folder / 'Europe Stock.xlsx'
+    with pd.ExcelWriter(europe) as writer:
+        synthetic_frame(europe_columns, rows, 0).to_excel(writer, sheet_name='Summary-Europe', index=False)
+
+    daily = folder / 'daily_report.xlsx'
+    synthetic_frame(DB_COLUMNS, rows, 1).to_excel(daily, index=False)
+
+    wms = folder / 'wms_outbound.xlsx'
+    wms_frame = synthetic_frame([f"WMS col {i}" for i in range(25)], rows, 2)
+    with pd.ExcelWriter(wms) as writer:
+        pd.DataFrame([['Outbound report'], ['generated']]).to_excel(writer, index=False, header=False)
+        wms_frame.to_excel(writer, startrow=2, index=False)
+
+    return [(europe, 'Summary-Europe', {}), (daily, 0, {}), (wms, 0, {'header': 2})]
+
+
+def timed_read(path: Path, sheet, engine: str, kwargs):
+    start = time.perf_counter()
+    df = excel.read_excel(path, sheet_name=sheet, engine=engine, **kwargs)
+    return df, time.perf_counter() - start
+
+
+def run(samples) -> None:
+    if not excel.CALAMINE_SUPPORTED:
+        print("python-calamine is not installed (pip install python-calamine); nothing to compare")
+        return
+    for path, sheet, kwargs in samples:
+        reference, openpyxl_seconds = timed_read(path, sheet, 'openpyxl', kwargs)
+        fast, calamine_seconds = timed_read(path, sheet, 'calamine', kwargs)
+        pd.testing.assert_frame_equal(reference, fast)
+        print(f"  {path.name} [{sheet}] {reference.shape[0]} x {reference.shape[1]}: "
+              f"openpyxl {openpyxl_seconds:6.2f}s, calamine {calamine_seconds:6.2f}s "
+              f"(x{openpyxl_seconds / calamine_seconds:.1f}), identical frames and dtypes")
+
+
+if __name__ == "__main__":
+    paths = [a for a in sys.argv[1:] if not a.isdigit()]
+    if paths:
+        samples = []
+        for arg in paths:
+            path, _, sheet = arg.partition('::')
+            samples.append((Path(path), sheet or 0, {}))
+        run(samples)
+    else:
+        rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+        with tempfile.TemporaryDirectory() as folder:
+            run(write_samples(Path(folder), rows))
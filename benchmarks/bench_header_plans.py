@@ -0,0 +1,99 @@
+"""
+Benchmark: column mapping of the warehouse sheets, as the ETL did it vs. header plans.
+
+Builds sheets with the template columns under the header variants found in
+the warehouse workbooks (case, line breaks, extra spaces, the missing closing
+parenthesis, columns outside the template) and with two headers that map to
+the same template column ('Comments' / 'Comments '). Each sheet is mapped:
+- as ETL.map_columns did before the header plans (rename, add the missing
+  columns, select in template order) and turned into records,
+- with resolve_header_plan + map_columns as they are now.
+The records must be identical (missing values as None); with duplicate headers the last one wins, as
+to_dict('records') made it before.
+
+Usage:
+    python benchmarks/bench_header_plans.py [rows]
+"""
+import sys
+import time
+import warnings
+import importlib.util
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+
+
+def load_etl_module():
+    spec = importlib.util.spec_from_file_location('etl', ROOT / 'src' / 'DDP_Tasks' / 'ETL.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def previous_records(etl, df: pd.DataFrame, template_headers):
+    """map_columns before the header plans, then to_dict('records') as the upload did."""
+    normalized_template = {etl.normalize_column_name(col): col for col in template_headers}
+    column_mapping = {}
+    for col in df.columns:
+        normalized_col = etl.normalize_column_name(etl.clean_column_name(col))
+        if normalized_col in normalized_template:
+            column_mapping[col] = normalized_template[normalized_col]
+    df_mapped = df.rename(columns=column_mapping)
+    for template_col in template_headers:
+        if template_col not in df_mapped.columns:
+            df_mapped[template_col] = None
+    with warnings.catch_warnings():
+        # to_dict keeps the last of the duplicated columns (and says so)
+        warnings.simplefilter('ignore', UserWarning)
+        return df_mapped[template_headers].to_dict('records')
+
+
+def same_records(old, new) -> bool:
+    """Equal records, counting the None of added columns and NaN as the same missing value."""
+    def clean(records):
+        return [{k: (None if v is None or v != v else v) for k, v in record.items()} for record in records]
+    return clean(old) == clean(new)
+
+
+def make_sheet(template_headers, rows: int, seed: int) -> pd.DataFrame:
+    """Template columns under varied headers, shuffled, plus extra and duplicate columns."""
+    rng = np.random.default_rng(seed)
+    variants = [str.upper, lambda c: c.replace(' ', '\n', 1), lambda c: f" {c}  ", lambda c: c.rstrip(')')]
+    headers = [variants[i % len(variants)](col) if rng.random() < 0.5 else col
+               for i, col in enumerate(template_headers) if rng.random() < 0.9]
+    headers += ['Remarks (internal)', 'Unnamed: 70']
+    rng.shuffle(headers)
+    headers += ['Comments ']  # second column for 'Comments'
+    if 'Comments' not in headers:
+        headers.insert(0, 'Comments')
+    data = {i: [f"{str(header).strip()[:6]}-{v}" for v in rng.integers(0, 1000, rows)]
+            for i, header in enumerate(headers)}
+    df = pd.DataFrame(data)
+    df.columns = headers
+    return df
+
+
+def run(rows: int) -> None:
+    etl = load_etl_module()
+    template_headers = list(etl.DB_COLUMNS)
+    sheets = [make_sheet(template_headers, rows, seed) for seed in range(5)]
+    print(f"{len(sheets)} sheets, {rows} rows each, {len(template_headers)} template columns")
+
+    start = time.perf_counter()
+    before = [previous_records(etl, df, template_headers) for df in sheets]
+    print(f"  rename + select (before):   {time.perf_counter() - start:6.2f} s")
+    start = time.perf_counter()
+    after = [etl.map_columns(df, template_headers).to_dict('records') for df in sheets]
+    print(f"  header plan + iloc:         {time.perf_counter() - start:6.2f} s")
+
+    for old, new, df in zip(before, after, sheets):
+        assert same_records(old, new)
+        assert new[0]['Comments'] == df['Comments '].iloc[0]
+    print("  identical records; with duplicate headers the last column wins")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000)
@@ -0,0 +1,95 @@
+"""
+Benchmark: per-cell identifier cleaning vs. common.identifiers (vectorized).
+
+Generates identifiers as the source sheets carry them (container numbers with
+dashes, slashes and stray spaces, release numbers as text or as floats, a
+share of invoice numbers with Chinese characters, gaps) and cleans them:
+- as clean_and_prepare_data did (generator over the characters per cell),
+- as daily-data-transfer did (re.sub per cell, ASCII only),
+- with common.identifiers.clean_identifiers, for both variants.
+The results must match, except for float-coerced numbers, which now lose
+their trailing .0 instead of keeping the zero.
+
+Non-ASCII values take the exact Python path, so their share (default 1%)
+drives the timing.
+
+Usage:
+    python benchmarks/bench_identifiers.py [rows] [non_ascii_share]
+"""
+import re
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+from common.identifiers import clean_identifiers
+
+
+def make_identifiers(rows: int, non_ascii: float = 0.01, seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    numbers = rng.integers(0, 10_000_000, rows)
+    kind = rng.choice([0, 1, 2, 3, 4, 5, 7, 8, 9], rows)
+    kind[rng.random(rows) < non_ascii] = 6
+    values = np.empty(rows, dtype=object)
+    for i, (number, k) in enumerate(zip(numbers, kind)):
+        if k < 4:
+            values[i] = f"MSKU-{number:07d}"
+        elif k < 6:
+            values[i] = f" TGHU{number:07d}/ "
+        elif k < 7:
+            values[i] = f"发票-{number}"
+        elif k < 8:
+            values[i] = float(2_500_000_000 + number)
+        elif k < 9:
+            values[i] = str(2_500_000_000 + number)
+        else:
+            values[i] = None
+    return pd.Series(values, dtype=object)
+
+
+def per_cell_alnum(val):
+    if pd.isnull(val):
+        return val
+    return ''.join(c for c in str(val) if c.isalnum() or c.isspace()).strip()
+
+
+def per_cell_ascii(val):
+    if pd.isnull(val):
+        return val
+    return re.sub(r'[^A-Za-z0-9 ]+', '', str(val)).strip()
+
+
+def timed(label: str, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"  {label:<40} {time.perf_counter() - start:7.2f} s")
+    return result
+
+
+def check(before: pd.Series, after: pd.Series, source: pd.Series) -> None:
+    """Identical except where the value was a float (25000123450 -> 2500012345)."""
+    floats = source.map(lambda v: isinstance(v, float) and not pd.isnull(v))
+    same = before.isna() & after.isna() | (before == after)
+    assert same[~floats].all(), "results differ"
+    expected = source[floats].map(lambda v: str(int(v)))
+    assert (after[floats] == expected).all(), "float-coerced numbers not restored"
+
+
+def run(rows: int, non_ascii: float) -> None:
+    values = make_identifiers(rows, non_ascii)
+    share = values.map(lambda v: isinstance(v, str) and not v.isascii()).mean()
+    print(f"{rows} identifiers, {share:.1%} non-ASCII")
+    before = timed("per cell, isalnum generator", lambda: values.map(per_cell_alnum))
+    after = timed("clean_identifiers", lambda: clean_identifiers(values))
+    check(before, after, values)
+    before = timed("per cell, re.sub (ASCII)", lambda: values.map(per_cell_ascii))
+    after = timed("clean_identifiers(ascii_only=True)", lambda: clean_identifiers(values, ascii_only=True))
+    check(before, after, values)
+    print("  same results (float-coerced numbers without the trailing .0)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.01)
@@ -0,0 +1,158 @@
+"""
+Benchmark: Delivery_Status of an incremental transfer vs. a full rebuild.
+
+Builds a synthetic daily_report (see bench_status_rules, with container
+numbers written with stray punctuation that the cleaning removes), transfers
+it in full, then changes it as an upsert ETL run would: rows whose key
+columns changed are soft-deleted and come back as new rows (so Ref1 groups
+split and merge), other rows get new dates in place, rows are soft-deleted
+and added, including rows outbounded before 2025 that current_report leaves
+out. The changed rows are then carried over as incremental_transfer does,
+with the reads it sends to Supabase answered from the frames: the
+current_report rows of the changed ids, the daily_report rows matching the
+like patterns of the touched containers, the current_report rows of the
+touched Ref1. current_report must come out as a full transfer of the changed
+daily_report builds it, and the rows read are counted against reading every key.
+
+The former recount over the rows of current_report (kept + changed, both
+already without the old outbounded rows) is counted for comparison.
+
+Usage:
+    python benchmarks/bench_incremental_transfer.py [rows] [changed_rows]
+"""
+import re
+import sys
+import time
+import importlib.util
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+from bench_status_rules import make_daily_report
+from common.status_rules import delivery_status
+
+
+def load_transfer_module():
+    spec = importlib.util.spec_from_file_location('daily_data_transfer', ROOT / 'src' / 'DDP_Tasks' / 'daily-data-transfer.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def change_daily_report(daily: pd.DataFrame, changed_rows: int, seed: int = 1):
+    """The daily_report after an upsert ETL run, and the rows an incremental run reads (with deleted_at)."""
+    rng = np.random.default_rng(seed)
+    daily = daily.copy()
+    daily['deleted_at'] = None
+    picked = rng.choice(daily.index, changed_rows, replace=False)
+    rekeyed, edited, deleted = np.array_split(picked, 3)
+
+    # New key columns: the old row is soft-deleted, the new one joins the Ref1
+    # of another row or gets a new Release Number
+    moved = daily.loc[rekeyed].copy()
+    donors = rng.integers(0, len(daily), len(moved))
+    joined = rng.random(len(moved)) < 0.5
+    moved['Release Number'] = np.where(joined, daily['Release Number'].to_numpy()[donors],
+                                       rng.integers(2_500_000_000, 2_500_050_000, len(moved)).astype(str))
+    moved.loc[joined, 'Container No.'] = daily['Container No.'].to_numpy()[donors[joined]]
+    daily.loc[np.concatenate([rekeyed, deleted]), 'deleted_at'] = '2026-01-01T00:00:00+00:00'
+    # Other changes are made in place
+    daily.loc[edited, 'Outbound date'] = None
+
+    added = make_daily_report(changed_rows, seed=seed + 1).drop(columns=['Ref1'])
+    # Added rows are mostly further deliveries of existing Ref1
+    donors = rng.integers(0, len(daily), len(added))
+    further = rng.random(len(added)) < 0.8
+    added.loc[further, 'Release Number'] = daily['Release Number'].to_numpy()[donors[further]]
+    added.loc[further, 'Container No.'] = daily['Container No.'].to_numpy()[donors[further]]
+    new_rows = pd.concat([moved, added], ignore_index=True)
+    new_rows['id'] = np.arange(len(new_rows)) + daily['id'].max() + 1
+    new_rows['deleted_at'] = None
+    daily = pd.concat([daily, new_rows], ignore_index=True)
+    changed_ids = np.concatenate([daily.loc[np.concatenate([rekeyed, edited, deleted]), 'id'], new_rows['id']])
+    source = daily[daily['id'].isin(changed_ids)]
+    return daily, source
+
+
+def like_rows(daily: pd.DataFrame, module, containers) -> pd.DataFrame:
+    """
+    Key columns of the live daily_report rows the container like patterns return.
+
+    Rows whose cleaned container is not touched do not change any count, so
+    the rows that matter are looked up by cleaned container; each of them is
+    checked to match the like pattern of its container, which is what makes
+    the server-side filter a superset of them.
+    """
+    live = daily[daily['deleted_at'].isna()]
+    cleaned = module.clean_keys(live[module.KEY_COLUMNS].copy())['Container No.']
+    rows = live.loc[cleaned[cleaned.isin(containers)].index]
+    for raw, clean in zip(rows['Container No.'], cleaned.loc[rows.index]):
+        pattern = '.*'.join(re.escape(part) for part in module.container_pattern(clean).split('*'))
+        assert re.fullmatch(pattern, raw), (raw, clean)
+    return rows[module.KEY_COLUMNS]
+
+
+def incremental(module, existing: pd.DataFrame, daily: pd.DataFrame, source: pd.DataFrame):
+    """current_report after the steps of incremental_transfer, and the number of rows read."""
+    previous = existing.loc[existing['id'].isin(source['id']), ['id', 'Ref1', 'Container No.']]
+    alive = source[source['deleted_at'].isna()].drop(columns=['deleted_at'])
+    df = module.transform_rows(alive.copy())
+    gone = (set(source['id']) - set(df['id'])) & set(previous['id'])
+
+    ref1s, containers = module.touched_keys(source, previous)
+    keys = like_rows(daily, module, containers)
+    status = module.delivery_status_by_ref1(keys)
+    df['Delivery_Status'] = df['Ref1'].map(status).fillna("Full_delivery").to_numpy()
+
+    touched = existing[existing['Ref1'].isin(ref1s)]
+    kept = touched[~touched['id'].isin(source['id'])]
+    kept_status = kept['Ref1'].map(status).fillna("Full_delivery")
+    print(f"  statuses updated on {int((kept_status != kept['Delivery_Status']).sum())} kept rows")
+
+    after = existing[~existing['id'].isin(source['id']) & ~existing['id'].isin(gone)].copy()
+    after.loc[kept.index, 'Delivery_Status'] = kept_status
+    read = len(source) + len(previous) + len(keys) + len(touched)
+    return pd.concat([after, df], ignore_index=True), read
+
+
+def previous_recount(existing: pd.DataFrame, df: pd.DataFrame, source: pd.DataFrame) -> pd.Series:
+    """Delivery_Status as the former incremental_transfer counted it: over current_report only."""
+    kept = existing[~existing['id'].isin(source['id'])]
+    combined = pd.concat([kept[['id', 'Ref1']], df[['id', 'Ref1']]], ignore_index=True)
+    return pd.Series(delivery_status(combined['Ref1']), index=combined['id'])
+
+
+def run(rows: int, changed_rows: int) -> None:
+    module = load_transfer_module()
+    daily = make_daily_report(rows).drop(columns=['Ref1'])
+    daily.insert(0, 'id', np.arange(1, rows + 1))
+    # Some sheets write the container numbers with punctuation the cleaning drops
+    stray = np.random.default_rng(2).random(rows) < 0.2
+    daily.loc[stray, 'Container No.'] = daily.loc[stray, 'Container No.'].str[:4] + '-' + daily.loc[stray, 'Container No.'].str[4:] + '.'
+    existing = module.transform_rows(daily.copy())
+    print(f"daily_report: {rows} rows, current_report: {len(existing)} rows")
+
+    daily, source = change_daily_report(daily, changed_rows)
+    start = time.perf_counter()
+    after, read = incremental(module, existing, daily, source)
+    full_scan = len(source) + len(existing) + int(daily['deleted_at'].isna().sum())
+    print(f"  incremental, {len(source)} changed rows: {time.perf_counter() - start:6.2f} s, "
+          f"{read} rows read (reading every key: {full_scan})")
+    full = module.transform_rows(daily[daily['deleted_at'].isna()].drop(columns=['deleted_at']))
+
+    after = after.set_index('id').sort_index()
+    full = full.set_index('id').sort_index()
+    pd.testing.assert_index_equal(after.index, full.index)
+    pd.testing.assert_series_equal(after['Delivery_Status'].astype(object), full['Delivery_Status'].astype(object))
+    print(f"  identical Delivery_Status on {len(full)} rows")
+
+    changed = module.transform_rows(source[source['deleted_at'].isna()].drop(columns=['deleted_at']))
+    previous = previous_recount(existing, changed, source).reindex(full.index)
+    print(f"  former recount over current_report differs on {int((previous != full['Delivery_Status']).sum())} rows")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*(args + [200_000, 5_000][len(args):]))
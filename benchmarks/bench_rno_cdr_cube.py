@@ -0,0 +1,125 @@
+"""
+Benchmark: per-status CDR summaries vs. one pivot per key in the RNO report.
+
+Builds a synthetic CDR (Ref1 / container keys, statuses including gaps and
+statuses the report does not use, pieces with gaps) and Released rows from
+Europe Stock (duplicated Ref1, Ref1 missing from the CDR, missing container
+numbers), then enriches the RNO frame:
+- as generate_rno_report did: one filter + groupby + merge per status by Ref1,
+  and two more (total, outbounded) by container,
+- with process_rno_data / process_container_level_cdr as they are now (one
+  bincount pivot of the CDR per key, looked up by shared_codes of the Ref1
+  and of the container numbers).
+The enriched frames must be identical, with Piece as float64 (as read_cdr
+returns it), as Int64 and as int64 without gaps.
+
+Usage:
+    python benchmarks/bench_rno_cdr_cube.py [cdr_rows]
+"""
+import sys
+import time
+import importlib.util
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+
+STATUSES = ['On Sea', 'In-Stock', 'Outbounded', 'Released', None]
+
+
+def load_rno_module():
+    spec = importlib.util.spec_from_file_location('generate_rno_report', ROOT / 'src' / 'RNO_Task' / 'generate_rno_report.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_data(cdr_rows: int, piece_dtype: str, seed: int = 0):
+    """CDR and Released frames sharing part of their Ref1 / container keys."""
+    rng = np.random.default_rng(seed)
+    containers = np.array([f"CONT{v:07d}" for v in range(cdr_rows // 8)], dtype=object)
+    container = containers[rng.integers(0, len(containers), cdr_rows)]
+    release = rng.integers(2_500_000_000, 2_500_000_000 + cdr_rows // 20, cdr_rows).astype(str)
+    outbound = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 400, cdr_rows), unit='D')
+    pieces = pd.Series(rng.integers(1, 700, cdr_rows), dtype=piece_dtype)
+    if piece_dtype != 'int64':
+        pieces = pieces.where(rng.random(cdr_rows) > 0.05)
+    cdr = pd.DataFrame({
+        'Ref1': pd.Series(release.astype(object) + container),
+        'Container No.': pd.Series(container).where(rng.random(cdr_rows) > 0.02),
+        'Piece': pieces,
+        'Current_Status': pd.Categorical(np.array(STATUSES, dtype=object)[rng.integers(0, len(STATUSES), cdr_rows)]),
+        'Outbound date': pd.Series(outbound).where(rng.random(cdr_rows) > 0.5),
+        'Agreed Delivery date': pd.Series(outbound),
+        'Delivery date': pd.Series(outbound).where(rng.random(cdr_rows) > 0.3),
+        'Delivery_Status': pd.Categorical(rng.choice(['Delivered', 'Pending'], cdr_rows)),
+    })
+
+    rows = cdr_rows // 10
+    picked = cdr.sample(rows, replace=True, random_state=seed)
+    released = pd.DataFrame({
+        'Container Number': picked['Container No.'].to_numpy(),
+        'Release Number': picked['Ref1'].str[:10].to_numpy(),
+        'Qty(PC)': rng.integers(1, 2000, rows),
+        'Sold Date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 400, rows), unit='D'),
+    })
+    released.loc[rng.random(rows) < 0.1, 'Release Number'] = '2499999999'
+    released['Ref1'] = released['Release Number'].astype(str) + released['Container Number'].astype(str)
+    return cdr, released
+
+
+def previous_rno(rno_module, released, cdr):
+    """process_rno_data / process_container_level_cdr before the pivot (try/except left out)."""
+    cdr_selected = cdr[["Ref1", "Current_Status", "Outbound date", "Agreed Delivery date",
+                        "Delivery date", "Delivery_Status"]]
+    rno = pd.merge(released, cdr_selected, on="Ref1", how="left")
+    rno = rno.drop_duplicates(subset=['Ref1'], keep='last')
+    rno["Outbound date"] = pd.to_datetime(rno["Outbound date"], format='mixed', dayfirst=True)
+    rno = rno[rno["Outbound date"].dt.date != pd.Timestamp.today().date()]
+    for status, col_name in rno_module.STATUS_PIECE_COLUMNS.items():
+        summary = cdr[cdr['Current_Status'] == status].groupby('Ref1')['Piece'].sum().reset_index()
+        summary = summary.rename(columns={'Piece': col_name})
+        rno = pd.merge(rno, summary, on="Ref1", how="left")
+        rno[col_name] = rno[col_name].fillna(0)
+    rno = rno_module.add_comparison_cases(rno)
+
+    total = cdr.groupby('Container No.')['Piece'].sum().reset_index()
+    total = total.rename(columns={'Container No.': 'Container Number', 'Piece': 'cnt_Total_Pcs_cdr'})
+    outbound = cdr[cdr['Current_Status'] == 'Outbounded'].groupby('Container No.')['Piece'].sum().reset_index()
+    outbound = outbound.rename(columns={'Container No.': 'Container Number', 'Piece': 'cnt_Outbound_Pcs_cdr'})
+    rno = pd.merge(rno, total, on='Container Number', how='left')
+    rno = pd.merge(rno, outbound, on='Container Number', how='left')
+    for col in ['cnt_Total_Pcs_cdr', 'cnt_Outbound_Pcs_cdr']:
+        rno[col] = pd.to_numeric(rno[col].fillna(0), errors='coerce')
+    rno['Case4'] = np.where(rno['cnt_Outbound_Pcs_cdr'] == rno['Qty(PC)'], True, False)
+    return rno
+
+
+def current_rno(rno_module, released, cdr):
+    rno = rno_module.process_rno_data(released, cdr)
+    rno = rno_module.add_comparison_cases(rno)
+    return rno_module.process_container_level_cdr(rno, cdr)
+
+
+def timed(label: str, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"  {label:<36} {time.perf_counter() - start:7.2f} s")
+    return result
+
+
+def run(cdr_rows: int) -> None:
+    rno_module = load_rno_module()
+    for piece_dtype in ['float64', 'Int64', 'int64']:
+        cdr, released = make_data(cdr_rows, piece_dtype)
+        print(f"CDR: {cdr_rows} rows, Released: {len(released)} rows, Piece as {piece_dtype}")
+        before = timed("per-status filter + groupby + merge", lambda: previous_rno(rno_module, released.copy(), cdr))
+        after = timed("one pivot per key", lambda: current_rno(rno_module, released.copy(), cdr))
+        pd.testing.assert_frame_equal(before, after)
+        print("  identical RNO frames")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
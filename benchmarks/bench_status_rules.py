@@ -0,0 +1,150 @@
+"""
+Benchmark: row-wise status helpers vs. common.status_rules.apply_status_rules.
+
+Builds a synthetic daily_report as it comes back from Supabase (text dates in
+a few formats, blanks, junk values, future outbound dates, placeholder Agreed
+Delivery years), runs the former df.apply(axis=1) steps of
+daily-data-transfer.py and the vectorized rules, checks that the resulting
+frames are identical and prints timings.
+
+The row-wise reference is slow, so it runs on the first legacy_rows rows; the
+vectorized rules are timed on the full frame as well.
+
+Usage:
+    python benchmarks/bench_status_rules.py [rows] [legacy_rows]
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+from common.status_rules import apply_status_rules
+
+
+def legacy_status_rules(df: pd.DataFrame) -> pd.DataFrame:
+    """Steps 7-10 of daily-data-transfer.py as they were, one row at a time."""
+    def get_status(row):
+        if pd.isna(row.get('Outbound date')):
+            if pd.isna(row.get('Inbound date')):
+                return "On Sea"
+            else:
+                return "In-Stock"
+        else:
+            try:
+                outbound_date = pd.to_datetime(row.get('Outbound date')).date() if pd.notna(row.get('Outbound date')) else None
+                if outbound_date and outbound_date > datetime.now().date():
+                    return "In-Stock"
+                else:
+                    return "Outbounded"
+            except Exception:
+                return "Outbounded"
+
+    def get_outbound_class(row):
+        try:
+            if pd.isna(row.get('Outbound date')) or row.get('Outbound date') == pd.Timestamp(0):
+                return "not-outbounded"
+            elif pd.to_datetime(row.get('Outbound date')).date() > datetime.now().date():
+                return "outbound-planned"
+            else:
+                return "outbounded"
+        except Exception:
+            return "not-outbounded"
+
+    def get_release_status(row):
+        if not pd.isna(row.get('Release date')) or row.get('Current_Status') == "Outbounded":
+            return "Released"
+        else:
+            return "Not released"
+
+    def is_outbounded_before_2025(row):
+        if row.get('Outbound_status') == 'outbounded' and pd.notna(row.get('Outbound date')):
+            try:
+                outbound_year = pd.to_datetime(row.get('Outbound date')).year
+                return outbound_year < 2025
+            except Exception:
+                return False
+        return False
+
+    def fix_agreed_delivery_date(row):
+        try:
+            agreed_val = row.get('Agreed Delivery date')
+            if pd.isna(agreed_val) or str(agreed_val).strip() == "":
+                return ""
+            agreed_date = pd.to_datetime(agreed_val, errors='coerce')
+            if pd.notna(agreed_date):
+                if agreed_date.year in [2001, 2021, 2024]:
+                    return ""
+        except Exception:
+            pass
+        return row.get('Agreed Delivery date')
+
+    df = df.copy()
+    df['Current_Status'] = df.apply(get_status, axis=1)
+    df['Outbound_status'] = df.apply(get_outbound_class, axis=1)
+    df['Release_Status'] = df.apply(get_release_status, axis=1)
+    ref_counts = df['Ref1'].map(df['Ref1'].value_counts())
+    df['Delivery_Status'] = ref_counts.apply(lambda x: "Partial_delivery" if x > 1 else "Full_delivery")
+    df = df[~df.apply(is_outbounded_before_2025, axis=1)]
+    if 'Agreed Delivery date' in df.columns:
+        df['Agreed Delivery date'] = df.apply(fix_agreed_delivery_date, axis=1)
+    return df
+
+
+def random_dates(rng, rows: int, start: str, span_days: int, blank_share: float) -> np.ndarray:
+    days = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, span_days, rows), unit='D')
+    kind = rng.random(rows)
+    values = days.strftime('%Y-%m-%d').to_numpy(dtype=object)
+    values[kind < 0.1] = days[kind < 0.1].strftime('%m/%d/%Y')
+    values[(kind >= 0.1) & (kind < 0.15)] = days[(kind >= 0.1) & (kind < 0.15)].strftime('%Y-%m-%dT%H:%M:%S')
+    values[(kind >= 0.15) & (kind < 0.16)] = 'TBC'
+    values[(kind >= 0.16) & (kind < 0.17)] = ''
+    values[rng.random(rows) < blank_share] = None
+    return values
+
+
+def make_daily_report(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp(datetime.now().date())
+    containers = np.array([f"CONT{i:07d}" for i in range(rows // 2 + 1)], dtype=object)
+    releases = rng.integers(2_500_000_000, 2_500_050_000, rows).astype(str)
+    df = pd.DataFrame({
+        'Container No.': containers[rng.integers(0, len(containers), rows)],
+        'Release Number': releases,
+        'Inbound date': random_dates(rng, rows, '2023-06-01', 800, 0.3),
+        # Outbound dates up to 60 days into the future -> outbound-planned
+        'Outbound date': random_dates(rng, rows, str((today - timedelta(days=900)).date()), 960, 0.5),
+        'Release date': random_dates(rng, rows, '2023-06-01', 800, 0.4),
+        'Agreed Delivery date': random_dates(rng, rows, '2020-06-01', 2000, 0.3),
+    })
+    df['Ref1'] = df['Release Number'].astype(str) + df['Container No.'].astype(str)
+    return df
+
+
+def run(rows: int, legacy_rows: int) -> None:
+    df = make_daily_report(rows)
+    print(f"Synthetic daily_report: {rows} rows")
+
+    start = time.perf_counter()
+    apply_status_rules(df)
+    print(f"  vectorized, {rows} rows:  {time.perf_counter() - start:8.2f} s")
+
+    sample = df.iloc[:legacy_rows]
+    start = time.perf_counter()
+    vectorized = apply_status_rules(sample)
+    vectorized_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    legacy = legacy_status_rules(sample)
+    legacy_seconds = time.perf_counter() - start
+    print(f"  vectorized, {len(sample)} rows: {vectorized_seconds:8.2f} s")
+    print(f"  row-wise,   {len(sample)} rows: {legacy_seconds:8.2f} s  (x{legacy_seconds / vectorized_seconds:.0f})")
+
+    pd.testing.assert_frame_equal(legacy.astype(object), vectorized.astype(object))
+    print(f"  identical output ({len(legacy)} rows kept)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*(args + [1_000_000, 100_000][len(args):]))
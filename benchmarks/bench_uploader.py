@@ -0,0 +1,93 @@
+"""
+Benchmark: sequential fixed-size inserts vs. common.supabase_rest.upload_records.
+
+Starts a local PostgREST-compatible stand-in server (POST /rest/v1/<table>
+with a simulated per-request latency and the occasional 429) and uploads the
+same synthetic daily_report rows both ways, printing rows/sec.
+
+Usage:
+    python benchmarks/bench_uploader.py [rows]
+"""
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+from common.supabase_rest import create_rest_client, upload_records
+
+# Simulated server cost: fixed round trip plus a per-row insert cost
+REQUEST_LATENCY = 0.05
+ROW_LATENCY = 0.00002
+
+# Every FAIL_EVERY-th request is answered with 429 to exercise the retries (a
+# plain insert is not retried after a 5xx, which may follow a committed batch)
+FAIL_EVERY = 25
+
+
+class StandInPostgrest(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    rows = {}
+    requests = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        table = self.path.split('?')[0].rsplit('/', 1)[-1]
+        with self.lock:
+            StandInPostgrest.requests += 1
+            fail = StandInPostgrest.requests % FAIL_EVERY == 0
+        if fail:
+            self._respond(429)
+            return
+        batch = json.loads(body)
+        time.sleep(REQUEST_LATENCY + ROW_LATENCY * len(batch))
+        with self.lock:
+            self.rows[table] = self.rows.get(table, 0) + len(batch)
+        self._respond(201)
+
+    def _respond(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def make_records(rows: int):
+    return [
+        {
+            'Name JA partner': 'Partner', 'WH location': 'Rotterdam',
+            'Container No.': f"CONT{i:07d}", 'Release Number': str(2500000000 + i % 5000),
+            'Piece': str(i % 620), 'Wattage': '580', 'Outbound date': None,
+            'Inbound date': '2025-03-01', 'Comments': 'x' * (i % 40),
+        }
+        for i in range(rows)
+    ]
+
+
+def run(rows: int) -> None:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInPostgrest)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    records = make_records(rows)
+
+    with create_rest_client(url, 'local-key', pool_size=1) as client:
+        sequential = upload_records('daily_report', records, client=client, workers=1,
+                                    target_bytes=1 << 40, max_rows=1000)
+    print(f"  sequential, 1000 rows/batch:  {sequential}")
+
+    with create_rest_client(url, 'local-key', pool_size=8) as client:
+        pooled = upload_records('daily_report', records, client=client, workers=8)
+    print(f"  pooled, 8 workers, 512 KB:    {pooled}")
+
+    assert StandInPostgrest.rows['daily_report'] == 2 * rows
+    print(f"  server received every row twice; speed-up x{pooled.rows_per_sec / sequential.rows_per_sec:.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
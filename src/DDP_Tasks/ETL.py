@@ -1,12 +1,23 @@
 import os
+import sys
+import hashlib
 import pandas as pd
 from pathlib import Path
-from supabase import create_client, Client
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.daily_report_schema import DB_COLUMNS, cast_to_schema
+from common.delta import build_row_keys, diff_row_hashes, hash_rows
+from common.excel import read_excel
+from common.file_cache import FrameCache
+from common.header_plans import HeaderPlan, HeaderPlanCache, header_signature
+from common.supabase_rest import UploadStats, create_rest_client, fetch_frame, update_records, upload_records
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -24,34 +35,33 @@ SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY')
 TABLE_NAME = 'daily_report'
 
-# Database column names (exact match with database schema)
-DB_COLUMNS = [
-    'Name JA partner', 'WH location', 'Type of WH (bonded/non)',
-    'Container No.', 'Product type', 'Product reference', 'Port of Loading',
-    'Port of destination', 'Inbound ref.', 'Import invoice', 'House B/l',
-    'Bill of Lading', 'Shipping line', 'Vessel', 'ETD date POL',
-    'ATD date POL', 'ETA date', 'ATA date', 'Import MRN', 'Import date',
-    'Planned Inbound date', 'Inbound date',
-    'Inbound duration days (Inbound date-ATA date+1)', 'Inbound Status',
-    'Dev. Planned to Real in days Inbound date-Planned inbound date',  # Note: NO parentheses
-    'Release date from port (ATA date)',
-    'Contractual freetime for D&D combined', 'Free DM days', 'Free DT days',
-    'Free DM days remained', 'Free DT days remained',
-    'Container Returned date', 'Factory JASolar', 'Pallets', 'Piece',
-    'Wattage', 'Total Wattage', 'MW', 'Stock Status', 'Stock age',
-    'Release Number', 'Release type', 'Incoterm', 'Release date',
-    'Internal Outbound ref', 'Outbound date', 'Outbound Status',
-    'Agreed Delivery date', 'Delivery date', 'Storage time after release',
-    'Delivery Duration', 'Dev. Between Agreed vs Real delivery date',
-    'Sales Name', 'date CMR sent to JASolar', 'Customer Name',
-    'Customer Country', 'Consignee name', 'Destination Address',
-    'Destination Postal Code', 'Destination City', 'Destination Country',
-    'Sales invoice', 'PTW / intermodel type',
-    'Port fees (THC, ISPS, etc. )', 'DM cost', 'DT cost',
-    'Port storage cost', 'Drayage costs (Port to WH)', 'Inbound costs',
-    'Storage costs (fm IB to Today/OB)', 'Outbound costs',
-    'Transport costs', 'Comments'
-]
+# Number of worker processes used to parse the warehouse workbooks (1 = sequential)
+INGEST_WORKERS = int(os.getenv('ETL_INGEST_WORKERS', '1'))
+
+# Reuse the parsed frame of workbooks that did not change since the last run
+USE_INGEST_CACHE = os.getenv('ETL_INGEST_CACHE', '1') == '1'
+
+# Version of the reading / column-mapping code; bump it when either changes so
+# that cached frames mapped by the old code are discarded
+INGEST_CACHE_VERSION = '3'  # 2: header plans, calamine reader; 3: last matching header wins again
+
+# 'append' inserts every row on every run; 'upsert' only sends new/changed rows
+# and soft-deletes rows that disappeared from the warehouse sheets. Upsert mode
+# needs these columns on daily_report (updated_at lets daily-data-transfer pick
+# up changed rows incrementally):
+#   alter table daily_report add column row_key text, add column row_hash text,
+#       add column deleted_at timestamptz, add column updated_at timestamptz;
+#   create unique index daily_report_row_key on daily_report (row_key);
+# Rows inserted earlier in append mode have no row_key; the first upsert run
+# soft-deletes them once its own rows are in, so they are not counted twice.
+UPLOAD_MODE = os.getenv('ETL_UPLOAD_MODE', 'append')
+
+# Stream one workbook at a time (read, map, prepare, upload) instead of building
+# the combined frame; peak memory then follows the largest single workbook
+STREAMING = os.getenv('ETL_STREAMING', '0') == '1'
+
+# Natural key of a daily_report row (rows sharing it are numbered in file order)
+ROW_KEY_COLUMNS = ['source_file', 'Container No.', 'Release Number', 'Wattage']
 
 
 def get_template_headers(template_path: str) -> List[str]:
@@ -115,50 +125,182 @@ def clean_column_name(col: str) -> str:
     return cleaned.strip()
 
 
-def map_columns(df: pd.DataFrame, template_headers: List[str]) -> pd.DataFrame:
+def resolve_header_plan(headers: List, template_headers: List[str]) -> HeaderPlan:
     """
-    Map DataFrame columns to template headers.
+    Work out which source column feeds which template column.
     
     Args:
-        df: DataFrame to map
+        headers: Raw source column headers
         template_headers: List of template column headers
         
     Returns:
-        DataFrame with columns mapped to template headers
+        List of (source column position, template column) pairs; when several
+        source columns match the same template column (e.g. 'Comments' and
+        'Comments ') the last one wins, as the uploaded records always had it
     """
     # Create normalized mapping
     normalized_template = {normalize_column_name(col): col for col in template_headers}
     
-    # Create column mapping
-    column_mapping = {}
-    for col in df.columns:
+    chosen = {}
+    for position, col in enumerate(headers):
         # Clean the source column name first
         cleaned_col = clean_column_name(col)
         normalized_col = normalize_column_name(cleaned_col)
-        if normalized_col in normalized_template:
-            column_mapping[col] = normalized_template[normalized_col]
+        target = normalized_template.get(normalized_col)
+        if target is not None:
+            chosen[target] = position
+    return sorted((position, target) for target, position in chosen.items())
+
+
+def map_columns(df: pd.DataFrame, template_headers: List[str], plan: Optional[HeaderPlan] = None) -> pd.DataFrame:
+    """
+    Map DataFrame columns to template headers.
+    
+    Args:
+        df: DataFrame to map
+        template_headers: List of template column headers
+        plan: Precomputed plan for this header layout (resolved if omitted)
+        
+    Returns:
+        DataFrame with columns mapped to template headers
+    """
+    if plan is None:
+        plan = resolve_header_plan(list(df.columns), template_headers)
+    
+    # Pick the mapped columns by position, then add the missing template
+    # columns (empty) and put everything in template order in one reindex
+    df_mapped = df.iloc[:, [position for position, _ in plan]]
+    df_mapped.columns = [target for _, target in plan]
+    return df_mapped.reindex(columns=template_headers)
+
+
+def list_excel_files(folder_path: Path) -> List[Path]:
+    """
+    List the Excel workbooks in the source folder in a stable order.
+    
+    Args:
+        folder_path: Folder containing the warehouse workbooks
+        
+    Returns:
+        List of workbook paths (.xlsx first, then .xls), excluding Office temp files
+    """
+    excel_files = list(folder_path.glob('*.xlsx')) + list(folder_path.glob('*.xls'))
+    return [f for f in excel_files if not f.name.startswith('~$')]  # Exclude temp files
+
+
+def load_workbook(file_path: Path, template_headers: List[str],
+                  known_plans: Optional[Dict[str, HeaderPlan]] = None) -> Tuple[Optional[pd.DataFrame], Optional[Tuple[List, HeaderPlan]]]:
+    """
+    Read a single workbook and map its columns to the template.
     
-    # Rename columns based on mapping
-    df_mapped = df.rename(columns=column_mapping)
+    Args:
+        file_path: Path to the Excel file
+        template_headers: List of template column headers
+        known_plans: Optional header signature -> plan mapping of known layouts
+        
+    Returns:
+        Tuple of (mapped DataFrame, (raw headers, plan used)); both are None if
+        the workbook is empty
+    """
+    df = read_excel(file_path)
     
-    # Add missing columns from template with None values
-    for template_col in template_headers:
-        if template_col not in df_mapped.columns:
-            df_mapped[template_col] = None
+    # Skip empty files
+    if df.empty:
+        return None, None
     
-    # Reorder columns to match template
-    df_mapped = df_mapped[template_headers]
+    headers = list(df.columns)
+    plan = (known_plans or {}).get(header_signature(headers))
+    if plan is None:
+        plan = resolve_header_plan(headers, template_headers)
     
-    return df_mapped
+    return map_columns(df, template_headers, plan), (headers, plan)
 
 
-def read_excel_files(source_folder: str, template_headers: List[str]) -> tuple[pd.DataFrame, int]:
+def _load_workbook_isolated(file_path: Path, template_headers: List[str],
+                            known_plans: Optional[Dict[str, HeaderPlan]] = None) -> Tuple[Optional[pd.DataFrame], Optional[Tuple[List, HeaderPlan]], Optional[str]]:
+    """
+    Worker entry point: load one workbook and return (DataFrame, layout, error message)
+    so that a failing file never takes down the rest of the batch.
+    """
+    try:
+        return (*load_workbook(file_path, template_headers, known_plans), None)
+    except Exception as e:
+        return None, None, str(e)
+
+
+def open_header_plans(template_headers: List[str]) -> HeaderPlanCache:
+    """
+    Open the store of known header layouts for the current template and
+    mapping code (INGEST_CACHE_VERSION).
+    """
+    return HeaderPlanCache('etl_header_plans', version=f"{INGEST_CACHE_VERSION}:{template_version(template_headers)}")
+
+
+def record_layout(plans: Optional[HeaderPlanCache], file_path: Path, layout: Optional[Tuple[List, HeaderPlan]]) -> None:
+    """
+    Count a workbook's header layout against the known ones and report schema drift.
+    
+    Args:
+        plans: Store of known header layouts (nothing is recorded if None)
+        file_path: Workbook the layout came from
+        layout: (raw headers, plan) returned by load_workbook
+    """
+    if plans is None or layout is None:
+        return
+    headers, plan = layout
+    if plans.get(headers) is not None:
+        return
+    
+    event = plans.add(headers, plan, source=file_path.name)
+    print(f"Schema drift: new header layout in {file_path.name} "
+          f"({event['mapped_columns']} of {len(headers)} columns mapped)")
+    if 'closest_source' in event:
+        print(f"  Closest known layout: {event['closest_source']}")
+        if event['added']:
+            print(f"  Added headers: {event['added']}")
+        if event['removed']:
+            print(f"  Removed headers: {event['removed']}")
+    if event['unmapped_headers']:
+        print(f"  Headers not in the template: {event['unmapped_headers']}")
+
+
+def template_version(template_headers: List[str]) -> str:
+    """
+    Version string of the column template; caches built for another template are discarded.
+    """
+    return hashlib.sha256('\n'.join(template_headers).encode('utf-8')).hexdigest()
+
+
+def open_ingest_cache(template_headers: List[str]) -> FrameCache:
+    """
+    Open the workbook cache. The template and INGEST_CACHE_VERSION are part of
+    the cache version, so a changed column list or changed reading / mapping
+    code invalidates all previously mapped frames.
+    """
+    return FrameCache('etl_workbooks', version=f"{INGEST_CACHE_VERSION}:{template_version(template_headers)}")
+
+
+def read_excel_files(source_folder: str, template_headers: List[str], workers: int = INGEST_WORKERS,
+                     cache: Optional[FrameCache] = None,
+                     failed_files: Optional[List[str]] = None,
+                     plans: Optional[HeaderPlanCache] = None) -> tuple[pd.DataFrame, int]:
     """
     Read all Excel files from source folder and combine them.
     
+    With workers > 1 the workbooks are parsed and mapped in a process pool.
+    Results are collected in file order, so the combined DataFrame is the
+    same as the one produced by the sequential path.
+    
+    When a cache is given, unchanged workbooks are served from it and only new
+    or modified files are parsed; the cache counts hits and misses.
+    
     Args:
         source_folder: Path to folder containing Excel files
         template_headers: List of template column headers
+        workers: Number of worker processes (1 = sequential)
+        cache: Optional FrameCache of previously mapped workbooks
+        failed_files: Optional list that receives the names of workbooks that could not be read
+        plans: Optional store of known header layouts, reused and extended
         
     Returns:
         Tuple of (Combined DataFrame with all data, number of files processed)
@@ -171,34 +313,59 @@ def read_excel_files(source_folder: str, template_headers: List[str]) -> tuple[p
         raise FileNotFoundError(f"Source folder not found: {source_folder}")
     
     # Get all Excel files
-    excel_files = list(folder_path.glob('*.xlsx')) + list(folder_path.glob('*.xls'))
-    excel_files = [f for f in excel_files if not f.name.startswith('~$')]  # Exclude temp files
+    excel_files = list_excel_files(folder_path)
     
     total_files = len(excel_files)
     
-    files_processed = 0
+    # Serve unchanged workbooks from the cache, parse the rest
+    results = {}
+    to_parse = []
     for file_path in excel_files:
-        try:
-            # Read Excel file
-            df = pd.read_excel(file_path)
-            
-            # Skip empty files
-            if df.empty:
+        if cache is not None:
+            hit, df_cached = cache.lookup(file_path)
+            if hit:
+                results[file_path] = (df_cached, None)
                 continue
-            
-            # Map columns to template
-            df_mapped = map_columns(df, template_headers)
-            
-            # Add metadata
-            df_mapped['source_file'] = file_path.name
-            df_mapped['processed_at'] = datetime.now().isoformat()
-            
-            all_data.append(df_mapped)
-            files_processed += 1
-            
-        except Exception as e:
-            logger.error(f"Error processing {file_path.name}: {e}")
+        to_parse.append(file_path)
+    
+    known_plans = plans.plans() if plans is not None else None
+    if workers > 1 and len(to_parse) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(to_parse))) as executor:
+            parsed = list(executor.map(_load_workbook_isolated, to_parse, repeat(template_headers),
+                                       repeat(known_plans)))
+    else:
+        parsed = [_load_workbook_isolated(file_path, template_headers, known_plans) for file_path in to_parse]
+    
+    for file_path, (df_mapped, layout, error) in zip(to_parse, parsed):
+        results[file_path] = (df_mapped, error)
+        if error is None:
+            record_layout(plans, file_path, layout)
+            if cache is not None:
+                cache.store(file_path, df_mapped)
+    
+    if cache is not None:
+        cache.save(keep_files=excel_files)
+    if plans is not None:
+        plans.save()
+    
+    files_processed = 0
+    for file_path in excel_files:
+        df_mapped, error = results[file_path]
+        if error is not None:
+            logger.error(f"Error processing {file_path.name}: {error}")
+            if failed_files is not None:
+                failed_files.append(file_path.name)
             continue
+        
+        if df_mapped is None:
+            continue
+        
+        # Add metadata
+        df_mapped['source_file'] = file_path.name
+        df_mapped['processed_at'] = datetime.now().isoformat()
+        
+        all_data.append(df_mapped)
+        files_processed += 1
     
     if not all_data:
         return pd.DataFrame(), 0
@@ -209,44 +376,59 @@ def read_excel_files(source_folder: str, template_headers: List[str]) -> tuple[p
     return combined_df, files_processed
 
 
-def convert_date_column(series: pd.Series) -> pd.Series:
+def iter_mapped_workbooks(source_folder: str, template_headers: List[str], cache: Optional[FrameCache] = None,
+                          failed_files: Optional[List[str]] = None,
+                          plans: Optional[HeaderPlanCache] = None) -> Iterator[Tuple[Path, pd.DataFrame]]:
     """
-    Convert date column handling both string dates and Excel serial numbers.
+    Yield the mapped DataFrame of each workbook, one file at a time.
     
     Args:
-        series: Pandas Series containing date values
+        source_folder: Path to folder containing Excel files
+        template_headers: List of template column headers
+        cache: Optional FrameCache of previously mapped workbooks
+        failed_files: Optional list that receives the names of workbooks that could not be read
+        plans: Optional store of known header layouts, reused and extended
         
-    Returns:
-        Series with properly formatted date strings (YYYY-MM-DD)
+    Yields:
+        Tuples of (workbook path, mapped DataFrame with metadata columns)
     """
-    def parse_mixed_date(date_val):
-        if pd.isna(date_val) or date_val is None or date_val == '':
-            return None
-        
-        # If it's already a datetime object, format it
-        if isinstance(date_val, (pd.Timestamp, datetime)):
-            return date_val.strftime('%Y-%m-%d')
+    folder_path = Path(source_folder)
+    
+    if not folder_path.exists():
+        logger.error(f"Source folder does not exist: {source_folder}")
+        raise FileNotFoundError(f"Source folder not found: {source_folder}")
+    
+    excel_files = list_excel_files(folder_path)
+    
+    for file_path in excel_files:
+        hit = False
+        if cache is not None:
+            hit, df_mapped = cache.lookup(file_path)
+        if not hit:
+            known_plans = plans.plans() if plans is not None else None
+            df_mapped, layout, error = _load_workbook_isolated(file_path, template_headers, known_plans)
+            if error is not None:
+                logger.error(f"Error processing {file_path.name}: {error}")
+                if failed_files is not None:
+                    failed_files.append(file_path.name)
+                continue
+            record_layout(plans, file_path, layout)
+            if cache is not None:
+                cache.store(file_path, df_mapped)
         
-        # If it's a number, treat as Excel serial date
-        if isinstance(date_val, (int, float)):
-            try:
-                # Excel's epoch starts at 1899-12-30
-                converted_date = pd.to_datetime(date_val, origin='1899-12-30', unit='D')
-                return converted_date.strftime('%Y-%m-%d')
-            except:
-                return None
+        if df_mapped is None:
+            continue
         
-        # Otherwise, try to parse as string
-        try:
-            parsed_date = pd.to_datetime(date_val, format='mixed', dayfirst=True, errors='coerce')
-            if pd.notna(parsed_date):
-                return parsed_date.strftime('%Y-%m-%d')
-        except:
-            pass
+        # Add metadata
+        df_mapped['source_file'] = file_path.name
+        df_mapped['processed_at'] = datetime.now().isoformat()
         
-        return None
+        yield file_path, df_mapped
     
-    return series.apply(parse_mixed_date)
+    if cache is not None:
+        cache.save(keep_files=excel_files)
+    if plans is not None:
+        plans.save()
 
 
 def prepare_data_for_supabase(df: pd.DataFrame) -> List[Dict]:
@@ -259,36 +441,10 @@ def prepare_data_for_supabase(df: pd.DataFrame) -> List[Dict]:
     Returns:
         List of dictionaries ready for Supabase
     """
-    # Convert DataFrame to list of dictionaries
-    # Replace NaN with None for proper NULL handling in database
-    df_clean = df.where(pd.notnull(df), None)
-    
-    # Transform date columns before converting to strings
-    date_columns = [
-        'Outbound date',
-        'Agreed Delivery date',
-        'Delivery date',
-        'ETD date POL',
-        'ATD date POL',
-        'ETA date',
-        'ATA date',
-        'Import date',
-        'Planned Inbound date',
-        'Inbound date',
-        'Release date from port (ATA date)',
-        'Container Returned date',
-        'Release date',
-        'date CMR sent to JASolar'
-    ]
-    
-    for col in date_columns:
-        if col in df_clean.columns:
-            df_clean[col] = convert_date_column(df_clean[col])
-    
-    # Convert all values to strings as per table schema, except source metadata and dates
-    for col in df_clean.columns:
-        if col not in ['source_file', 'processed_at'] and col not in date_columns:
-            df_clean[col] = df_clean[col].astype(str).replace('None', None)
+    # Cast every DB column once to its declared type: numbers stay numbers,
+    # dates become ISO strings and missing values become None. Cells of numeric
+    # columns that are not numbers ('N/A', '620W') are reported and uploaded as text
+    df_clean = cast_to_schema(df.copy(), nullable_integers=True, keep_unparsed=True)
     
     records = df_clean.to_dict('records')
     
@@ -306,36 +462,149 @@ def prepare_data_for_supabase(df: pd.DataFrame) -> List[Dict]:
     return records
 
 
-def upload_to_supabase(records: List[Dict], batch_size: int = 1000) -> int:
+def upload_to_supabase(records: List[Dict]) -> UploadStats:
     """
-    Upload records to Supabase in batches.
+    Upload records to Supabase in size-based batches over a pooled connection.
     
     Args:
         records: List of dictionaries to upload
-        batch_size: Number of records per batch
         
     Returns:
-        Number of successfully uploaded records
+        UploadStats with the number of uploaded records and throughput
     """
     if not SUPABASE_URL or not SUPABASE_KEY:
         logger.error("Supabase credentials not found. Set SUPABASE_URL and SUPABASE_KEY environment variables.")
         raise ValueError("Missing Supabase credentials")
     
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    try:
+        return upload_records(TABLE_NAME, records)
+    except Exception as e:
+        logger.error(f"Error uploading to {TABLE_NAME}: {e}")
+        raise
+
+
+def add_row_identity(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the row_key and row_hash columns used by the upsert mode.
+    
+    Args:
+        df: Combined DataFrame with template columns and source_file
+        
+    Returns:
+        The same DataFrame with row_key and row_hash added
+    """
+    df['row_key'] = build_row_keys(df, ROW_KEY_COLUMNS)
+    df['row_hash'] = hash_rows(df, DB_COLUMNS)
+    return df
+
+
+def sync_to_supabase(record_batches: Iterable[List[Dict]], failed_files: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Upsert new and changed records and soft-delete records that disappeared.
     
-    total_records = len(records)
-    uploaded_count = 0
+    The batches are consumed one at a time, so they can be produced lazily
+    (one workbook per batch in streaming mode). Active rows without a row_key
+    (inserted in append mode, before the table was switched to upsert) are
+    soft-deleted once the run's rows are in, since those rows replace them.
     
-    for i in range(0, total_records, batch_size):
-        batch = records[i:i + batch_size]
-        try:
-            response = supabase.table(TABLE_NAME).insert(batch).execute()
-            uploaded_count += len(batch)
-        except Exception as e:
-            logger.error(f"Error uploading batch {i//batch_size + 1}: {e}")
-            raise
+    Args:
+        record_batches: Batches of prepared records including row_key and row_hash
+        failed_files: Workbooks that could not be read in this run; when any are
+            listed, nothing is soft-deleted since their rows are simply missing
+            (nor when the batches hold no records at all)
+        
+    Returns:
+        Dictionary with the number of inserted, updated, unchanged and deleted rows
+    """
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        logger.error("Supabase credentials not found. Set SUPABASE_URL and SUPABASE_KEY environment variables.")
+        raise ValueError("Missing Supabase credentials")
+    
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+    seen_keys = set()
+    synced_at = datetime.now(timezone.utc).isoformat()
     
-    return uploaded_count
+    with create_rest_client() as client:
+        existing = fetch_frame(TABLE_NAME, ['id', 'row_key', 'row_hash'], {'deleted_at': 'is.null'}, client=client)
+        unkeyed = existing.loc[existing['row_key'].isna(), 'id'].tolist()
+        existing = existing[existing['row_key'].notna()]
+        previous = dict(zip(existing['row_key'], existing['row_hash']))
+        
+        for records in record_batches:
+            current = pd.Series({record['row_key']: record['row_hash'] for record in records}, dtype=object)
+            seen_keys.update(current.index)
+            diff = diff_row_hashes(current, previous)
+            for name in ('inserted', 'updated', 'unchanged'):
+                counts[name] += len(diff[name])
+            
+            # Rows that were soft-deleted earlier and came back count as inserted;
+            # sending deleted_at = None restores them
+            to_send = set(diff['inserted']) | set(diff['updated'])
+            changed = [dict(record, deleted_at=None, updated_at=synced_at)
+                       for record in records if record['row_key'] in to_send]
+            if changed:
+                upload_records(TABLE_NAME, changed, client=client, on_conflict='row_key')
+        
+        deleted = [key for key in previous if key not in seen_keys]
+        if not seen_keys and (deleted or unkeyed):
+            # No workbook produced rows (empty folder, only empty workbooks):
+            # nothing tells us these rows are gone, so keep the table as it is
+            logger.error(f"Skipping soft-delete of {len(deleted) + len(unkeyed)} rows: no records in this run")
+            deleted, unkeyed = [], []
+        if deleted and failed_files:
+            logger.error(f"Skipping soft-delete of {len(deleted)} rows: unreadable workbooks {failed_files}")
+            deleted = []
+        if deleted:
+            update_records(TABLE_NAME, {'deleted_at': synced_at, 'updated_at': synced_at}, 'row_key', deleted,
+                           client=client)
+        
+        # One-time switch from append mode: the keyed rows just sent replace the unkeyed ones
+        if unkeyed and failed_files:
+            logger.error(f"Skipping soft-delete of {len(unkeyed)} rows without row_key: unreadable workbooks {failed_files}")
+            unkeyed = []
+        if unkeyed:
+            print(f"Soft-deleting {len(unkeyed)} rows without row_key (inserted in append mode)")
+            update_records(TABLE_NAME, {'deleted_at': synced_at, 'updated_at': synced_at}, 'id', unkeyed,
+                           client=client)
+        counts['deleted'] = len(deleted) + len(unkeyed)
+    
+    return counts
+
+
+def stream_to_supabase(template_headers: List[str], cache: Optional[FrameCache] = None,
+                       plans: Optional[HeaderPlanCache] = None) -> Tuple[int, int, object]:
+    """
+    Streaming ETL: read, map, prepare and upload one workbook before moving to the next.
+    
+    Args:
+        template_headers: List of template column headers
+        cache: Optional FrameCache of previously mapped workbooks
+        plans: Optional store of known header layouts
+        
+    Returns:
+        Tuple of (files processed, total records, sync counts in upsert mode or UploadStats in append mode)
+    """
+    progress = {'files': 0, 'records': 0}
+    failed_files = []
+    
+    def record_batches():
+        for file_path, df_mapped in iter_mapped_workbooks(SOURCE_FOLDER, template_headers, cache, failed_files, plans):
+            if UPLOAD_MODE == 'upsert':
+                df_mapped = add_row_identity(df_mapped)
+            records = prepare_data_for_supabase(df_mapped)
+            del df_mapped
+            progress['files'] += 1
+            progress['records'] += len(records)
+            yield records
+    
+    if UPLOAD_MODE == 'upsert':
+        result = sync_to_supabase(record_batches(), failed_files)
+    else:
+        result = UploadStats()
+        for records in record_batches():
+            result.add(upload_to_supabase(records))
+    
+    return progress['files'], progress['records'], result
 
 
 def main():
@@ -346,26 +615,56 @@ def main():
         # Step 1: Get template headers
         template_headers = get_template_headers(TEMPLATE_FILE)
         
-        # Step 2: Read and combine Excel files
-        combined_df, files_processed = read_excel_files(SOURCE_FOLDER, template_headers)
-        
-        if combined_df.empty:
-            print("No data to upload")
-            return
+        cache = open_ingest_cache(template_headers) if USE_INGEST_CACHE else None
+        plans = open_header_plans(template_headers)
         
-        # Step 3: Prepare data for Supabase
-        records = prepare_data_for_supabase(combined_df)
-        
-        # Step 4: Upload to Supabase
-        uploaded_count = upload_to_supabase(records)
+        if STREAMING:
+            # Steps 2-4 per workbook
+            files_processed, total_records, result = stream_to_supabase(template_headers, cache, plans)
+            if files_processed == 0:
+                print("No data to upload")
+                return
+        else:
+            # Step 2: Read and combine Excel files
+            failed_files = []
+            combined_df, files_processed = read_excel_files(SOURCE_FOLDER, template_headers, cache=cache,
+                                                            failed_files=failed_files, plans=plans)
+            
+            if combined_df.empty:
+                print("No data to upload")
+                return
+            
+            # Step 3: Prepare data for Supabase
+            if UPLOAD_MODE == 'upsert':
+                combined_df = add_row_identity(combined_df)
+            records = prepare_data_for_supabase(combined_df)
+            total_records = len(records)
+            
+            # Step 4: Upload to Supabase
+            if UPLOAD_MODE == 'upsert':
+                result = sync_to_supabase([records], failed_files)
+            else:
+                result = upload_to_supabase(records)
         
         # Final Summary
         print(f"\n{'='*80}")
         print(f"ETL PROCESS COMPLETED SUCCESSFULLY")
         print(f"{'='*80}")
         print(f"Total Files Processed: {files_processed}")
-        print(f"Total Records: {len(records)}")
-        print(f"Successfully Uploaded Records: {uploaded_count}")
+        if cache is not None:
+            print(f"Workbook Cache Hits: {cache.hits}")
+            print(f"Workbook Cache Misses: {cache.misses}")
+        print(f"Known Header Layouts Reused: {plans.hits}")
+        print(f"New Header Layouts: {plans.misses}")
+        print(f"Total Records: {total_records}")
+        if UPLOAD_MODE == 'upsert':
+            print(f"New Records: {result['inserted']}")
+            print(f"Changed Records: {result['updated']}")
+            print(f"Unchanged Records: {result['unchanged']}")
+            print(f"Soft-deleted Records: {result['deleted']}")
+        else:
+            print(f"Successfully Uploaded Records: {result.rows}")
+            print(f"Upload Throughput: {result.rows_per_sec:.0f} rows/sec")
         print(f"{'='*80}\n")
         
     except Exception as e:
@@ -5,6 +5,11 @@ import pandas as pd
 from pathlib import Path
 from datetime import datetime, date
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.excel import write_workbook
+from common.handoff import OUTBOUND_REPORT_HANDOFF, load_frame
+from common.logistics_summary import between_days, build_summary, megawattage, record_count
+
 def generate_bmo_logistics_report():
     """
     Generate BMO logistics report by processing the latest logistics report file.
@@ -35,13 +40,15 @@ def generate_bmo_logistics_report():
         latest_file = max(report_files, key=os.path.getmtime)
         print(f"Found latest logistics report: {latest_file}")
         
-        # Read the Outbound_logistics_report data
-        try:
-            df = pd.read_excel(latest_file, sheet_name='Outbound_logistics_report')
-            print(f"Successfully read data from Outbound_logistics_report sheet: {len(df)} records")
-        except Exception as e:
-            print(f"Error reading Outbound_logistics_report sheet: {e}")
-            sys.exit(1)
+        # Typed frame published by logistics-report with this workbook, else the Outbound_logistics_report sheet
+        df = load_frame(OUTBOUND_REPORT_HANDOFF, source=latest_file)
+        if df is None:
+            try:
+                df = pd.read_excel(latest_file, sheet_name='Outbound_logistics_report')
+                print(f"Successfully read data from Outbound_logistics_report sheet: {len(df)} records")
+            except Exception as e:
+                print(f"Error reading Outbound_logistics_report sheet: {e}")
+                sys.exit(1)
         
         if 'Delivery date' in df.columns:
                 # Create a copy to avoid modifying original data
@@ -125,22 +132,8 @@ def generate_bmo_logistics_report():
         ]
         mtd_df = mtd_df.drop(columns=[col for col in columns_to_remove if col in mtd_df.columns], errors='ignore')
         
-        # Save the report
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        output_dir = r"C:\Users\DeepakSureshNidagund\OneDrive - JA Solar GmbH\Logistics Reporting\000_Master_Query_Reports\Automation_DB\BMO_Reports"
-        output_file = os.path.join(output_dir, f"bmo-report_{current_date}.xlsx")
-        
-        if os.path.exists(output_file):
-            os.remove(output_file)
-            print(f"Deleted existing file: {output_file}")
-        
-        with pd.ExcelWriter(output_file, engine='xlsxwriter') as writer:
-            mtd_df.to_excel(writer, sheet_name='BMO Report MTD', index=False)
-        
-        print(f"BMO report saved to: {output_file}")
-        
-        # Generate and display summary
-        summary = generate_bmo_summary(mtd_df)
+        # Generate and display summary (before writing, so both sheets go out in one pass)
+        summary = generate_bmo_summary(mtd_df.copy())
         # Add Sales/Logistics to Push to summary
         push_data = get_sales_and_logistics_to_push()
         if push_data:
@@ -165,11 +158,22 @@ def generate_bmo_logistics_report():
         print("\nBMO Summary:")
         for k, v in summary.items():
             print(f"{k}: {v}")
-        # Save summary to a new sheet in the same Excel file (as rows, not columns)
+        # Summary as rows, not columns
         summary_df = pd.DataFrame(list(summary.items()), columns=["JA Solar Logistics Report", "Mwps"])
-        with pd.ExcelWriter(output_file, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
-        print(f"Summary saved to: {output_file} (sheet: 'Summary')")
+
+        # Save the report
+        current_date = datetime.now().strftime("%Y-%m-%d")
+        output_dir = r"C:\Users\DeepakSureshNidagund\OneDrive - JA Solar GmbH\Logistics Reporting\000_Master_Query_Reports\Automation_DB\BMO_Reports"
+        output_file = os.path.join(output_dir, f"bmo-report_{current_date}.xlsx")
+        
+        if os.path.exists(output_file):
+            os.remove(output_file)
+            print(f"Deleted existing file: {output_file}")
+        
+        # Both sheets in one xlsxwriter pass (constant_memory for large months)
+        write_workbook(output_file, {'BMO Report MTD': mtd_df, 'Summary': summary_df})
+        
+        print(f"BMO report saved to: {output_file} (sheets: 'BMO Report MTD', 'Summary')")
         return output_file
         
     except Exception as e:
@@ -199,15 +203,20 @@ def generate_bmo_summary(df: pd.DataFrame, today: date = None) -> dict:
     print(f"Start of month: {start_of_month}")
     print(f"Today: {today}")
     
+    # Records and MegaWattage per outbound day, aggregated once
+    summary = build_summary(df, 'Outbound date')
+    on_today = between_days(summary, today, today)
+    mask_mtd = between_days(summary, start_of_month, today)
+
     # Outbound today
-    outbound_today = round(df.loc[df['Outbound date'] == today, 'MegaWattage_numeric'].sum(), 2)
-    print(f"Records for today ({today}): {len(df[df['Outbound date'] == today])}")
+    outbound_today = round(megawattage(summary, on_today), 2)
+    print(f"Records for today ({today}): {record_count(summary, on_today)}")
 
     # Accumulated outbound till today (MTD)
-    mask_mtd = (df['Outbound date'] >= start_of_month) & (df['Outbound date'] <= today)
-    accumulated_outbound_mtd = round(df.loc[mask_mtd, 'MegaWattage_numeric'].sum(), 2)
-    print(f"Records for first day ({start_of_month}): {len(df[df['Outbound date'] == start_of_month])}")
-    print(f"Total MTD records: {len(df[mask_mtd])}")
+    accumulated_outbound_mtd = round(megawattage(summary, mask_mtd), 2)
+    print(f"Records for first day ({start_of_month}): "
+          f"{record_count(summary, between_days(summary, start_of_month, start_of_month))}")
+    print(f"Total MTD records: {record_count(summary, mask_mtd)}")
 
     # Outbound needed to achieve target
     outbound_needed_to_achieve_target = round(target_of_month - accumulated_outbound_mtd, 2)
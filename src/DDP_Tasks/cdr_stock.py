@@ -3,8 +3,13 @@ import glob
 import logging
 from datetime import datetime
 import re
+import sys
+from pathlib import Path
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.cdr import read_cdr
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -65,9 +70,10 @@ def process_and_save_file(source_file, destination_dir):
         # Create destination directory if it doesn't exist
         os.makedirs(destination_dir, exist_ok=True)
         
-        # Read the CSV file
-        logging.info("Reading CSV file...")
-        df = pd.read_csv(source_file)
+        # Read the CDR (typed Parquet copy when there is one); the rows are picked
+        # below, case-insensitively, which an exact-match filter on read would not do
+        logging.info("Reading CDR file...")
+        df = read_cdr(source_file)
         
         # Apply filters
         logging.info("Applying filters to the data...")
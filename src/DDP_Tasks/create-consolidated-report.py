@@ -6,82 +6,109 @@ from supabase import create_client, Client
 from dotenv import load_dotenv
 from datetime import datetime
 
-def convert_date_column(series: pd.Series) -> pd.Series:
-    """
-    Convert date column handling both string dates and Excel serial numbers.
-    
-    Args:
-        series: Pandas Series containing date values
-        
-    Returns:
-        Series with properly formatted date strings (YYYY-MM-DD)
-    """
-    def parse_mixed_date(date_val):
-        if pd.isna(date_val) or date_val is None or date_val == '':
-            return None
-        
-        # If it's already a datetime object, format it
-        if isinstance(date_val, (pd.Timestamp, datetime)):
-            return date_val.strftime('%Y-%m-%d')
-        
-        # If it's a number, treat as Excel serial date
-        if isinstance(date_val, (int, float)):
-            try:
-                # Excel's epoch starts at 1899-12-30
-                converted_date = pd.to_datetime(date_val, origin='1899-12-30', unit='D')
-                return converted_date.strftime('%Y-%m-%d')
-            except:
-                return None
-        
-        # Otherwise, try to parse as string
-        try:
-            parsed_date = pd.to_datetime(date_val, format='mixed', dayfirst=True, errors='coerce')
-            if pd.notna(parsed_date):
-                return parsed_date.strftime('%Y-%m-%d')
-        except:
-            pass
-        
-        return None
-    
-    return series.apply(parse_mixed_date)
-
-
-def fetch_all_data(supabase: Client, table_name: str) -> list:
-    """Fetch all data from a table in batches."""
-    all_data = []
-    batch_size = 1000
-    offset = 0
-    
-    while True:
-        try:
-            response = supabase.table(table_name).select("*").range(offset, offset + batch_size - 1).execute()
-            batch = response.data
-            if not batch:
-                break
-            all_data.extend(batch)
-            if len(batch) < batch_size:
-                break
-            offset += batch_size
-            print(f"Fetched {len(all_data)} rows from {table_name} so far...")
-        except Exception as e:
-            print(f"Error fetching data from {table_name}: {e}")
-            raise
-    
-    return all_data
-
-def save_to_csv(df: pd.DataFrame, directory: str, filename: str) -> bool:
-    """Save DataFrame to CSV at specified location."""
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.cdr import write_cdr_parquet
+from common.dates import DATE_COLUMNS, convert_date_column
+from common.delta import build_row_keys, diff_row_hashes, hash_rows
+from common.fanout import write_csv_fanout
+from common.supabase_rest import create_rest_client, delete_records, fetch_frame, upload_records
+from common.arrow import PARQUET_SUPPORTED
+from common.table_snapshot import load_table
+
+# 'replace' deletes all of consolidated_report and inserts every row again;
+# 'diff' only sends new and changed rows and deletes rows that went away, so the
+# table is never empty and the write cost follows the change. Diff mode needs:
+#   alter table consolidated_report add column row_key text, add column row_hash text;
+#   create unique index consolidated_report_row_key on consolidated_report (row_key);
+UPLOAD_MODE = os.getenv('CONSOLIDATED_UPLOAD_MODE', 'replace')
+
+# A row is identified by the table it came from and its id there
+ROW_KEY_COLUMNS = ['data_source', 'id']
+
+
+def save_to_parquet(df: pd.DataFrame, directory: str, filename: str) -> bool:
+    """Save the typed Parquet copy of the CDR that the CDR consumers read."""
+    filepath = os.path.join(directory, filename)
+    if not PARQUET_SUPPORTED:
+        print(f"pyarrow is not installed; skipping {filepath}")
+        return False
     try:
-        os.makedirs(directory, exist_ok=True)
-        filepath = os.path.join(directory, filename)
-        print(f"Saving combined data to {filepath}...")
-        df.to_csv(filepath, index=False)
-        print(f"Successfully saved combined data to {filepath}")
+        print(f"Saving typed copy to {filepath}...")
+        write_cdr_parquet(df, filepath)
+        print(f"Successfully saved typed copy to {filepath}")
         return True
     except Exception as e:
         print(f"Error saving to {filepath}: {e}")
         return False
 
+
+def replace_consolidated_report(supabase: Client, records: list) -> None:
+    """Delete every row of consolidated_report and insert the records."""
+    # Delete existing records
+    try:
+        print("Deleting existing records from consolidated_report table...")
+        supabase.table("consolidated_report").delete().neq("id", 0).execute()
+        print("Existing records deleted successfully.")
+    except Exception as e:
+        print(f"Error deleting existing records: {e}")
+
+    # Insert new records in concurrent, size-based batches
+    print(f"Ready to insert {len(records)} records into consolidated_report.")
+    try:
+        stats = upload_records("consolidated_report", records)
+        print(f"Inserted into consolidated_report: {stats}")
+    except Exception as e:
+        print(f"Exception inserting into consolidated_report: {e}")
+
+
+def sync_consolidated_report(supabase: Client, combined_df: pd.DataFrame) -> dict:
+    """
+    Apply only the differences between the combined frame and consolidated_report.
+
+    Every row gets a row_key (data_source + id) and a hash of its content; the
+    keys and hashes already stored in the table tell which rows are new,
+    changed or gone. Gone rows are deleted first (a row moving from current to
+    archive keeps its id), then new and changed rows are upserted. PostgREST
+    cannot span requests with one transaction, so instead of a swap the table
+    is only ever missing the rows that are being removed anyway.
+
+    Args:
+        supabase: Supabase client (used for the one-time rebuild)
+        combined_df: Combined current + archive rows, dates converted
+
+    Returns:
+        Dictionary with the number of inserted, updated, unchanged and deleted rows
+    """
+    content_columns = list(combined_df.columns)
+    combined_df = combined_df.copy()
+    combined_df['row_key'] = build_row_keys(combined_df, ROW_KEY_COLUMNS)
+    combined_df['row_hash'] = hash_rows(combined_df, content_columns)
+    combined_df = combined_df.where(pd.notnull(combined_df), None)
+
+    with create_rest_client() as client:
+        existing = fetch_frame("consolidated_report", ['row_key', 'row_hash'], client=client)
+        if existing['row_key'].isna().any():
+            # Rows written before diff mode have no key; rebuild the table once
+            print("consolidated_report has rows without row_key; rebuilding it once.")
+            replace_consolidated_report(supabase, combined_df.to_dict(orient="records"))
+            return {'inserted': len(combined_df), 'updated': 0, 'unchanged': 0, 'deleted': len(existing)}
+
+        previous = dict(zip(existing['row_key'], existing['row_hash']))
+        current = pd.Series(combined_df['row_hash'].to_numpy(), index=combined_df['row_key'], dtype=object)
+        diff = diff_row_hashes(current, previous)
+
+        if diff['deleted']:
+            delete_records("consolidated_report", "row_key", diff['deleted'], client=client)
+
+        to_send = combined_df[combined_df['row_key'].isin(set(diff['inserted']) | set(diff['updated']))]
+        if not to_send.empty:
+            stats = upload_records("consolidated_report", to_send.to_dict(orient="records"), client=client,
+                                   on_conflict="row_key")
+            print(f"Upserted into consolidated_report: {stats}")
+
+    return {name: len(keys) for name, keys in diff.items()}
+
+
 def create_consolidated_report():
     """Main function to create consolidated report from current and archive data."""
     try:
@@ -105,16 +132,14 @@ def create_consolidated_report():
 
         # Fetch data from both tables
         print("Fetching data from current_report table...")
-        current_data = fetch_all_data(supabase, "current_report")
-        print(f"Fetched {len(current_data)} total rows from current_report.")
+        current_df = fetch_frame("current_report")
+        print(f"Fetched {len(current_df)} total rows from current_report.")
 
-        print("Fetching data from archive_data table...")
-        archive_data = fetch_all_data(supabase, "archive_data")
-        print(f"Fetched {len(archive_data)} total rows from archive_data.")
-
-        # Convert to DataFrames
-        current_df = pd.DataFrame(current_data)
-        archive_df = pd.DataFrame(archive_data)
+        # archive_data barely changes: read it from the local snapshot, fetching only new rows
+        # (set ARCHIVE_UPDATED_COLUMN if the table has a timestamp bumped on every edit)
+        print("Loading data from archive_data table...")
+        archive_df = load_table("archive_data", os.getenv("ARCHIVE_UPDATED_COLUMN") or None)
+        print(f"Loaded {len(archive_df)} total rows from archive_data.")
 
         # Add source column
         if not current_df.empty:
@@ -134,22 +159,7 @@ def create_consolidated_report():
         
         # Transform date columns
         print("Transforming date columns...")
-        date_columns = [
-            'Outbound date',
-            'Agreed Delivery date',
-            'Delivery date',
-            'ETD date POL',
-            'ATD date POL',
-            'ETA date',
-            'ATA date',
-            'Import date',
-            'Planned Inbound date',
-            'Inbound date',
-            'Release date from port (ATA date)',
-            'Container Returned date',
-            'Release date',
-            'date CMR sent to JASolar'
-        ]
+        date_columns = DATE_COLUMNS
         
         for col in date_columns:
             if col in combined_df.columns:
@@ -164,37 +174,25 @@ def create_consolidated_report():
         output_dir2 = r"C:\Users\DeepakSureshNidagund\OneDrive - JA Solar GmbH\Logistics Reporting\000_Master_Query_Reports\Automation_DB\CDR_Reports"
         output_dir3 = r"C:\Users\DeepakSureshNidagund\JA Solar GmbH\Power BI Setup - PowerBISetup\CDR"
 
-        # Save to both locations
-        save_to_csv(combined_df, output_dir1, "CDR.csv")
-        save_to_csv(combined_df, output_dir2, f"CDR_{current_date}.csv")
-        save_to_csv(combined_df, output_dir3, f"CDR_{current_date}.csv")
-
-        # Prepare data for Supabase
-        combined_df = combined_df.where(pd.notnull(combined_df), None)
-        records = combined_df.to_dict(orient="records")
-        batch_size = 500
-
-        # Delete existing records
-        try:
-            print("Deleting existing records from consolidated_report table...")
-            supabase.table("consolidated_report").delete().neq("id", 0).execute()
-            print("Existing records deleted successfully.")
-        except Exception as e:
-            print(f"Error deleting existing records: {e}")
-
-        # Insert new records in batches
-        print(f"Ready to insert {len(records)} records into consolidated_report.")
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i+batch_size]
-            try:
-                batch = [{k: (None if pd.isna(v) else v) for k, v in record.items()} for record in batch]
-                response = supabase.table("consolidated_report").insert(batch).execute()
-                if not response.data:
-                    print(f"Error inserting batch {i//batch_size + 1}: {response.__dict__}")
-                else:
-                    print(f"Batch {i//batch_size + 1} inserted successfully.")
-            except Exception as e:
-                print(f"Exception inserting batch {i//batch_size + 1}: {e}")
+        # Encode the CSV once and copy it to all locations
+        results = write_csv_fanout(combined_df, [
+            os.path.join(output_dir1, "CDR.csv"),
+            os.path.join(output_dir2, f"CDR_{current_date}.csv"),
+            os.path.join(output_dir3, f"CDR_{current_date}.csv"),
+        ])
+        if not all(result.ok for result in results):
+            print("Some CDR copies could not be written, see above.")
+        # The CSVs stay for Power BI; the report scripts read the typed copy
+        save_to_parquet(combined_df, output_dir2, f"CDR_{current_date}.parquet")
+
+        if UPLOAD_MODE == 'diff':
+            counts = sync_consolidated_report(supabase, combined_df)
+            print(f"consolidated_report synced: {counts}")
+        else:
+            # Prepare data for Supabase
+            combined_df = combined_df.where(pd.notnull(combined_df), None)
+            records = combined_df.to_dict(orient="records")
+            replace_consolidated_report(supabase, records)
 
         print("Consolidated report creation completed.")
 
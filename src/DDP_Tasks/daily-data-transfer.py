@@ -1,132 +1,124 @@
 import os
-import re
 import sys
-from datetime import datetime
+import json
+from datetime import datetime, timedelta
 from pathlib import Path
 import pandas as pd
-from supabase import create_client, Client
 from dotenv import load_dotenv
 
-def run_daily_data_transfer():
-    """
-    Main function to handle the daily data transfer process from daily_report to current_report.
-    Includes data fetching, transformation, and insertion into Supabase.
-    """
-    # Load environment variables from default .env location if present
-    env_path = Path(__file__).parents[1] / ".env"
-    if env_path.exists():
-        load_dotenv(env_path)
-    else:
-        load_dotenv()
-
-    # Initialize Supabase client
-    if not os.getenv("SUPABASE_URL") or not os.getenv("SUPABASE_KEY"):
-        print("Missing Supabase credentials. Check your .env file.")
-        return False
-
-    supabase: Client = create_client(
-        os.getenv("SUPABASE_URL"),
-        os.getenv("SUPABASE_KEY")
-    )
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.daily_report_schema import DB_COLUMNS, cast_to_schema
+from common.file_cache import CACHE_DIR
+from common.identifiers import clean_identifiers
+from common.status_rules import apply_status_rules, date_statuses, delivery_status
+from common.supabase_rest import (create_rest_client, delete_records, fetch_frame, fetch_matching, like_any_filter,
+                                  update_records, upload_records)
 
-    print("Starting daily data transfer process.")
+# Columns read from daily_report (Total Wattage and MW are not carried into current_report)
+SOURCE_COLUMNS = ['id', 'created_at'] + [col for col in DB_COLUMNS if col not in ('Total Wattage', 'MW')]
 
-    # Helper functions for data transformation
-    def remove_special_chars(val):
-        if pd.isnull(val):
-            return val
-        return re.sub(r'[^A-Za-z0-9 ]+', '', str(val)).strip()
+# Where the incremental mode remembers how far it got
+WATERMARK_PATH = CACHE_DIR / 'daily_transfer_watermark.json'
 
-    def get_status(row):
-        if pd.isna(row.get('Outbound date')):
-            if pd.isna(row.get('Inbound date')):
-                return "On Sea"
-            else:
-                return "In-Stock"
-        else:
-            try:
-                outbound_date = pd.to_datetime(row.get('Outbound date')).date() if pd.notna(row.get('Outbound date')) else None
-                if outbound_date and outbound_date > datetime.now().date():
-                    return "In-Stock"
-                else:
-                    return "Outbounded"
-            except Exception:
-                return "Outbounded"
-
-    def get_outbound_class(row):
-        try:
-            if pd.isna(row.get('Outbound date')) or row.get('Outbound date') == pd.Timestamp(0):
-                return "not-outbounded"
-            elif pd.to_datetime(row.get('Outbound date')).date() > datetime.now().date():
-                return "outbound-planned"
-            else:
-                return "outbounded"
-        except Exception:
-            return "not-outbounded"
-
-    def get_release_status(row):
-        if not pd.isna(row.get('Release date')) or row.get('Current_Status') == "Outbounded":
-            return "Released"
-        else:
-            return "Not released"
-
-    def is_outbounded_before_2025(row):
-        if row.get('Outbound_status') == 'outbounded' and pd.notna(row.get('Outbound date')):
-            try:
-                outbound_year = pd.to_datetime(row.get('Outbound date')).year
-                return outbound_year < 2025
-            except Exception:
-                return False
-        return False
+# Columns of current_report needed to re-evaluate the date-dependent statuses
+STATUS_INPUT_COLUMNS = ['id', 'Outbound date', 'Inbound date', 'Release date',
+                        'Current_Status', 'Outbound_status', 'Release_Status']
 
-    def fix_agreed_delivery_date(row):
-        try:
-            agreed_val = row.get('Agreed Delivery date')
-            if pd.isna(agreed_val) or str(agreed_val).strip() == "":
-                return ""
-            agreed_date = pd.to_datetime(agreed_val, errors='coerce')
-            if pd.notna(agreed_date):
-                if agreed_date.year in [2001, 2021, 2024]:
-                    return ""
-        except Exception:
-            pass
-        return row.get('Agreed Delivery date')
-
-    # Fetch data in batches
-    all_data = []
-    batch_size = 1000
-    offset = 0
-
-    while True:
-        try:
-            response = supabase.table("daily_report").select("*").range(offset, offset + batch_size - 1).execute()
-            batch = response.data
-            if not batch:
-                break
-            all_data.extend(batch)
-            if len(batch) < batch_size:
-                break
-            offset += batch_size
-        except Exception as e:
-            print(f"Error fetching data from daily_report: {e}")
-            return False
-
-    if not all_data:
-        print("No data found in daily_report.")
-        return False
 
-    print(f"Fetched {len(all_data)} rows from daily_report.")
+# Columns of daily_report that make up Ref1
+KEY_COLUMNS = ['id', 'Release Number', 'Container No.']
 
-    # Convert to DataFrame and transform data
-    df = pd.DataFrame(all_data)
 
+def clean_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Steps 1-2 of the transform: drop rows without a container and clean the
+    identifier columns.
+    """
     # 1. Remove rows where "Container No." is null or blank
     df = df[df["Container No."].notnull() & (df["Container No."].astype(str).str.strip() != "")]
 
     # 2. Clean specified columns
     for col in ["Container No.", "Release Number", "Import invoice"]:
         if col in df.columns:
-            df[col] = df[col].apply(remove_special_chars)
+            df[col] = clean_identifiers(df[col], ascii_only=True)
+    return df
+
+
+def build_ref1(df: pd.DataFrame):
+    """Ref1 of cleaned rows: Release Number + Container No."""
+    if "Container No." in df.columns and "Release Number" in df.columns:
+        return df["Release Number"].astype(str) + df["Container No."].astype(str)
+    return None
+
+
+def delivery_status_by_ref1(keys: pd.DataFrame) -> pd.Series:
+    """
+    Delivery_Status of every Ref1, counted over all rows of daily_report, as
+    apply_status_rules counts it in the full transfer (before the rows
+    outbounded before 2025 are dropped).
+
+    Args:
+        keys: KEY_COLUMNS of every (not deleted) daily_report row
+
+    Returns:
+        Delivery_Status indexed by Ref1
+    """
+    keys = clean_keys(keys.copy())
+    ref1 = build_ref1(keys).reset_index(drop=True)
+    status = pd.Series(delivery_status(ref1), index=ref1)
+    return status[~status.index.duplicated()]
+
+
+def touched_keys(source: pd.DataFrame, previous: pd.DataFrame):
+    """
+    Ref1 and cleaned containers whose Delivery_Status a run can change.
+
+    In upsert mode the ETL never edits the key columns of a row in place (they
+    are part of its row_key): a new key is a new row and the old row is
+    soft-deleted. The Ref1 of the changed rows (soft-deleted ones included)
+    and the Ref1 they had in current_report are therefore every group whose
+    row count changed.
+
+    Args:
+        source: daily_report rows read by the run, with deleted_at
+        previous: current_report rows of the same ids (id, Ref1, Container No.)
+
+    Returns:
+        Tuple of (set of Ref1, set of cleaned container numbers)
+    """
+    keys = clean_keys(source[KEY_COLUMNS].copy())
+    ref1s = set(build_ref1(keys)) | set(previous['Ref1'].dropna())
+    containers = set(keys['Container No.'].dropna()) | set(previous['Container No.'].dropna())
+    return ref1s, containers
+
+
+def container_pattern(container: str) -> str:
+    """
+    like pattern matching every raw Container No. that cleans to container.
+
+    Cleaning only removes characters, so the cleaned number is a subsequence of
+    the raw one: '*' between the characters gives a superset of the rows,
+    which are then matched exactly after cleaning.
+    """
+    return '*' + '*'.join(container) + '*'
+
+
+def transform_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derive the current_report columns from daily_report rows.
+
+    Args:
+        df: Rows as read from daily_report
+
+    Returns:
+        Transformed rows (rows without a container or outbounded before 2025 removed)
+    """
+    # Parse the numeric columns once, per the daily_report schema; values that
+    # are not numbers are reported and kept as they are in daily_report
+    df = cast_to_schema(df, kinds=('numeric',), nullable_integers=True, keep_unparsed=True)
+
+    # 1-2. Drop rows without a container, clean the identifiers
+    df = clean_keys(df)
 
     # 3. Calculate Power
     if "Piece" in df.columns and "Wattage" in df.columns:
@@ -138,62 +130,261 @@ def run_daily_data_transfer():
     df["MegaWattage"] = df["Power"] / 1_000_000
 
     # 5. Create Ref1
-    if "Container No." in df.columns and "Release Number" in df.columns:
-        df["Ref1"] = df["Release Number"].astype(str) + df["Container No."].astype(str)
-    else:
-        df["Ref1"] = None
+    df["Ref1"] = build_ref1(df)
 
     # 6. Create Ref2
     if "Container No." in df.columns and "Release Number" in df.columns and "Wattage" in df.columns:
-        df["Ref2"] = df["Release Number"].astype(str) + df["Container No."].astype(str) + df["Wattage"].astype(str)
+        # Wattage is parsed now; keep the text form the keys always had ('None' when missing)
+        wattage_text = df["Wattage"].astype(object).where(df["Wattage"].notna(), None).map(str)
+        df["Ref2"] = df["Release Number"].astype(str) + df["Container No."].astype(str) + wattage_text
     else:
         df["Ref2"] = None
 
-    # 7. Add Status columns
-    df['Current_Status'] = df.apply(get_status, axis=1)
-    df['Outbound_status'] = df.apply(get_outbound_class, axis=1)
-    df['Release_Status'] = df.apply(get_release_status, axis=1)
-
-    # 8. Add Delivery Status
-    ref_counts = df['Ref1'].map(df['Ref1'].value_counts())
-    df['Delivery_Status'] = ref_counts.apply(lambda x: "Partial_delivery" if x > 1 else "Full_delivery")
-
-    # 9. Filter out old outbounded data
-    df = df[~df.apply(is_outbounded_before_2025, axis=1)]
+    # 7-10. Status columns, Delivery Status, old outbounded rows and the
+    # Agreed Delivery date fix, evaluated column-wise by the status rules
+    df = apply_status_rules(df)
 
-    # 10. Fix Agreed Delivery date
-    if 'Agreed Delivery date' in df.columns:
-        df['Agreed Delivery date'] = df.apply(fix_agreed_delivery_date, axis=1)
-
-    # 11. Remove unnecessary columns
-    for col in ['Total Wattage', 'MW']:
+    # 11. Remove unnecessary columns (and the ETL's sync bookkeeping)
+    for col in ['Total Wattage', 'MW', 'row_key', 'row_hash', 'deleted_at', 'updated_at']:
         if col in df.columns:
             df = df.drop(col, axis=1)
 
-    # Prepare data for insertion
+    return df
+
+
+def to_records(df: pd.DataFrame) -> list:
+    """Rows as dicts with None for missing values."""
     df = df.where(pd.notnull(df), None)
-    records = df.to_dict(orient="records")
-    batch_size = 500
+    return df.to_dict(orient="records")
+
+
+def load_watermark() -> dict:
+    """
+    Read the watermark of the last incremental run (empty dict if there is none).
+    """
+    try:
+        with open(WATERMARK_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
+
+def save_watermark(watermark: dict) -> None:
+    """
+    Write the watermark atomically.
+    """
+    WATERMARK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = WATERMARK_PATH.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(watermark, f, indent=2)
+    os.replace(tmp_path, WATERMARK_PATH)
+
+
+def advance_watermark(watermark: dict, rows: pd.DataFrame) -> dict:
+    """
+    Move the watermark past the given daily_report rows (largest id and updated_at seen).
+    """
+    watermark = dict(watermark)
+    if not rows.empty:
+        watermark['id'] = max(int(rows['id'].max()), watermark.get('id', 0))
+        if 'updated_at' in rows.columns and rows['updated_at'].notna().any():
+            latest = pd.to_datetime(rows['updated_at'], utc=True, format='ISO8601').max()
+            if not watermark.get('updated_at') or latest > pd.Timestamp(watermark['updated_at']):
+                watermark['updated_at'] = latest.isoformat()
+    return watermark
+
+
+def rebuild_due(watermark: dict, rebuild_days: int) -> bool:
+    """
+    A full rebuild is due without a watermark or when the last one is too old.
+    """
+    if not watermark.get('last_full_rebuild'):
+        return True
+    last_full = datetime.fromisoformat(watermark['last_full_rebuild'])
+    return datetime.now() - last_full >= timedelta(days=rebuild_days)
+
+
+def refresh_date_statuses(client) -> int:
+    """
+    Re-evaluate the statuses of rows planned for a future outbound date; these
+    are the only rows whose statuses change with the calendar alone.
+
+    Returns:
+        Number of rows updated
+    """
+    planned = fetch_frame("current_report", STATUS_INPUT_COLUMNS,
+                          {"Outbound_status": "eq.outbound-planned"}, client=client)
+    if planned.empty:
+        return 0
+
+    fresh = date_statuses(planned)
+    status_columns = list(fresh.columns)
+    changed = (fresh[status_columns].astype(str) != planned[status_columns].astype(str)).any(axis=1)
+    updated = 0
+    for values, group in fresh[changed].assign(id=planned['id']).groupby(status_columns):
+        update_records("current_report", dict(zip(status_columns, values)), "id",
+                       group['id'].tolist(), client=client)
+        updated += len(group)
+    return updated
+
+
+def full_transfer(filters: dict, replace: bool, client) -> pd.DataFrame:
+    """
+    Rebuild current_report from every row of daily_report.
+
+    Args:
+        filters: Filters on daily_report
+        replace: Upsert on id and delete current_report rows that no longer
+            exist (incremental mode); otherwise insert, as the script always did
+        client: REST client
+
+    Returns:
+        The daily_report rows that were read
+    """
+    columns = SOURCE_COLUMNS + (['updated_at'] if replace else [])
+    source = fetch_frame("daily_report", columns, filters, client=client)
+    if source.empty:
+        print("No data found in daily_report.")
+        return source
+
+    print(f"Fetched {len(source)} rows from daily_report.")
+    df = transform_rows(source.copy())
+    records = to_records(df)
     print(f"Transformed data. Ready to insert {len(records)} records into current_report.")
 
-    # Insert data in batches
-    for i in range(0, len(records), batch_size):
-        batch = records[i:i+batch_size]
-        try:
-            batch = [{k: (None if pd.isna(v) else v) for k, v in record.items()} for record in batch]
-            response = supabase.table("current_report").insert(batch).execute()
-            if not response.data:
-                print(f"Error inserting batch {i//batch_size + 1}: {response.__dict__}")
+    if replace:
+        stats = upload_records("current_report", records, client=client, on_conflict="id")
+        existing = fetch_frame("current_report", ["id"], client=client)
+        stale = sorted(set(existing['id']) - set(df['id']))
+        if stale:
+            delete_records("current_report", "id", stale, client=client)
+        print(f"Upserted into current_report: {stats}; removed {len(stale)} stale rows")
+    else:
+        stats = upload_records("current_report", records, client=client)
+        print(f"Inserted into current_report: {stats}")
+    return source
+
+
+def incremental_transfer(watermark: dict, client) -> pd.DataFrame:
+    """
+    Carry the daily_report rows added or changed since the watermark into current_report.
+
+    Changed rows are upserted on id, rows the ETL soft-deleted (or that now
+    fall out of the report) are removed, and Delivery_Status is recounted for
+    the Ref1 the changed rows touch, over the same rows the full transfer
+    counts. Only those rows are read, so the run follows the day's changes,
+    not the size of the tables.
+
+    Returns:
+        The daily_report rows that were read
+    """
+    since = [f"id.gt.{watermark.get('id', 0)}"]
+    if watermark.get('updated_at'):
+        since.append(f'updated_at.gte."{watermark["updated_at"]}"')
+    source = fetch_frame("daily_report", SOURCE_COLUMNS + ['updated_at', 'deleted_at'],
+                         {"or": f"({','.join(since)})"}, client=client)
+    print(f"Fetched {len(source)} new or changed rows from daily_report.")
+    if source.empty:
+        return source
+
+    previous = fetch_matching("current_report", ["Ref1", "Container No."], "id", source['id'], client=client)
+
+    alive = source[source['deleted_at'].isna()].drop(columns=['deleted_at'])
+    df = transform_rows(alive.copy()) if not alive.empty else alive
+
+    # Rows soft-deleted by the ETL or no longer reported leave current_report
+    gone = sorted((set(source['id']) - set(df['id'])) & set(previous['id']))
+    if gone:
+        delete_records("current_report", "id", gone, client=client)
+
+    # Delivery_Status counts Ref1 over daily_report, including the rows
+    # outbounded before 2025 that current_report leaves out; rows sharing a
+    # Ref1 share its container, so only those containers are read
+    ref1s, containers = touched_keys(source, previous)
+    keys = fetch_matching("daily_report", KEY_COLUMNS, "Container No.", map(container_pattern, containers),
+                          {"deleted_at": "is.null"}, client=client, make_filter=like_any_filter, chunk_size=50)
+    status = delivery_status_by_ref1(keys)
+    if not df.empty:
+        df['Delivery_Status'] = df['Ref1'].map(status).fillna("Full_delivery").to_numpy()
+
+    kept = fetch_matching("current_report", ["Ref1", "Delivery_Status"], "Ref1", ref1s, client=client)
+    kept = kept[~kept['id'].isin(source['id'])]
+    kept_status = kept['Ref1'].map(status).fillna("Full_delivery")
+    recount = kept.assign(Delivery_Status=kept_status)[kept_status != kept['Delivery_Status']]
+    for value, group in recount.groupby('Delivery_Status'):
+        update_records("current_report", {"Delivery_Status": value}, "id", group['id'].tolist(), client=client)
+
+    if not df.empty:
+        stats = upload_records("current_report", to_records(df), client=client, on_conflict="id")
+        print(f"Upserted into current_report: {stats}")
+    print(f"Removed {len(gone)} rows, recounted Delivery_Status on {len(recount)} rows")
+    return source
+
+
+def run_daily_data_transfer():
+    """
+    Main function to handle the daily data transfer process from daily_report to current_report.
+    Includes data fetching, transformation, and insertion into Supabase.
+
+    TRANSFER_MODE=full (default) rebuilds current_report from all of
+    daily_report and inserts every row. TRANSFER_MODE=incremental only reads
+    the rows added (id) or changed (updated_at, written by the ETL's upsert
+    mode) since the last run and upserts them on id; a full rebuild still runs
+    every TRANSFER_FULL_REBUILD_DAYS days and whenever there is no watermark.
+    """
+    # Load environment variables from default .env location if present
+    env_path = Path(__file__).parents[1] / ".env"
+    if env_path.exists():
+        load_dotenv(env_path)
+    else:
+        load_dotenv()
+
+    # Check Supabase credentials
+    if not os.getenv("SUPABASE_URL") or not os.getenv("SUPABASE_KEY"):
+        print("Missing Supabase credentials. Check your .env file.")
+        return False
+
+    mode = os.getenv("TRANSFER_MODE", "full")
+    rebuild_days = int(os.getenv("TRANSFER_FULL_REBUILD_DAYS", "7"))
+    if mode == "incremental" and os.getenv("ETL_UPLOAD_MODE") != "upsert":
+        # In append mode every ETL run writes new ids for all rows; nothing to be incremental about
+        print("Incremental transfer needs ETL_UPLOAD_MODE=upsert; running a full transfer.")
+        mode = "full"
+
+    print(f"Starting daily data transfer process ({mode}).")
+
+    filters = {}
+    if os.getenv("ETL_UPLOAD_MODE") == "upsert":
+        # Skip rows the ETL soft-deleted
+        filters["deleted_at"] = "is.null"
+
+    try:
+        with create_rest_client() as client:
+            if mode != "incremental":
+                source = full_transfer(filters, replace=False, client=client)
+                if source.empty:
+                    return False
             else:
-                print(f"Batch {i//batch_size + 1} inserted successfully.")
-        except Exception as e:
-            print(f"Exception inserting batch {i//batch_size + 1}: {e}")
-            return False
+                watermark = load_watermark()
+                started = datetime.now().isoformat()
+                if rebuild_due(watermark, rebuild_days):
+                    print("Running the periodic full rebuild.")
+                    source = full_transfer(filters, replace=True, client=client)
+                    watermark = advance_watermark({'last_full_rebuild': started}, source)
+                else:
+                    refreshed = refresh_date_statuses(client)
+                    print(f"Refreshed date-dependent statuses on {refreshed} rows.")
+                    source = incremental_transfer(watermark, client)
+                    watermark = advance_watermark(watermark, source)
+                watermark['last_run'] = started
+                save_watermark(watermark)
+    except Exception as e:
+        print(f"Exception during the transfer to current_report: {e}")
+        return False
 
     print("Daily data transfer completed.")
     return True
 
 if __name__ == "__main__":
     success = run_daily_data_transfer()
-    sys.exit(0 if success else 1) 
\ No newline at end of file
+    sys.exit(0 if success else 1)
@@ -7,6 +7,12 @@ import datetime
 import pandas as pd
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.cdr import CDR_FILE_PATTERN, CSV_TEXT_COLUMNS, read_cdr
+from common.csv_dialect import read_csv_once, sniff_dialect
+from common.handoff import OUTBOUND_REPORT_HANDOFF, publish_frame
+from common.logistics_summary import DAY_COLUMN, build_summary, in_month, print_totals, totals
+
 def generate_logistics_report():
     """
     Main function to generate logistics report by processing CDR data.
@@ -85,23 +91,16 @@ def generate_logistics_report():
             DataFrame containing the CDR report data
         """
         try:
-            if file_path.lower().endswith('.csv'):
-                encodings = ['utf-8', 'latin1', 'iso-8859-1']
-                delimiters = [',', ';', '\t']
-                
-                for encoding in encodings:
-                    for delimiter in delimiters:
-                        try:
-                            print(f"Trying to read CSV with encoding: {encoding}, delimiter: '{delimiter}'")
-                            df = pd.read_csv(file_path, encoding=encoding, sep=delimiter)
-                            print(f"Successfully read data from CDR report: {len(df)} records")
-                            return df
-                        except Exception as e:
-                            print(f"Failed with encoding: {encoding}, delimiter: '{delimiter}', error: {e}")
-                            continue
-                
-                print("Trying pandas auto-detection for CSV...")
-                df = pd.read_csv(file_path)
+            if CDR_FILE_PATTERN.search(os.path.basename(file_path)):
+                # Written by create-consolidated-report: typed read, Parquet copy preferred
+                df = read_cdr(file_path)
+                print(f"Successfully read data from CDR report: {len(df)} records")
+                return df
+            elif file_path.lower().endswith('.csv'):
+                # Encoding and delimiter are detected from the first 64 KB, then the file is parsed once
+                dialect = sniff_dialect(file_path)
+                print(f"Reading CSV with encoding: {dialect['encoding']}, delimiter: '{dialect['delimiter']}'")
+                df = read_csv_once(file_path, text_columns=CSV_TEXT_COLUMNS)
                 print(f"Successfully read data from CDR report: {len(df)} records")
                 return df
             else:
@@ -151,42 +150,43 @@ def generate_logistics_report():
         # Format date columns first
         raw_df = format_date_columns(raw_df)
         
+        outbound_date_col = 'Outbound Date' if 'Outbound Date' in raw_df.columns else 'Outbound date'
+        has_outbound_dates = outbound_date_col in raw_df.columns
+        current_month = datetime.datetime.now().month
+        current_year = datetime.datetime.now().year
+        if 'MegaWattage' in raw_df.columns:
+            # Parsed once for the summaries; the MegaWattage column is written as read
+            raw_df['MegaWattage_numeric'] = pd.to_numeric(raw_df['MegaWattage'], errors='coerce')
+
+        # Row masks of the filters below, computed once over the full frame
+        if has_outbound_dates:
+            outbound_years = raw_df[outbound_date_col].dt.year
+            old_years = outbound_years.isin([2022, 2023, 2024])
+        else:
+            old_years = pd.Series(False, index=raw_df.index)
+        in_outbound_report = ~old_years
+        if has_outbound_dates and 'Outbound_status' in raw_df.columns:
+            # Remove rows where Outbound_status is "Outbounded" and Outbound Date is in year 2024,2023,2022
+            in_outbound_report &= ~((raw_df['Outbound_status'] == "Outbounded") & old_years)
+        if 'Outbound_status' in raw_df.columns:
+            in_outbound_report &= raw_df['Outbound_status'].isin(["outbounded", "outbound-planned"])
+        if 'Release Number' in raw_df.columns:
+            in_outbound_report &= raw_df['Release Number'].astype(str).str.startswith(('2', '5'))
+        if has_outbound_dates:
+            in_outbound_report &= outbound_years == current_year
+
+        # One aggregation over status x outbound status x outbound day; every summary below is a roll-up of it
+        summary = build_summary(raw_df, outbound_date_col, flags={'in_outbound_report': in_outbound_report})
+        summary_years = summary[DAY_COLUMN].dt.year
+
         # Apply transformations for status distribution reporting
         print("\nApplying data transformations...")
         if 'Current_Status' in raw_df.columns:
-            status_counts = raw_df['Current_Status'].value_counts()
-            print("\nStatus distribution:")
-            for status, count in status_counts.items():
-                megawattage = 0
-                if 'MegaWattage' in raw_df.columns:
-                    raw_df['MegaWattage_numeric'] = pd.to_numeric(raw_df['MegaWattage'], errors='coerce')
-                    megawattage = raw_df[raw_df['Current_Status'] == status]['MegaWattage_numeric'].sum(skipna=True)
-                print(f"  {status}: {count} records, Total MegaWattage: {float(megawattage):.2f} MW")
-
-        # Remove rows where Outbound_status is "Outbounded" and Outbound Date is in year 2024,2023,2022
-        outbound_date_col = 'Outbound Date' if 'Outbound Date' in raw_df.columns else 'Outbound date'
-        if outbound_date_col in raw_df.columns and 'Outbound_status' in raw_df.columns:
-            raw_df = raw_df[~((raw_df['Outbound_status'] == "Outbounded") & 
-                             (raw_df[outbound_date_col].dt.year.isin([2024, 2023, 2022])))]
+            print_totals(totals(summary, 'Current_Status'), "\nStatus distribution:")
 
-        # Create a copy of the raw DataFrame for transformations
-        transformed_df = raw_df.copy()
-        
-        # Apply filters
-        if 'Outbound_status' in transformed_df.columns:
-            transformed_df = transformed_df[transformed_df['Outbound_status'].isin(["outbounded", "outbound-planned"])]   
-        
-        if 'Release Number' in transformed_df.columns:
-            transformed_df = transformed_df[transformed_df['Release Number'].astype(str).str.startswith(('2', '5'))]
-            
-        if outbound_date_col in transformed_df.columns:
-            current_month = datetime.datetime.now().month
-            current_year = datetime.datetime.now().year
-            
-            transformed_df = transformed_df[
-                # (transformed_df[outbound_date_col].dt.month == current_month) & 
-                (transformed_df[outbound_date_col].dt.year == current_year)
-            ]
+        # Create the outbound report from the rows passing the filters
+        transformed_df = raw_df[in_outbound_report].copy()
+        if has_outbound_dates:
             print(f"Filtered for outbound dates in current month only: {current_month}/{current_year}")
         
         # Remove specified columns
@@ -202,7 +202,7 @@ def generate_logistics_report():
             'Sales Name', 'date CMR sent to JASolar', 'PTW / intermodel type',
             'Port fees (THC, ISPS, etc. )', 'DM cost', 'DT cost',
             'Port storage cost', 'Drayage costs (Port to WH)', 'Inbound costs',
-            'Storage costs (fm IB to Today/OB)', 'Outbound costs', 'Transport costs','MegaWattage_numeric',
+            'Storage costs (fm IB to Today/OB)', 'Outbound costs', 'Transport costs',
             'Ref1', 'Ref2','created_at','id','Stock Status', 'Stock age', 'Internal Outbound ref',
             'Destination Address', 'Destination Postal Code','Status',
         ]
@@ -214,52 +214,25 @@ def generate_logistics_report():
         print("\n")
 
         # Remove rows with specific years
-        if outbound_date_col in raw_df.columns:
-            raw_df = raw_df[~raw_df[outbound_date_col].dt.year.isin([2022, 2023, 2024])]
+        if has_outbound_dates:
+            raw_df = raw_df[~old_years]
             print(f"Removed rows with {outbound_date_col} in years 2022, 2023, 2024 from raw_df. Remaining rows: {len(raw_df)}")
-
-        if outbound_date_col in transformed_df.columns:
-            transformed_df = transformed_df[~transformed_df[outbound_date_col].dt.year.isin([2022, 2023, 2024])]
             print(f"Removed rows with {outbound_date_col} in years 2022, 2023, 2024 from transformed_df. Remaining rows: {len(transformed_df)}")
         
         # Print status distributions
         print("\n")
         if 'Current_Status' in raw_df.columns:
-            status_counts = raw_df['Current_Status'].value_counts()
-            print("\nCurrent status after the filters:")
-            for status, count in status_counts.items():
-                megawattage = 0
-                if 'MegaWattage' in raw_df.columns:
-                    raw_df['MegaWattage_numeric'] = pd.to_numeric(raw_df['MegaWattage'], errors='coerce')
-                    megawattage = raw_df[raw_df['Current_Status'] == status]['MegaWattage_numeric'].sum(skipna=True)
-                print(f"  {status}: {count} records, Total MegaWattage: {float(megawattage):.2f} MW")
+            recent = ~summary_years.isin([2022, 2023, 2024])
+            print_totals(totals(summary, 'Current_Status', recent), "\nCurrent status after the filters:")
         
         if 'Outbound_status' in transformed_df.columns:
-            status_counts = transformed_df['Outbound_status'].value_counts()
-            print("\nCurrent status after the filters:")
-            for status, count in status_counts.items():
-                megawattage = 0
-                if 'MegaWattage' in transformed_df.columns:
-                    transformed_df['MegaWattage_numeric'] = pd.to_numeric(transformed_df['MegaWattage'], errors='coerce')
-                    megawattage = transformed_df[transformed_df['Outbound_status'] == status]['MegaWattage_numeric'].sum(skipna=True)
-                print(f"  {status}: {count} records, Total MegaWattage: {float(megawattage):.2f} MW")
+            in_report = summary['in_outbound_report']
+            print_totals(totals(summary, 'Outbound_status', in_report), "\nCurrent status after the filters:")
 
             # Add current month summary
-            current_month = datetime.datetime.now().month
-            current_year = datetime.datetime.now().year
-            current_month_df = transformed_df[
-                (transformed_df[outbound_date_col].dt.month == current_month) & 
-                (transformed_df[outbound_date_col].dt.year == current_year)
-            ]
-            
-            current_month_status = current_month_df['Outbound_status'].value_counts()
-            print(f"\nCurrent month ({datetime.datetime.now().strftime('%B %Y')}) status summary:")
-            for status, count in current_month_status.items():
-                megawattage = 0
-                if 'MegaWattage' in current_month_df.columns:
-                    current_month_df['MegaWattage_numeric'] = pd.to_numeric(current_month_df['MegaWattage'], errors='coerce')
-                    megawattage = current_month_df[current_month_df['Outbound_status'] == status]['MegaWattage_numeric'].sum(skipna=True)
-                print(f"  {status}: {count} records, Total MegaWattage: {float(megawattage):.2f} MW")
+            this_month = in_report & in_month(summary, current_year, current_month)
+            print_totals(totals(summary, 'Outbound_status', this_month),
+                         f"\nCurrent month ({datetime.datetime.now().strftime('%B %Y')}) status summary:")
 
         # Save to Excel
         current_date = datetime.datetime.now().strftime("%Y-%m-%d")
@@ -287,6 +260,9 @@ def generate_logistics_report():
                         worksheet.set_column(col_num, col_num, 18, date_format)
         
         print(f"\nExcel workbook successfully saved at: {output_file}")
+
+        # Typed copy of the outbound sheet for bmo-report (the workbook is for people)
+        publish_frame(transformed_df, OUTBOUND_REPORT_HANDOFF, source=output_file)
         print("Logistics report data extraction completed successfully.")
         
     except Exception as e:
@@ -15,8 +15,9 @@ def transfer_latest_file():
             print(f"Destination directory does not exist: {dest_dir}")
             return
 
-        # Get list of files in source directory
-        files = [os.path.join(source_dir, f) for f in os.listdir(source_dir) if os.path.isfile(os.path.join(source_dir, f))]
+        # Get list of CSV files in source directory (the typed .parquet copies are not for Power BI)
+        files = [os.path.join(source_dir, f) for f in os.listdir(source_dir)
+                 if os.path.isfile(os.path.join(source_dir, f)) and f.lower().endswith('.csv')]
         
         if not files:
             print("No files found in source directory")
@@ -1,7 +1,12 @@
 import pandas as pd
 import os
+import sys
 import glob
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.cdr import read_cdr
 
 def consolidate_stock_reports():
     source_dir = r"C:\Users\DeepakSureshNidagund\OneDrive - JA Solar GmbH\Logistics Reporting\000_Master_Query_Reports\Automation_DB\CDR_Reports"
@@ -17,9 +22,9 @@ def consolidate_stock_reports():
     
     for file in csv_files:
         try:
-            df = pd.read_csv(file, low_memory=False)
-            # Only keep columns that exist in template
-            df = df[df.columns.intersection(template_columns)]
+            # Only read the template columns (typed Parquet copy when there is one); the
+            # In-Stock rows are picked below, where padded statuses still match
+            df = read_cdr(file, template_columns)
             all_data.append(df)
         except:
             continue
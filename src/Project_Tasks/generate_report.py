@@ -1,8 +1,13 @@
 import os
+import sys
 import pandas as pd
+from pathlib import Path
 from openpyxl import load_workbook
 from openpyxl.styles import Font, PatternFill
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.excel import read_excel
+
 def generate_project_reports():
     # File paths
     file1_path = r"C:\Users\DeepakSureshNidagund\JA Solar GmbH\Projects - Documents and Tracking\Project Report and Report Genetation\Project_Tracker_List.xlsx"
@@ -13,7 +18,7 @@ def generate_project_reports():
     os.makedirs(output_dir, exist_ok=True)
 
     # Read file1.xlsx
-    file1_df = pd.read_excel(file1_path, header=0)
+    file1_df = read_excel(file1_path, header=0)
 
     # Deduplicate based on Internal_Invoice (or entire row if needed)
     file1_df = file1_df.drop_duplicates(subset=["Internal_Invoice"])
@@ -29,7 +34,7 @@ def generate_project_reports():
     file2_path = os.path.join(file2_dir, file2_files[0])
 
     # Read file2.xlsx
-    file2_df = pd.read_excel(file2_path, header=0)
+    file2_df = read_excel(file2_path, header=0)
 
     # For each row in pending_df, match and save
     for _, row in pending_df.iterrows():
@@ -1,7 +1,12 @@
 import pandas as pd
 from datetime import datetime
 import os
+import sys
 from calendar import month_abbr
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.excel import read_excel
 
 def get_month_order():
     # Get current month number (1-12)
@@ -44,7 +49,7 @@ def process_rno_report():
     
     try:
         # Read the Excel file
-        df = pd.read_excel(input_file, sheet_name="RNO Report")
+        df = read_excel(input_file, sheet_name="RNO Report")
         
         # Drop specified columns
         df = df.drop(columns=columns_to_drop, errors='ignore')
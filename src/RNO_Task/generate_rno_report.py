@@ -4,8 +4,14 @@ import os
 import glob
 from datetime import datetime
 import openpyxl
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.cdr import read_cdr
+from common.excel import read_excel
+from common.europe_stock import load_clean_europe_stock, split_released
+
 # def load_europe_stock_data(file_path):
 #     """
 #     Load and process the Europe Stock data from Excel file.
@@ -21,97 +27,22 @@ from pathlib import Path
 #         return None
 def load_europe_stock_data(file_path):
     """
-    Load and process the Europe Stock data from Excel file.
+    Load the cleaned Europe Stock data (identifiers cleaned, columns renamed, Ref1 added).
+    The cleaned frame is cached until the workbook changes, so the other RNO script
+    does not parse the workbook again.
     """
     try:
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"Excel file not found at: {file_path}")
-        
-        # Add error handling for dates
-        excel_options = {
-            'sheet_name': "Summary-Europe",
-            'na_values': ['#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', 
-                         'N/A', 'n/a', 'NA', '<NA>', '#VALUE!'],
-            'keep_default_na': True,
-            'dtype': {'Sold Date': 'object'}  # Read date columns as object first
-        }
-            
-        df = pd.read_excel(file_path, **excel_options)
-        
-        # Convert known date columns to datetime with error handling
-        date_columns = ['Sold Date']  # Add other date columns if needed
-        for col in date_columns:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-        
-        return df
+        return load_clean_europe_stock(file_path)
     except Exception as e:
         print(f"An error occurred while loading Europe stock data: {e}")
         return None
 
-def clean_and_prepare_data(df):
-    """
-    Clean and prepare the data by removing special characters and renaming columns.
-    """
-    try:
-        # Remove special characters from specified columns
-        def remove_special_chars(val):
-            if pd.isnull(val):
-                return val
-            return ''.join(c for c in str(val) if c.isalnum() or c.isspace()).strip()
-
-        columns_to_clean = ['Container', 'DN', 'Inv.']
-        for col in columns_to_clean:
-            if col in df.columns:
-                df[col] = df[col].apply(remove_special_chars)
-
-        # Rename columns
-        df = df.rename(columns={
-            'Inv.': 'Invoice Number',
-            'Container': 'Container Number',
-            'DN': 'Release Number'
-        })
-
-        # Remove specified columns
-        columns_to_remove = [
-            'Factory', 'Related transaction company', 'Related transaction Term', 'Currency', 
-            'Inv No.', 'C2 --> C1 Date', 'Handover Date', 'Contractual Delivery Week','Delay (ETA Shift)','Planned Transit Time as  (ETD- ETA)','Planned Transit Time as  (ETD/ ETA)',
-            'Country Code', '状态', 'Internal related price', 'Battery type', 'Border Color',
-            'Junction box', 'length', 'Voltage', 'Storage duration', 'Sold（Week）', 
-            'Storage duration（days）', 'original WH', 'Warehouse after transfer', 'ETD month',
-            'Sold month', 'outbound quantity', 'Rest quantity', 'Released on the sea',
-            'Booking No.', 'EWX Week', 'Type.2', 'Auxiliary column', 'Inv&type', '是否签收',
-            '型号', 'LRF', 'Unnamed: 66', 'Unnamed: 67', 'Unnamed: 68', 'Unnamed: 69','Unnamed: 70', 'Unnamed: 71','Unnamed: 72'
-        ]
-        df = df.drop(columns=columns_to_remove, errors='ignore')
-
-        # Create Ref1 column
-        if 'Release Number' in df.columns and 'Container Number' in df.columns:
-            df['Ref1'] = df['Release Number'].astype(str) + df['Container Number'].astype(str)
-        else:
-            df['Ref1'] = None
-
-        return df
-    except Exception as e:
-        print(f"An error occurred while cleaning data: {e}")
-        return None
-
 def split_released_data(df):
     """
     Split data into Released and Not Released datasets.
     """
     try:
-        Released_data = df[
-            (df['Release Number'].notna() & (df['Release Number'].astype(str).str.strip() != "")) & 
-            (df['Sold Date'].notna() & (df['Sold Date'].astype(str).str.strip() != ""))
-        ]
-
-        Not_Released_data = df[
-            (df['Release Number'].isna() | (df['Release Number'].astype(str).str.strip() == "")) & 
-            (df['Sold Date'].isna() | (df['Sold Date'].astype(str).str.strip() == ""))
-        ]
-
-        return Released_data, Not_Released_data
+        return split_released(df)
     except Exception as e:
         print(f"An error occurred while splitting data: {e}")
         return None, None
@@ -150,6 +81,87 @@ def split_released_data(df):
 #         print(f"An error occurred while loading CDR data: {e}")
 #         return None
 
+# CDR columns used by the RNO report
+CDR_COLUMNS = ["Ref1", "Container No.", "Piece", "Current_Status", "Outbound date",
+               "Agreed Delivery date", "Delivery date", "Delivery_Status"]
+
+# CDR statuses whose pieces are summed per Ref1, and the RNO columns they fill
+STATUS_PIECE_COLUMNS = {
+    'On Sea': 'On_Sea_Pcs',
+    'In-Stock': 'In_Stock_Pcs',
+    'Outbounded': 'Outbounded_Pcs'
+}
+
+
+# Code pd.factorize gives missing keys
+MISSING_CODE = -1
+
+
+def shared_codes(lookup, values):
+    """
+    Integer codes of two key columns (Ref1, container numbers) from one
+    factorization: equal keys get equal codes, missing keys MISSING_CODE.
+    """
+    codes, _ = pd.factorize(pd.concat([lookup, values], ignore_index=True))
+    return codes[:len(lookup)], codes[len(lookup):]
+
+
+def pieces_by_status(cdr, cdr_codes, lookup_codes, columns):
+    """
+    Sum the CDR pieces by key and Current_Status in one pass over the CDR and
+    look the sums up for every RNO row.
+
+    The pieces are summed per (key code, status) cell with one bincount and the
+    RNO rows pick their cells by position. This replaces a filter + groupby +
+    left merge per status, with the same values and dtypes as those merges
+    (NaN where a key has no row of the status).
+
+    Args:
+        cdr: CDR data
+        cdr_codes: Key code of every CDR row (shared_codes of the Ref1 or of
+            the container numbers)
+        lookup_codes: Key code of every RNO row, from the same coding
+        columns: Status -> output column name; the status None sums all rows of
+            the key, whatever their status
+
+    Returns:
+        DataFrame with one row per RNO row (RangeIndex) and the requested columns
+    """
+    lookup_codes = np.asarray(lookup_codes)
+    key_count = max(cdr_codes.max(initial=MISSING_CODE), lookup_codes.max(initial=MISSING_CODE)) + 1
+
+    status = cdr['Current_Status'].astype('category')
+    width = len(status.cat.categories) + 1
+    has_key = cdr_codes != MISSING_CODE
+    cells = (cdr_codes * width + status.cat.codes.to_numpy() + 1)[has_key]
+    pieces = np.nan_to_num(cdr['Piece'].to_numpy(dtype='float64', na_value=np.nan)[has_key])
+    sums = np.bincount(cells, weights=pieces, minlength=key_count * width).reshape(key_count, width)
+    rows = np.bincount(cells, minlength=key_count * width).reshape(key_count, width)
+
+    found = lookup_codes != MISSING_CODE
+    piece_dtype = cdr['Piece'].dtype
+    result = pd.DataFrame(index=pd.RangeIndex(len(lookup_codes)))
+    for status_name, col_name in columns.items():
+        if status_name is None:
+            cell_sums, cell_rows = sums.sum(axis=1), rows.sum(axis=1)
+        else:
+            position = status.cat.categories.get_indexer([status_name])[0] + 1
+            cell_sums = sums[:, position] if position else np.zeros(key_count)
+            cell_rows = rows[:, position] if position else np.zeros(key_count, dtype=np.int64)
+        matched = np.zeros(len(lookup_codes), dtype=bool)
+        matched[found] = cell_rows[lookup_codes[found]] > 0
+        values = np.full(len(lookup_codes), np.nan)
+        values[matched] = cell_sums[lookup_codes[matched]]
+        column = pd.Series(values, index=result.index)
+        # Left merge dtypes: integer sums stay integers unless a row found no match
+        if isinstance(piece_dtype, pd.api.extensions.ExtensionDtype):
+            column = column.astype(piece_dtype)
+        elif piece_dtype.kind in 'iub' and matched.all():
+            column = column.astype('int64')
+        result[col_name] = column
+    return result
+
+
 def load_cdr_data(reports_dir):
     """
     Load the latest CDR report data.
@@ -178,9 +190,8 @@ def load_cdr_data(reports_dir):
         except (IndexError, ValueError):
             latest_file = max(report_files, key=os.path.getmtime)
 
-        # Add low_memory=False to prevent the DtypeWarning
-        cdr = pd.read_csv(latest_file, low_memory=False)
-        return cdr
+        # Typed read (Parquet copy when there is one) of the columns used below
+        return read_cdr(latest_file, CDR_COLUMNS)
     except Exception as e:
         print(f"An error occurred while loading CDR data: {e}")
         return None
@@ -192,15 +203,19 @@ def process_rno_data(Released_data, cdr):
     """
     try:
         # Select relevant columns from CDR
-        cdr_columns = ["Ref1", "Current_Status", "Outbound date", "Agreed Delivery date", 
+        cdr_columns = ["Current_Status", "Outbound date", "Agreed Delivery date",
                       "Delivery date", "Delivery_Status"]
-        cdr_selected = cdr[cdr_columns]
+
+        # Join and group on the Ref1 codes instead of the Ref1 strings
+        released_codes, cdr_codes = shared_codes(Released_data['Ref1'], cdr['Ref1'])
+        cdr_selected = cdr[cdr_columns].assign(Ref1_code=cdr_codes)
+        released = Released_data.assign(Ref1_code=released_codes)
 
         # Merge with Released data
-        rno = pd.merge(Released_data, cdr_selected, on="Ref1", how="left")
+        rno = pd.merge(released, cdr_selected, on="Ref1_code", how="left")
 
         # Remove duplicates in Ref1 column, keeping the last occurrence
-        rno = rno.drop_duplicates(subset=['Ref1'], keep='last')
+        rno = rno.drop_duplicates(subset=['Ref1_code'], keep='last')
 
         # Drop rows where Outbound date is today's date
         if "Outbound date" in rno.columns:
@@ -212,21 +227,11 @@ def process_rno_data(Released_data, cdr):
             rows_removed = initial_rows - len(rno)
             print(f"Removed {rows_removed} rows with today's Outbound date")
 
-        # Process CDR quantities
-        cdr['Piece'] = pd.to_numeric(cdr['Piece'], errors='coerce')
-
-        # Create status-based summaries
-        status_summaries = {
-            'On Sea': 'On_Sea_Pcs',
-            'In-Stock': 'In_Stock_Pcs',
-            'Outbounded': 'Outbounded_Pcs'
-        }
-
-        for status, col_name in status_summaries.items():
-            summary = cdr[cdr['Current_Status'] == status].groupby('Ref1')['Piece'].sum().reset_index()
-            summary = summary.rename(columns={'Piece': col_name})
-            rno = pd.merge(rno, summary, on="Ref1", how="left")
-            rno[col_name] = rno[col_name].fillna(0)
+        # Create status-based summaries (one pass over the CDR)
+        rno = rno.reset_index(drop=True)
+        summary = pieces_by_status(cdr, cdr_codes, rno.pop('Ref1_code'), STATUS_PIECE_COLUMNS)
+        for col_name in STATUS_PIECE_COLUMNS.values():
+            rno[col_name] = summary[col_name].fillna(0)
 
         return rno
     except Exception as e:
@@ -276,23 +281,13 @@ def process_container_level_cdr(rno, cdr):
             print("Warning: 'Container No.' column not found in CDR data")
             return None
 
-        # Get total pieces by container
-        cdr_total_summary = cdr.groupby(container_col)['Piece'].sum().reset_index()
-        cdr_total_summary = cdr_total_summary.rename(columns={
-            container_col: 'Container Number',
-            'Piece': 'cnt_Total_Pcs_cdr'
-        })
-
-        # Get outbounded pieces by container
-        cdr_outbound_summary = cdr[cdr['Current_Status'] == 'Outbounded'].groupby(container_col)['Piece'].sum().reset_index()
-        cdr_outbound_summary = cdr_outbound_summary.rename(columns={
-            container_col: 'Container Number',
-            'Piece': 'cnt_Outbound_Pcs_cdr'
-        })
-
-        # Merge both summaries with rno DataFrame
-        rno = pd.merge(rno, cdr_total_summary, on='Container Number', how='left')
-        rno = pd.merge(rno, cdr_outbound_summary, on='Container Number', how='left')
+        # Get total and outbounded pieces by container (one pass over the CDR)
+        rno = rno.reset_index(drop=True)
+        rno_codes, cdr_codes = shared_codes(rno['Container Number'], cdr[container_col])
+        summary = pieces_by_status(cdr, cdr_codes, rno_codes,
+                                   {None: 'cnt_Total_Pcs_cdr', 'Outbounded': 'cnt_Outbound_Pcs_cdr'})
+        rno['cnt_Total_Pcs_cdr'] = summary['cnt_Total_Pcs_cdr']
+        rno['cnt_Outbound_Pcs_cdr'] = summary['cnt_Outbound_Pcs_cdr']
 
         # Fill NaN values with 0 for both new columns
         rno['cnt_Total_Pcs_cdr'] = rno['cnt_Total_Pcs_cdr'].fillna(0)
@@ -316,7 +311,7 @@ def process_wms_data(rno, wms_file_path):
     """
     try:
         # Read WMS data
-        wms_Outbound = pd.read_excel(wms_file_path)
+        wms_Outbound = read_excel(wms_file_path)
         
         # Create Ref1 in WMS data if not exists
         if 'Ref1' not in wms_Outbound.columns:
@@ -326,12 +321,14 @@ def process_wms_data(rno, wms_file_path):
                 print("Required columns 'Release number' and 'Container number' not found in WMS data")
                 return None
         
-        # Create WMS summary
-        wms_summary = wms_Outbound.groupby('Ref1')['Quantity'].sum().reset_index()
-        wms_summary = wms_summary.rename(columns={'Quantity': 'Pcs_from_wms'})
+        # Create WMS summary (by Ref1 code)
+        rno_codes, wms_codes = shared_codes(rno['Ref1'], wms_Outbound['Ref1'])
+        has_ref1 = wms_codes != MISSING_CODE
+        wms_summary = wms_Outbound.loc[has_ref1, 'Quantity'].groupby(wms_codes[has_ref1]).sum()
 
         # Merge with RNO data
-        rno = pd.merge(rno, wms_summary, on='Ref1', how='left')
+        rno = rno.reset_index(drop=True)
+        rno['Pcs_from_wms'] = wms_summary.reindex(rno_codes).set_axis(rno.index)
         rno['Pcs_from_wms'] = pd.to_numeric(rno['Pcs_from_wms'], errors='coerce')
         rno['Pcs_from_wms'] = rno['Pcs_from_wms'].fillna(0)
 
@@ -387,9 +384,10 @@ def apply_filters(rno, remove_data_path):
 
         # Remove data based on Remove_data file
         if os.path.exists(remove_data_path):
-            remove_df = pd.read_excel(remove_data_path)
-            ref1_to_remove = remove_df['Ref1'].tolist()
-            rno = rno.loc[~rno['Ref1'].isin(ref1_to_remove)].copy()
+            remove_df = read_excel(remove_data_path)
+            rno_codes, remove_codes = shared_codes(rno['Ref1'], remove_df['Ref1'])
+            to_remove = np.isin(rno_codes, remove_codes)
+            rno = rno.loc[~to_remove].copy()
 
         # Reset index after all filtering
         rno = rno.reset_index(drop=True)
@@ -488,11 +486,6 @@ def main():
         if df is None:
             return
 
-        print("Cleaning and preparing data...")
-        df = clean_and_prepare_data(df)
-        if df is None:
-            return
-
         print("Splitting released data...")
         Released_data, Not_Released_data = split_released_data(df)
         if Released_data is None or Not_Released_data is None:
@@ -1,10 +1,16 @@
 import os
+import sys
 import pandas as pd
 from datetime import datetime
+from pathlib import Path
 from openpyxl.styles import PatternFill, Font
 from openpyxl.utils import get_column_letter
 import warnings
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.excel import read_excel
+from common.identifiers import id_text
+
 # Suppress the specific openpyxl warning
 warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl.styles.stylesheet')
 
@@ -32,18 +38,16 @@ def process_excel_file(file_path):
     """
     try:
         # Read Excel file starting from the third row (index 2) as header
-        df = pd.read_excel(
+        df = read_excel(
             file_path,
-            header=2,  # Use the third row as header
-            engine='openpyxl'
+            header=2  # Use the third row as header
         )
         
         # Add Ref1 column by concatenating Release number and Container number
-        # Remove .0 from numeric values before concatenation
-        release_str = df['Release number'].astype(str).str.replace('.0', '', regex=False)
-        container_str = df['Container number'].astype(str).str.replace('.0', '', regex=False)
+        # (numbers read as floats lose their trailing .0, missing parts are left out)
+        release_str = id_text(df['Release number']).fillna('')
+        container_str = id_text(df['Container number']).fillna('')
         df['Ref1'] = release_str + container_str
-        df['Ref1'] = df['Ref1'].astype(str).str.replace('nan', '', regex=False)
         
         return df
     except Exception as e:
@@ -1,9 +1,14 @@
 import os
+import sys
 import pandas as pd
 import glob
 from datetime import datetime
+from pathlib import Path
 import warnings
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.excel import read_excel
+
 # Suppress openpyxl warnings about default styles
 warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl.styles.stylesheet')
 
@@ -39,7 +44,7 @@ def combine_outbound_wms_files():
             # Determine file type and read accordingly
             if file.endswith(('.xlsx', '.xls')):
                 # Skip first 2 rows, use 3rd row (index 2) as header
-                df = pd.read_excel(file, skiprows=2, header=0, engine='openpyxl')
+                df = read_excel(file, skiprows=2, header=0)
             elif file.endswith('.csv'):
                 df = pd.read_csv(file, skiprows=2, header=0)
             else:
@@ -4,6 +4,12 @@ from datetime import datetime
 import pandas as pd
 import numpy as np
 
+def summarize_by_ref1(df, name):
+    """
+    Sum Quantity per Ref1, indexed by Ref1 (rows without Ref1 left out).
+    """
+    return df.groupby('Ref1')['Quantity'].sum().rename(name)
+
 def get_latest_excel_file(folder_path):
     """
     Get the latest Excel file from the specified folder
@@ -36,11 +42,8 @@ def get_wms_data():
             # Read WMS file
             wms_df = pd.read_excel(wms_file)
             
-            # Group by Ref1 and sum Quantity
-            wms_summary = wms_df.groupby('Ref1')['Quantity'].sum().reset_index()
-            wms_summary = wms_summary.rename(columns={'Quantity': 'Outbound_Pcs_wms'})
-            
-            return wms_summary
+            # Sum Quantity per Ref1
+            return summarize_by_ref1(wms_df, 'Outbound_Pcs_wms')
         except Exception as e:
             print(f"Error processing WMS file: {str(e)}")
             return None
@@ -59,11 +62,8 @@ def get_wms_stock_data():
             # Read WMS stock file
             wms_stock_df = pd.read_excel(wms_stock_file)
             
-            # Group by Ref1 and sum Quantity
-            wms_stock_summary = wms_stock_df.groupby('Ref1')['Quantity'].sum().reset_index()
-            wms_stock_summary = wms_stock_summary.rename(columns={'Quantity': 'Stock_Pcs_wms'})
-            
-            return wms_stock_summary
+            # Sum Quantity per Ref1
+            return summarize_by_ref1(wms_stock_df, 'Stock_Pcs_wms')
         except Exception as e:
             print(f"Error processing WMS Stock file: {str(e)}")
             return None
@@ -83,16 +83,16 @@ def process_excel_file(file_path):
         # Get WMS data summary
         wms_summary = get_wms_data()
         if wms_summary is not None:
-            # Merge WMS quantity with main dataframe
-            df = pd.merge(df, wms_summary, on='Ref1', how='left')
+            # Look up the WMS quantity of every row by its Ref1
+            df['Outbound_Pcs_wms'] = wms_summary.reindex(df['Ref1']).set_axis(df.index)
             # Fill NaN values with 0 for Pcs_wms column
             df['Outbound_Pcs_wms'] = df['Outbound_Pcs_wms'].fillna(0)
         
         # Get WMS Stock data summary
         wms_stock_summary = get_wms_stock_data()
         if wms_stock_summary is not None:
-            # Merge WMS stock quantity with main dataframe
-            df = pd.merge(df, wms_stock_summary, on='Ref1', how='left')
+            # Look up the WMS stock quantity of every row by its Ref1
+            df['Stock_Pcs_wms'] = wms_stock_summary.reindex(df['Ref1']).set_axis(df.index)
             df['Stock_Pcs_wms'] = df['Stock_Pcs_wms'].fillna(0)
         
         # Add Case_1 column comparing Piece with Pcs_wms
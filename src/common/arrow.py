@@ -0,0 +1,30 @@
+"""
+Optional pyarrow support shared by the Parquet and Arrow IPC readers and writers.
+
+Only checks whether pyarrow is installed; pyarrow itself is imported by the
+functions that use it, so importing this module costs nothing without it.
+"""
+from importlib.util import find_spec
+import pandas as pd
+
+PARQUET_SUPPORTED = find_spec('pyarrow') is not None
+
+
+def to_arrow_table(df: pd.DataFrame):
+    """
+    Convert a frame to an Arrow table. Object columns mixing types Arrow cannot
+    unify (e.g. numbers and text) are stored as text, missing values kept.
+    """
+    import pyarrow as pa
+
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    df = df.copy()
+    for col in df.columns[df.dtypes == object]:
+        try:
+            pa.array(df[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return pa.Table.from_pandas(df, preserve_index=False)
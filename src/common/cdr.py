@@ -0,0 +1,222 @@
+"""
+Typed CDR (consolidated daily report) files and the shared loader of the CDR consumers.
+
+create-consolidated-report writes every CDR twice: CDR_YYYY-MM-DD.csv for
+Power BI and CDR_YYYY-MM-DD.parquet, cast to CDR_SCHEMA (numbers, dates,
+categories and text stored with their types). read_cdr prefers the Parquet
+file, reads only the requested columns and row groups matching the filters,
+and falls back to the CSV (parsed once, with the detected dialect and the
+text columns declared, to the same types) when there is no Parquet file or
+pyarrow is not installed, so both give the same frame.
+"""
+import os
+import re
+import glob
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+import pandas as pd
+
+from common.daily_report_schema import CDR_SCHEMA, cast_to_schema
+from common.csv_dialect import read_csv_once, read_csv_table
+from common.dates import ISO_DATE_FORMAT
+from common.arrow import PARQUET_SUPPORTED, to_arrow_table
+
+# Dated CDR files written by create-consolidated-report
+CDR_FILE_PATTERN = re.compile(r'CDR_(\d{4}-\d{2}-\d{2})\.csv$')
+
+# Filters as (column, op, value); op is one of these
+FILTER_OPS = ('==', '!=', '<', '<=', '>', '>=', 'in', 'not in')
+
+Filter = Tuple[str, str, object]
+
+# Columns parsed as text from the CSV (dates stay YYYY-MM-DD text until parsed)
+CSV_TEXT_COLUMNS = [col for col, kind in CDR_SCHEMA.items() if kind != 'numeric'] + ['created_at']
+
+CDR_DATE_COLUMNS = [col for col, kind in CDR_SCHEMA.items() if kind == 'date']
+
+
+def _typed(df: pd.DataFrame, integers: bool) -> pd.DataFrame:
+    """Cast the schema columns (dates left to the caller)."""
+    return cast_to_schema(df, CDR_SCHEMA, kinds=('numeric', 'category', 'text'), nullable_integers=integers)
+
+
+def _parse_dates(series: pd.Series) -> pd.Series:
+    """
+    YYYY-MM-DD text -> datetime64 (NaT for missing values).
+
+    The CDR dates are already normalized by create-consolidated-report; running
+    them through convert_date_column again would read 2024-01-05 day-first as
+    1 May.
+    """
+    return pd.to_datetime(series, format=ISO_DATE_FORMAT, errors='coerce')
+
+
+def _format_dates(series: pd.Series) -> pd.Series:
+    """datetime64 -> YYYY-MM-DD text (None for missing values)."""
+    return series.dt.strftime(ISO_DATE_FORMAT).astype(object).where(series.notna(), None)
+
+
+def write_cdr_parquet(df: pd.DataFrame, file_path) -> Path:
+    """
+    Write the typed Parquet copy of a CDR (atomically).
+
+    Args:
+        df: Combined CDR frame as written to the CSV
+        file_path: Target .parquet path
+
+    Returns:
+        Path of the written file
+    """
+    import pyarrow.parquet as pq
+
+    file_path = Path(file_path)
+    typed = _typed(df.copy(), integers=True)
+    for col in CDR_DATE_COLUMNS:
+        if col in typed.columns:
+            typed[col] = _parse_dates(typed[col])
+
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = file_path.with_suffix('.parquet.tmp')
+    pq.write_table(to_arrow_table(typed), tmp_path)
+    os.replace(tmp_path, file_path)
+    return file_path
+
+
+def latest_cdr_file(reports_dir) -> Optional[Path]:
+    """
+    The CDR_YYYY-MM-DD.csv with the latest date in its name, or None.
+    """
+    dated = []
+    for path in glob.glob(os.path.join(reports_dir, 'CDR_*.csv')):
+        match = CDR_FILE_PATTERN.search(os.path.basename(path))
+        if match:
+            dated.append((match.group(1), path))
+    if not dated:
+        return None
+    return Path(max(dated)[1])
+
+
+def _filter_frame(df: pd.DataFrame, filters: Sequence[Filter]) -> pd.DataFrame:
+    """Apply (column, op, value) filters with pandas (rows with missing values never match)."""
+    keep = pd.Series(True, index=df.index)
+    for col, op, value in filters:
+        values = df[col]
+        if op == '==':
+            match = values == value
+        elif op == '!=':
+            match = values != value
+        elif op == '<':
+            match = values < value
+        elif op == '<=':
+            match = values <= value
+        elif op == '>':
+            match = values > value
+        elif op == '>=':
+            match = values >= value
+        elif op == 'in':
+            match = values.isin(list(value))
+        else:
+            match = ~values.isin(list(value))
+        keep &= match.fillna(False).astype(bool) & values.notna()
+    return df[keep].reset_index(drop=True)
+
+
+def _frame_from_arrow(table, parse_dates: bool) -> pd.DataFrame:
+    """
+    Arrow table -> DataFrame. Text and YYYY-MM-DD dates are converted by Arrow,
+    straight to object arrays with None; dates read as text are left as text.
+    """
+    import pyarrow as pa
+
+    converted = {}
+    for name in table.column_names:
+        kind = CDR_SCHEMA.get(name)
+        column = table.column(name)
+        if kind == 'date' and pa.types.is_timestamp(column.type):
+            if not parse_dates:
+                converted[name] = column.cast(pa.date32()).cast(pa.string()).to_numpy(zero_copy_only=False)
+        elif kind in ('text', 'date') and (pa.types.is_string(column.type) or pa.types.is_null(column.type)):
+            converted[name] = column.to_numpy(zero_copy_only=False)
+
+    # Without the pandas metadata, integer columns with gaps come back as float64
+    df = table.drop_columns(list(converted)).to_pandas(ignore_metadata=True)
+    for name, values in converted.items():
+        df[name] = pd.Series(values, index=df.index, dtype=object)
+    return df[table.column_names]
+
+
+def _read_parquet(path: Path, columns: Optional[List[str]], filters: Sequence[Filter],
+                  parse_dates: bool) -> pd.DataFrame:
+    import pyarrow.parquet as pq
+
+    available = pq.read_schema(path).names
+    if columns is not None:
+        columns = [col for col in columns if col in available]
+    table = pq.read_table(path, columns=columns, filters=list(filters) or None, memory_map=True)
+    return _frame_from_arrow(table, parse_dates)
+
+
+def _parse_csv(path: Path, columns: Optional[List[str]]) -> pd.DataFrame:
+    """One parse of the CSV, text columns declared; dates still as text."""
+    if PARQUET_SUPPORTED:
+        import pyarrow as pa
+
+        try:
+            table = read_csv_table(path, {col: pa.string() for col in CSV_TEXT_COLUMNS}, columns)
+            df = _frame_from_arrow(table, parse_dates=False)
+            return cast_to_schema(df, CDR_SCHEMA, kinds=('numeric', 'category'))
+        except (pa.ArrowInvalid, UnicodeDecodeError) as e:
+            print(f"pyarrow could not parse {path} ({e}); using the C engine")
+    df = read_csv_once(path, list(CSV_TEXT_COLUMNS), columns)
+    for col in CDR_DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(object).where(df[col].notna(), None)
+    return _typed(df, integers=False)
+
+
+def _read_csv(path: Path, columns: Optional[List[str]], filters: Sequence[Filter],
+              parse_dates: bool) -> pd.DataFrame:
+    wanted = None if columns is None else list(columns) + [col for col, _, _ in filters]
+    df = _parse_csv(path, wanted)
+    # Dates stay as the text of the CSV unless they are returned or compared as dates
+    compared = {col for col, _, _ in filters}
+    parsed = [col for col in CDR_DATE_COLUMNS if col in df.columns and (parse_dates or col in compared)]
+    for col in parsed:
+        df[col] = _parse_dates(df[col])
+    if filters:
+        df = _filter_frame(df, filters)
+        if not parse_dates:
+            for col in parsed:
+                df[col] = _format_dates(df[col])
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    return df
+
+
+def read_cdr(file_path, columns: Optional[Iterable[str]] = None, filters: Optional[Sequence[Filter]] = None,
+             parse_dates: bool = False) -> pd.DataFrame:
+    """
+    Read one CDR, from its Parquet copy when there is one.
+
+    Args:
+        file_path: Path of the CDR_YYYY-MM-DD.csv (the .parquet next to it is preferred)
+        columns: Columns to read (missing ones are skipped); all when None
+        filters: Row filters as (column, op, value), e.g. [('data_source', '==', 'current')];
+            the comparison values are typed like the columns (dates as Timestamps)
+        parse_dates: Return the date columns as datetime64 instead of YYYY-MM-DD text
+
+    Returns:
+        DataFrame with numeric columns as numbers, status columns as categories and
+        the other text columns as text (None for missing values)
+    """
+    file_path = Path(file_path)
+    columns = None if columns is None else list(columns)
+    filters = list(filters or [])
+    for _, op, _ in filters:
+        if op not in FILTER_OPS:
+            raise ValueError(f"Unknown filter operator: {op}")
+
+    parquet_path = file_path.with_suffix('.parquet')
+    if PARQUET_SUPPORTED and parquet_path.exists():
+        return _read_parquet(parquet_path, columns, filters, parse_dates)
+    return _read_csv(file_path, columns, filters, parse_dates)
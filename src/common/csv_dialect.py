@@ -0,0 +1,190 @@
+"""
+Encoding and delimiter detection for the CSV reports, so each file is parsed once.
+
+The first few KB of a file decide the encoding (BOM, else UTF-8 if the sample
+decodes, else Latin-1) and the delimiter (csv.Sniffer over ',', ';' and tab,
+else the most frequent one in the header line). The result is cached per
+file path, size and modification time in a JSON manifest under the cache
+folder. read_csv_table / read_csv_once then parse the file a single time with
+the pyarrow CSV reader (the C engine when pyarrow is not installed).
+"""
+import os
+import csv
+import json
+import codecs
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+import pandas as pd
+
+from common.file_cache import CACHE_DIR
+from common.arrow import PARQUET_SUPPORTED
+
+# Bytes read from the start of a file to detect its dialect
+SNIFF_BYTES = 64 * 1024
+
+# Delimiters the reports use
+DELIMITERS = ',;\t'
+
+_MANIFEST_PATH = CACHE_DIR / 'csv_dialects.json'
+_lock = threading.Lock()
+
+
+def _load_manifest() -> Dict:
+    try:
+        with open(_MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(manifest: Dict) -> None:
+    try:
+        _MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = _MANIFEST_PATH.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, _MANIFEST_PATH)
+    except OSError:
+        # The cache is only an optimization
+        pass
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    Encoding of a file from its first bytes.
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    try:
+        # The sample may end inside a multi-byte character
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin1'
+
+
+def detect_delimiter(text: str) -> str:
+    """
+    Delimiter of a CSV sample (',' when nothing stands out).
+    """
+    lines = text.splitlines()
+    if len(lines) > 1:
+        # Drop the last line, it may be cut off
+        text = '\n'.join(lines[:-1])
+    try:
+        return csv.Sniffer().sniff(text, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        header = lines[0] if lines else ''
+        counts = {delimiter: header.count(delimiter) for delimiter in DELIMITERS}
+        best = max(counts, key=counts.get)
+        return best if counts[best] else ','
+
+
+def sniff_dialect(file_path) -> Dict[str, str]:
+    """
+    Encoding and delimiter of a CSV file, cached by path, size and mtime.
+
+    Args:
+        file_path: Path to the CSV file
+
+    Returns:
+        Dict with 'encoding' and 'delimiter'
+    """
+    file_path = Path(file_path)
+    stat = os.stat(file_path)
+    key = str(file_path.resolve())
+    with _lock:
+        manifest = _load_manifest()
+    entry = manifest.get(key)
+    if entry and entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+        return {'encoding': entry['encoding'], 'delimiter': entry['delimiter']}
+
+    with open(file_path, 'rb') as f:
+        sample = f.read(SNIFF_BYTES)
+    encoding = detect_encoding(sample)
+    text = sample.decode(encoding, errors='ignore')
+    dialect = {'encoding': encoding, 'delimiter': detect_delimiter(text)}
+
+    with _lock:
+        manifest = {path: entry for path, entry in _load_manifest().items() if os.path.exists(path)}
+        manifest[key] = dict(dialect, size=stat.st_size, mtime=stat.st_mtime)
+        _save_manifest(manifest)
+    return dialect
+
+
+def read_header(file_path, dialect: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Column names of a CSV file (reads only the first line).
+    """
+    dialect = dialect or sniff_dialect(file_path)
+    with open(file_path, 'r', encoding=dialect['encoding'], newline='') as f:
+        return next(csv.reader(f, delimiter=dialect['delimiter']), [])
+
+
+def read_csv_table(file_path, column_types: Optional[Dict] = None, include_columns: Optional[List[str]] = None):
+    """
+    Parse a CSV file once into an Arrow table, with its detected encoding and delimiter.
+
+    Args:
+        file_path: Path to the CSV file
+        column_types: Declared Arrow types by column (others are inferred);
+            columns missing from the file are ignored
+        include_columns: Columns to read; names missing from the file are ignored
+
+    Returns:
+        pyarrow.Table
+    """
+    import pyarrow.csv as pacsv
+
+    dialect = sniff_dialect(file_path)
+    header = read_header(file_path, dialect)
+    convert = pacsv.ConvertOptions(
+        column_types={col: kind for col, kind in (column_types or {}).items() if col in header},
+        include_columns=None if include_columns is None else [col for col in header if col in set(include_columns)],
+        strings_can_be_null=True,
+    )
+    return pacsv.read_csv(
+        file_path,
+        read_options=pacsv.ReadOptions(encoding=dialect['encoding']),
+        parse_options=pacsv.ParseOptions(delimiter=dialect['delimiter'], newlines_in_values=True),
+        convert_options=convert,
+    )
+
+
+def read_csv_once(file_path, text_columns: Optional[List[str]] = None, usecols: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Parse a CSV file once, with its detected encoding and delimiter.
+
+    Uses the pyarrow CSV reader when pyarrow is installed and the C engine
+    otherwise (or when pyarrow rejects the file, e.g. ragged rows).
+
+    Args:
+        file_path: Path to the CSV file
+        text_columns: Columns kept as text (identifiers that look like numbers)
+        usecols: Columns to read; names missing from the file are ignored
+
+    Returns:
+        Parsed DataFrame
+    """
+    if PARQUET_SUPPORTED:
+        import pyarrow as pa
+
+        try:
+            table = read_csv_table(file_path, {col: pa.string() for col in text_columns or []}, usecols)
+            return table.to_pandas(ignore_metadata=True)
+        except (pa.ArrowInvalid, UnicodeDecodeError) as e:
+            print(f"pyarrow could not parse {file_path} ({e}); using the C engine")
+
+    dialect = sniff_dialect(file_path)
+    header = read_header(file_path, dialect)
+    return pd.read_csv(
+        file_path,
+        encoding=dialect['encoding'],
+        sep=dialect['delimiter'],
+        dtype={col: str for col in text_columns or [] if col in header},
+        usecols=None if usecols is None else [col for col in header if col in set(usecols)],
+        low_memory=False,
+    )
@@ -0,0 +1,167 @@
+"""
+Declared column schema of daily_report and of the CDR built from it.
+
+Every column is one of 'numeric', 'date', 'category' or 'text'. The ETL casts
+the warehouse sheets to these types once before upload, and the loaders of
+the downstream tables use the same declaration instead of calling
+pd.to_numeric on the columns they need.
+"""
+from typing import Dict, Iterable
+import pandas as pd
+
+from common.dates import DATE_COLUMNS, convert_date_column
+
+# Database column names (exact match with database schema)
+DB_COLUMNS = [
+    'Name JA partner', 'WH location', 'Type of WH (bonded/non)',
+    'Container No.', 'Product type', 'Product reference', 'Port of Loading',
+    'Port of destination', 'Inbound ref.', 'Import invoice', 'House B/l',
+    'Bill of Lading', 'Shipping line', 'Vessel', 'ETD date POL',
+    'ATD date POL', 'ETA date', 'ATA date', 'Import MRN', 'Import date',
+    'Planned Inbound date', 'Inbound date',
+    'Inbound duration days (Inbound date-ATA date+1)', 'Inbound Status',
+    'Dev. Planned to Real in days Inbound date-Planned inbound date',  # Note: NO parentheses
+    'Release date from port (ATA date)',
+    'Contractual freetime for D&D combined', 'Free DM days', 'Free DT days',
+    'Free DM days remained', 'Free DT days remained',
+    'Container Returned date', 'Factory JASolar', 'Pallets', 'Piece',
+    'Wattage', 'Total Wattage', 'MW', 'Stock Status', 'Stock age',
+    'Release Number', 'Release type', 'Incoterm', 'Release date',
+    'Internal Outbound ref', 'Outbound date', 'Outbound Status',
+    'Agreed Delivery date', 'Delivery date', 'Storage time after release',
+    'Delivery Duration', 'Dev. Between Agreed vs Real delivery date',
+    'Sales Name', 'date CMR sent to JASolar', 'Customer Name',
+    'Customer Country', 'Consignee name', 'Destination Address',
+    'Destination Postal Code', 'Destination City', 'Destination Country',
+    'Sales invoice', 'PTW / intermodel type',
+    'Port fees (THC, ISPS, etc. )', 'DM cost', 'DT cost',
+    'Port storage cost', 'Drayage costs (Port to WH)', 'Inbound costs',
+    'Storage costs (fm IB to Today/OB)', 'Outbound costs',
+    'Transport costs', 'Comments'
+]
+
+NUMERIC_COLUMNS = [
+    'Inbound duration days (Inbound date-ATA date+1)',
+    'Dev. Planned to Real in days Inbound date-Planned inbound date',
+    'Contractual freetime for D&D combined', 'Free DM days', 'Free DT days',
+    'Free DM days remained', 'Free DT days remained',
+    'Pallets', 'Piece', 'Wattage', 'Total Wattage', 'MW', 'Stock age',
+    'Storage time after release', 'Delivery Duration',
+    'Dev. Between Agreed vs Real delivery date',
+    'Port fees (THC, ISPS, etc. )', 'DM cost', 'DT cost',
+    'Port storage cost', 'Drayage costs (Port to WH)', 'Inbound costs',
+    'Storage costs (fm IB to Today/OB)', 'Outbound costs', 'Transport costs',
+]
+
+CATEGORY_COLUMNS = [
+    'Name JA partner', 'WH location', 'Type of WH (bonded/non)',
+    'Product type', 'Port of Loading', 'Port of destination',
+    'Shipping line', 'Inbound Status', 'Factory JASolar', 'Stock Status',
+    'Release type', 'Incoterm', 'Outbound Status', 'Customer Country',
+    'Destination Country', 'PTW / intermodel type',
+]
+
+
+def _build_schema() -> Dict[str, str]:
+    schema = {}
+    for col in DB_COLUMNS:
+        if col in NUMERIC_COLUMNS:
+            schema[col] = 'numeric'
+        elif col in DATE_COLUMNS:
+            schema[col] = 'date'
+        elif col in CATEGORY_COLUMNS:
+            schema[col] = 'category'
+        else:
+            schema[col] = 'text'
+    return schema
+
+
+# Column -> type of the daily_report table
+DAILY_REPORT_SCHEMA = _build_schema()
+
+# current_report / archive_data / CDR: daily_report plus the derived columns
+CDR_SCHEMA = dict(DAILY_REPORT_SCHEMA)
+CDR_SCHEMA.update({
+    'Power': 'numeric',
+    'MegaWattage': 'numeric',
+    'Ref1': 'text',
+    'Ref2': 'text',
+    'Current_Status': 'category',
+    'Outbound_status': 'category',
+    'Release_Status': 'category',
+    'Delivery_Status': 'category',
+    'data_source': 'category',
+})
+
+
+def _as_text(series: pd.Series) -> pd.Series:
+    """Text form used by the tables: str() of every value, None for missing values."""
+    values = series.astype(object)
+    missing = values.isna()
+    if pd.api.types.infer_dtype(values, skipna=True) in ('string', 'empty'):
+        # Already text (e.g. a parsed CSV): only the missing values to replace
+        return values.where(~missing, None)
+    return values.where(missing, values.astype(str)).where(~missing, None)
+
+
+def _to_number(series: pd.Series, col: str, nullable_integers: bool, keep_unparsed: bool) -> pd.Series:
+    """
+    Parse a numeric column, printing the values that are not numbers.
+
+    Blank cells count as missing. Unparseable values ('N/A', '620W', ...) become
+    NaN, or stay as their original text with keep_unparsed (the column is then
+    an object column of numbers and text).
+    """
+    values = pd.to_numeric(series, errors='coerce')
+    if nullable_integers and values.dtype.kind == 'f':
+        present = values.dropna()
+        if (present == present.round()).all():
+            values = values.astype('Int64')
+
+    # Only the values that came out missing can be unparsed
+    unparsed = values.isna() & series.notna()
+    if unparsed.any():
+        text = series.astype(object)
+        unparsed[unparsed] = text[unparsed].astype(str).str.strip() != ''
+    if unparsed.any():
+        samples = ', '.join(repr(v) for v in text[unparsed].astype(str).unique()[:5])
+        action = 'kept as text' if keep_unparsed else 'set to NULL'
+        print(f"  Warning: {int(unparsed.sum())} non-numeric value(s) in '{col}' {action}: {samples}")
+        if keep_unparsed:
+            values = values.astype(object).where(~unparsed, text)
+    return values
+
+
+def cast_to_schema(df: pd.DataFrame, schema: Dict[str, str] = DAILY_REPORT_SCHEMA,
+                   kinds: Iterable[str] = ('numeric', 'date', 'category', 'text'),
+                   nullable_integers: bool = False, keep_unparsed: bool = False) -> pd.DataFrame:
+    """
+    Cast the columns of a DataFrame to their declared types, in place.
+
+    Args:
+        df: DataFrame to cast; columns missing from the schema are left as they are
+        schema: Column -> type mapping
+        kinds: Types to apply, e.g. ('numeric',) to only parse the numeric columns
+        nullable_integers: Store whole-number columns as Int64 so that 620 is not
+            written out as 620.0 when the column has gaps (for serializing, not
+            for arithmetic with np.where)
+        keep_unparsed: Keep values of numeric columns that are not numbers as
+            their original text instead of NaN (for uploading, so that no
+            value is lost); they are reported either way
+
+    Returns:
+        The same DataFrame
+    """
+    kinds = set(kinds)
+    for col, kind in schema.items():
+        if col not in df.columns or kind not in kinds:
+            continue
+        if kind == 'numeric':
+            df[col] = _to_number(df[col], col, nullable_integers, keep_unparsed)
+        elif kind == 'date':
+            df[col] = convert_date_column(df[col])
+        elif kind == 'category':
+            df[col] = _as_text(df[col]).astype('category')
+        else:
+            df[col] = _as_text(df[col])
+    return df
@@ -0,0 +1,148 @@
+"""
+Column-wide normalization of mixed-format date columns.
+
+Warehouse sheets and the Supabase tables hold dates as a mix of real datetimes,
+Excel serial numbers and free-form strings. Instead of parsing cell by cell,
+the values of a column are split into those categories and each category is
+parsed in one call on its distinct values.
+"""
+from datetime import datetime
+from typing import Iterable, Optional
+import numpy as np
+import pandas as pd
+
+# Date columns of the daily_report / CDR schema
+DATE_COLUMNS = [
+    'Outbound date',
+    'Agreed Delivery date',
+    'Delivery date',
+    'ETD date POL',
+    'ATD date POL',
+    'ETA date',
+    'ATA date',
+    'Import date',
+    'Planned Inbound date',
+    'Inbound date',
+    'Release date from port (ATA date)',
+    'Container Returned date',
+    'Release date',
+    'date CMR sent to JASolar'
+]
+
+ISO_DATE_FORMAT = '%Y-%m-%d'
+
+# Excel's epoch starts at 1899-12-30
+EXCEL_EPOCH = '1899-12-30'
+
+_NULL, _DATETIME, _NUMBER, _STRING, _OTHER = range(5)
+
+
+def _classify(value) -> int:
+    if value is None or value is pd.NaT or value is pd.NA:
+        return _NULL
+    if isinstance(value, str):
+        return _NULL if value == '' else _STRING
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return _DATETIME
+    if isinstance(value, (int, float)):
+        return _NULL if value != value else _NUMBER
+    return _NULL if pd.isna(value) else _OTHER
+
+
+def _format_one(value) -> Optional[str]:
+    """Reference conversion of a single value, used for values that cannot be parsed in bulk."""
+    try:
+        if isinstance(value, (pd.Timestamp, datetime)):
+            return value.strftime(ISO_DATE_FORMAT)
+        if isinstance(value, (int, float)):
+            return pd.to_datetime(value, origin=EXCEL_EPOCH, unit='D').strftime(ISO_DATE_FORMAT)
+        parsed = pd.to_datetime(value, format='mixed', dayfirst=True, errors='coerce')
+        if pd.notna(parsed):
+            return parsed.strftime(ISO_DATE_FORMAT)
+    except Exception:
+        pass
+    return None
+
+
+def _format_index(parsed: pd.DatetimeIndex) -> np.ndarray:
+    formatted = np.asarray(parsed.strftime(ISO_DATE_FORMAT), dtype=object)
+    formatted[np.asarray(parsed.isna())] = None
+    return formatted
+
+
+def _format_unique(values: np.ndarray, kind: int) -> np.ndarray:
+    """Format an array of distinct values that all belong to one category."""
+    try:
+        if kind == _DATETIME:
+            parsed = pd.DatetimeIndex(pd.to_datetime(values, errors='coerce'))
+        elif kind == _NUMBER:
+            serials = values.astype(float)
+            parsed = pd.DatetimeIndex(pd.to_datetime(serials, origin=EXCEL_EPOCH, unit='D', errors='coerce'))
+        elif kind == _STRING:
+            parsed = pd.DatetimeIndex(pd.to_datetime(values, format='mixed', dayfirst=True, errors='coerce'))
+        else:
+            raise TypeError('no bulk parser for this category')
+        return _format_index(parsed)
+    except Exception:
+        # e.g. mixed timezone offsets: fall back to the per-value conversion
+        return np.array([_format_one(v) for v in values], dtype=object)
+
+
+def convert_date_column(series: pd.Series, output: str = 'iso') -> pd.Series:
+    """
+    Convert date column handling datetimes, Excel serial numbers and string dates.
+
+    Args:
+        series: Pandas Series containing date values
+        output: 'iso' for YYYY-MM-DD strings (None for missing/invalid values),
+            'datetime' for a datetime64 column (NaT for missing/invalid values)
+
+    Returns:
+        Series with the converted dates, same index as the input
+    """
+    if output not in ('iso', 'datetime'):
+        raise ValueError(f"Unknown output format: {output}")
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        result = _format_index(pd.DatetimeIndex(series))
+    elif pd.api.types.is_numeric_dtype(series):
+        result = _format_unique(series.to_numpy(dtype=float, na_value=np.nan), _NUMBER)
+    else:
+        values = series.to_numpy(dtype=object)
+        result = np.full(len(values), None, dtype=object)
+        kinds = np.fromiter((_classify(v) for v in values), dtype=np.int8, count=len(values))
+        for kind in (_DATETIME, _NUMBER, _STRING, _OTHER):
+            positions = np.flatnonzero(kinds == kind)
+            if not len(positions):
+                continue
+            subset = values[positions]
+            if kind == _OTHER:
+                result[positions] = [_format_one(v) for v in subset]
+                continue
+            # Parse every distinct value once
+            codes, uniques = pd.factorize(subset)
+            result[positions] = _format_unique(np.asarray(uniques, dtype=object), kind)[codes]
+
+    converted = pd.Series(result, index=series.index, name=series.name, dtype=object)
+    if output == 'datetime':
+        return pd.to_datetime(converted, format=ISO_DATE_FORMAT)
+    return converted
+
+
+def convert_date_columns(df: pd.DataFrame, columns: Iterable[str] = DATE_COLUMNS,
+                         output: str = 'iso') -> pd.DataFrame:
+    """
+    Convert every date column present in the DataFrame in place.
+
+    Args:
+        df: DataFrame holding the date columns
+        columns: Names of the date columns
+        output: Output format, see convert_date_column
+
+    Returns:
+        The same DataFrame
+    """
+    for col in columns:
+        if col in df.columns:
+            df[col] = convert_date_column(df[col], output=output)
+    return df
@@ -0,0 +1,73 @@
+"""
+Row keys, row hashes and key/hash diffs for delta syncs.
+
+A table is compared against its previous state by a stable row key and a
+content hash per row, so that only inserted, changed and removed rows have to
+be written.
+"""
+from typing import Dict, List, Optional
+import pandas as pd
+
+# Separator used when several key parts are joined
+KEY_SEPARATOR = '\x1f'
+
+
+def hash_rows(df: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.Series:
+    """
+    Hash the content of every row.
+
+    Args:
+        df: DataFrame to hash
+        columns: Columns that make up the row content (default: all columns)
+
+    Returns:
+        Series of 16-character hex digests, same index as df
+    """
+    subset = df[columns] if columns is not None else df
+    # Hash the text form so that the digest does not depend on the dtypes pandas inferred
+    as_text = subset.astype(object).where(subset.notna(), None).astype(str)
+    hashed = pd.util.hash_pandas_object(as_text, index=False)
+    return hashed.map('{:016x}'.format)
+
+
+def build_row_keys(df: pd.DataFrame, key_columns: List[str]) -> pd.Series:
+    """
+    Build a unique key per row from the natural key columns.
+
+    Rows that share the same natural key (e.g. partial deliveries of one
+    container) are told apart by their position within that key.
+
+    Args:
+        df: DataFrame holding the key columns
+        key_columns: Natural key columns
+
+    Returns:
+        Series of hex keys, same index as df
+    """
+    parts = df[key_columns].astype(object).where(df[key_columns].notna(), None).astype(str)
+    natural_key = parts[key_columns[0]].str.cat([parts[col] for col in key_columns[1:]], sep=KEY_SEPARATOR)
+    occurrence = natural_key.groupby(natural_key, sort=False).cumcount().astype(str)
+    keyed = pd.DataFrame({'key': natural_key, 'occurrence': occurrence})
+    return pd.util.hash_pandas_object(keyed, index=False).map('{:016x}'.format)
+
+
+def diff_row_hashes(current: pd.Series, previous: Dict[str, str]) -> Dict[str, List[str]]:
+    """
+    Compare the current key -> hash mapping with the previous one.
+
+    Args:
+        current: Series of row hashes indexed by row key
+        previous: Mapping of row key -> row hash from the last sync
+
+    Returns:
+        Dict with lists of keys under 'inserted', 'updated', 'unchanged' and 'deleted'
+    """
+    previous_hashes = pd.Series(previous, dtype=object)
+    known = current.index.isin(previous_hashes.index)
+    same = known & (current.to_numpy() == previous_hashes.reindex(current.index).to_numpy())
+    return {
+        'inserted': current.index[~known].tolist(),
+        'updated': current.index[known & ~same].tolist(),
+        'unchanged': current.index[same].tolist(),
+        'deleted': previous_hashes.index[~previous_hashes.index.isin(current.index)].tolist(),
+    }
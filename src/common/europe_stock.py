@@ -0,0 +1,159 @@
+"""
+Column-projected loading of the Europe Stock workbook ("Summary-Europe" sheet).
+
+The sheet has 70+ columns, about 40 of which the RNO pipeline drops right
+after loading (clean_and_prepare_data). Those columns are now left out by the
+reader itself (a usecols callable over the header names, as pandas numbers
+them: 'Type.2', 'Unnamed: 66', ...), so they are never converted into Python
+objects or held in the frame. The workbook is read through common.excel
+(calamine when installed, else openpyxl in read-only mode, both streaming the
+sheet row by row).
+
+generate_rno_report and Not_Released both need the cleaned frame (identifiers
+cleaned, columns renamed, Ref1 added) and split it into its released and not
+released halves. load_clean_europe_stock keeps the cleaned frame in a
+FrameCache keyed on the workbook's content hash, so the first script of a run
+parses the workbook and the second one loads the cached frame; a new version
+synced by OneDrive has a different hash and is parsed again.
+"""
+import os
+import pandas as pd
+
+from common.excel import read_excel
+from common.file_cache import FrameCache
+from common.identifiers import clean_identifiers
+
+EUROPE_STOCK_SHEET = "Summary-Europe"
+
+# Cell texts read as missing values
+NA_VALUES = ['#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN',
+             'N/A', 'n/a', 'NA', '<NA>', '#VALUE!']
+
+# Columns of the sheet the RNO pipeline does not use (never read)
+UNUSED_COLUMNS = frozenset([
+    'Factory', 'Related transaction company', 'Related transaction Term', 'Currency',
+    'Inv No.', 'C2 --> C1 Date', 'Handover Date', 'Contractual Delivery Week', 'Delay (ETA Shift)',
+    'Planned Transit Time as  (ETD- ETA)', 'Planned Transit Time as  (ETD/ ETA)',
+    'Country Code', '状态', 'Internal related price', 'Battery type', 'Border Color',
+    'Junction box', 'length', 'Voltage', 'Storage duration', 'Sold（Week）',
+    'Storage duration（days）', 'original WH', 'Warehouse after transfer', 'ETD month',
+    'Sold month', 'outbound quantity', 'Rest quantity', 'Released on the sea',
+    'Booking No.', 'EWX Week', 'Type.2', 'Auxiliary column', 'Inv&type', '是否签收',
+    '型号', 'LRF', 'Unnamed: 66', 'Unnamed: 67', 'Unnamed: 68', 'Unnamed: 69', 'Unnamed: 70',
+    'Unnamed: 71', 'Unnamed: 72',
+])
+
+# Identifier columns kept as read (text or whole numbers), never coerced to float
+ID_COLUMNS = ['Container', 'DN', 'Inv.']
+
+# Date columns read as objects and parsed afterwards
+SOLD_DATE_COLUMNS = ['Sold Date']
+
+# Names the identifier columns get in the cleaned frame
+RENAMED_COLUMNS = {'Inv.': 'Invoice Number', 'Container': 'Container Number', 'DN': 'Release Number'}
+
+# Version of the cleaned frame layout; bump it when loading or cleaning changes
+CLEAN_CACHE_VERSION = '1'
+
+
+def is_used_column(name) -> bool:
+    """usecols callable: True for the columns the RNO pipeline reads."""
+    return str(name) not in UNUSED_COLUMNS
+
+
+def load_europe_stock(file_path, usecols=is_used_column) -> pd.DataFrame:
+    """
+    Read the used columns of the Summary-Europe sheet.
+
+    Args:
+        file_path: Path to the Europe Stock workbook
+        usecols: Column selection passed to the reader (None reads every column)
+
+    Returns:
+        DataFrame with the date columns parsed (unparsable dates as NaT)
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Excel file not found at: {file_path}")
+
+    df = read_excel(
+        file_path,
+        sheet_name=EUROPE_STOCK_SHEET,
+        usecols=usecols,
+        na_values=NA_VALUES,
+        keep_default_na=True,
+        dtype={col: 'object' for col in ID_COLUMNS + SOLD_DATE_COLUMNS},
+    )
+
+    # Convert known date columns to datetime with error handling
+    for col in SOLD_DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    return df
+
+
+def clean_europe_stock(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean the identifiers, rename the identifier columns and add Ref1.
+
+    Args:
+        df: Frame read by load_europe_stock
+
+    Returns:
+        Cleaned DataFrame
+    """
+    # Remove special characters from the identifier columns
+    for col in ID_COLUMNS:
+        if col in df.columns:
+            df[col] = clean_identifiers(df[col])
+
+    df = df.rename(columns=RENAMED_COLUMNS)
+
+    # Remove the unused columns (only present when read with usecols=None)
+    df = df.drop(columns=list(UNUSED_COLUMNS), errors='ignore')
+
+    # Create Ref1 column
+    if 'Release Number' in df.columns and 'Container Number' in df.columns:
+        df['Ref1'] = df['Release Number'].astype(str) + df['Container Number'].astype(str)
+    else:
+        df['Ref1'] = None
+    return df
+
+
+def load_clean_europe_stock(file_path, cache: bool = True) -> pd.DataFrame:
+    """
+    Cleaned Europe Stock frame, served from the cache while the workbook is unchanged.
+
+    Args:
+        file_path: Path to the Europe Stock workbook
+        cache: Look up and store the cleaned frame in the local cache
+
+    Returns:
+        Cleaned DataFrame (see clean_europe_stock)
+    """
+    if not cache:
+        return clean_europe_stock(load_europe_stock(file_path))
+
+    frames = FrameCache('europe_stock', version=CLEAN_CACHE_VERSION)
+    hit, df = frames.lookup(file_path)
+    if hit and df is not None:
+        print("Europe Stock workbook unchanged, using the cached cleaned data")
+    else:
+        df = clean_europe_stock(load_europe_stock(file_path))
+        frames.store(file_path, df)
+    frames.save(keep_files=[file_path])
+    return df
+
+
+def split_released(df: pd.DataFrame):
+    """
+    Split the cleaned frame into Released and Not Released rows.
+
+    Released rows have a Release Number and a Sold Date; Not Released rows have
+    neither (rows with only one of them are in neither half).
+
+    Returns:
+        Tuple of (Released DataFrame, Not Released DataFrame)
+    """
+    release = df['Release Number'].notna() & (df['Release Number'].astype(str).str.strip() != "")
+    sold = df['Sold Date'].notna() & (df['Sold Date'].astype(str).str.strip() != "")
+    return df[release & sold], df[~release & ~sold]
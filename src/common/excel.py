@@ -0,0 +1,187 @@
+"""
+Shared workbook reader and writer for the report scripts.
+
+read_excel uses the calamine engine (python-calamine, Rust-based) when it is
+installed and falls back to openpyxl otherwise. Both engines go through the
+same pandas cell conversion (integral numbers -> int, dates -> Timestamp,
+error cells -> NaN), so the resulting dtypes are the same; on the pandas
+versions where calamine still returned date objects for date-only cells,
+those are converted here as well.
+
+write_workbook writes several sheets in one xlsxwriter pass, row by row, so
+large workbooks can use xlsxwriter's constant_memory mode (which only keeps
+the current row in memory and therefore needs rows written in order, unlike
+DataFrame.to_excel, which writes column by column).
+"""
+import os
+import logging
+from datetime import date, datetime
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 'auto' (calamine if installed, else openpyxl), or force 'calamine' / 'openpyxl'
+EXCEL_ENGINE = os.getenv('EXCEL_ENGINE', 'auto')
+
+# Workbooks with at least this many rows in total are written in constant_memory mode
+CONSTANT_MEMORY_ROWS = int(os.getenv('EXCEL_CONSTANT_MEMORY_ROWS', '50000'))
+
+
+def _pandas_version() -> tuple:
+    parts = []
+    for part in pd.__version__.split('.')[:3]:
+        digits = ''.join(ch for ch in part if ch.isdigit())
+        parts.append(int(digits) if digits else 0)
+    return tuple(parts)
+
+
+# The calamine engine exists from pandas 2.2; date-only cells match openpyxl from 2.2.3
+CALAMINE_SUPPORTED = _pandas_version() >= (2, 2, 0) and find_spec('python_calamine') is not None
+_CALAMINE_RETURNS_DATES = _pandas_version() < (2, 2, 3)
+
+# Cell formats DataFrame.to_excel uses, so both writers give the same workbook
+# (pandas 3 writes the header without the bold, bordered style)
+HEADER_FORMAT = {} if _pandas_version() >= (3, 0, 0) else {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+DATE_FORMAT = 'YYYY-MM-DD'
+DATETIME_FORMAT = 'YYYY-MM-DD HH:MM:SS'
+
+
+def excel_engine(file_path=None) -> str:
+    """
+    Pick the engine used for a workbook.
+
+    Args:
+        file_path: Optional workbook path (legacy .xls needs calamine or xlrd)
+
+    Returns:
+        Engine name to pass to pd.read_excel, or None to let pandas decide
+    """
+    if EXCEL_ENGINE != 'auto':
+        return EXCEL_ENGINE
+    if CALAMINE_SUPPORTED:
+        return 'calamine'
+    if file_path is not None and Path(file_path).suffix.lower() == '.xls':
+        return None
+    return 'openpyxl'
+
+
+def _harmonize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turn date objects from calamine into datetimes, as openpyxl returns them.
+    """
+    def as_datetime(value):
+        if isinstance(value, date) and not isinstance(value, datetime):
+            return datetime(value.year, value.month, value.day)
+        return value
+
+    for col in df.columns[df.dtypes == object]:
+        values = df[col]
+        is_date = values.map(lambda v: isinstance(v, date) and not isinstance(v, datetime))
+        if not is_date.any():
+            continue
+        if is_date.sum() == values.notna().sum():
+            # Only dates in the column: openpyxl gives a datetime64 column
+            df[col] = pd.to_datetime(values)
+        else:
+            df[col] = values.map(as_datetime)
+    return df
+
+
+def read_excel(file_path, sheet_name=0, **kwargs):
+    """
+    Read a worksheet with the fastest available engine.
+
+    Takes the same arguments as pd.read_excel. An explicit engine= is honoured;
+    if calamine fails on a workbook, the read is retried with openpyxl.
+
+    Args:
+        file_path: Path to the workbook
+        sheet_name: Sheet name or index (or a list / None, as in pd.read_excel)
+        **kwargs: Passed through to pd.read_excel
+
+    Returns:
+        DataFrame, or dict of DataFrames when several sheets are requested
+    """
+    engine = kwargs.pop('engine', None) or excel_engine(file_path)
+    try:
+        result = pd.read_excel(file_path, sheet_name=sheet_name, engine=engine, **kwargs)
+    except (OSError, KeyError, ValueError):
+        # Missing file / sheet: the other engine would fail the same way
+        raise
+    except Exception as e:
+        if engine != 'calamine':
+            raise
+        logger.warning(f"calamine could not read {file_path} ({e}); retrying with openpyxl")
+        engine = 'openpyxl' if Path(file_path).suffix.lower() != '.xls' else None
+        result = pd.read_excel(file_path, sheet_name=sheet_name, engine=engine, **kwargs)
+
+    if engine == 'calamine' and _CALAMINE_RETURNS_DATES:
+        if isinstance(result, dict):
+            result = {name: _harmonize(df) for name, df in result.items()}
+        else:
+            result = _harmonize(result)
+    return result
+
+
+def _cell_values(values: pd.Series) -> np.ndarray:
+    """Column as Python objects, with None for missing values (written as empty cells)."""
+    cells = values.to_numpy(dtype=object, copy=True)
+    cells[values.isna().to_numpy()] = None
+    return cells
+
+
+def write_workbook(file_path, sheets: Dict[str, pd.DataFrame], constant_memory: Optional[bool] = None) -> Path:
+    """
+    Write frames as sheets of one workbook in a single xlsxwriter pass.
+
+    Cells are written as DataFrame.to_excel(index=False) writes them with the
+    installed pandas (header in HEADER_FORMAT, dates as YYYY-MM-DD, datetimes
+    as YYYY-MM-DD HH:MM:SS, missing values empty). The workbook is written under a temporary name and
+    renamed into place.
+
+    Args:
+        file_path: Target .xlsx path
+        sheets: Sheet name -> frame, in sheet order
+        constant_memory: Keep only the current row in memory; by default on when
+            the sheets have CONSTANT_MEMORY_ROWS rows or more in total
+
+    Returns:
+        Path of the written workbook
+    """
+    import xlsxwriter
+
+    file_path = Path(file_path)
+    if constant_memory is None:
+        constant_memory = sum(len(df) for df in sheets.values()) >= CONSTANT_MEMORY_ROWS
+    tmp_path = file_path.with_name(f"~{file_path.stem}.tmp.xlsx")
+    workbook = xlsxwriter.Workbook(str(tmp_path), {'constant_memory': constant_memory, 'remove_timezone': True})
+    try:
+        header_format = workbook.add_format(HEADER_FORMAT) if HEADER_FORMAT else None
+        date_format = workbook.add_format({'num_format': DATE_FORMAT})
+        datetime_format = workbook.add_format({'num_format': DATETIME_FORMAT})
+
+        for sheet_name, df in sheets.items():
+            worksheet = workbook.add_worksheet(sheet_name)
+            for col_num, name in enumerate(df.columns):
+                worksheet.write(0, col_num, str(name), header_format)
+            columns = [_cell_values(df.iloc[:, i]) for i in range(df.shape[1])]
+            for row_num, row in enumerate(zip(*columns), start=1):
+                for col_num, value in enumerate(row):
+                    if value is None:
+                        continue
+                    if isinstance(value, datetime):
+                        worksheet.write_datetime(row_num, col_num, value, datetime_format)
+                    elif isinstance(value, date):
+                        worksheet.write_datetime(row_num, col_num, value, date_format)
+                    else:
+                        worksheet.write(row_num, col_num, value)
+        workbook.close()
+        os.replace(tmp_path, file_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return file_path
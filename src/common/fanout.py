@@ -0,0 +1,138 @@
+"""
+Write one DataFrame to several destination files, serializing it only once.
+
+The frame is encoded once per distinct format (plain CSV, or each compression
+inferred from the file suffix, e.g. CDR.csv.gz) into a local temporary file,
+optionally in row chunks. The encoded file is then copied to every
+destination in parallel: each copy goes to a temporary name in the target
+folder and is renamed into place, so readers (Power BI, OneDrive sync) never
+see a half-written file. Destinations on the same volume as the temporary
+file can be hard-linked instead of copied.
+"""
+import os
+import time
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import pandas as pd
+
+# Number of destination copies running at once
+FANOUT_WORKERS = int(os.getenv('FANOUT_WORKERS', '4'))
+
+# File suffix -> pandas compression name
+COMPRESSION_SUFFIXES = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.zip': 'zip',
+    '.xz': 'xz',
+    '.zst': 'zstd',
+}
+
+
+@dataclass
+class FanoutResult:
+    """Outcome of writing one destination."""
+    path: Path
+    ok: bool
+    seconds: float
+    size: int = 0
+    linked: bool = False
+    error: Optional[str] = None
+
+    def __str__(self) -> str:
+        if not self.ok:
+            return f"{self.path}: FAILED ({self.error})"
+        how = "linked" if self.linked else "copied"
+        return f"{self.path}: {how}, {self.size / 1e6:.1f} MB in {self.seconds:.2f}s"
+
+
+def compression_for(path) -> Optional[str]:
+    """Compression implied by the file suffix, None for plain files."""
+    return COMPRESSION_SUFFIXES.get(Path(path).suffix.lower())
+
+
+def _serialize(df: pd.DataFrame, folder: Path, compression: Optional[str], chunksize: Optional[int],
+               csv_options: Dict, archive_name: str) -> Path:
+    """Encode the frame once into a temporary file."""
+    suffix = '.csv' + next((s for s, name in COMPRESSION_SUFFIXES.items() if name == compression), '')
+    handle, name = tempfile.mkstemp(suffix=suffix, dir=folder)
+    os.close(handle)
+    if compression == 'zip':
+        # Name the member after the destination (CDR.csv.zip -> CDR.csv)
+        compression = {'method': 'zip', 'archive_name': archive_name}
+    df.to_csv(name, compression=compression, chunksize=chunksize, **csv_options)
+    return Path(name)
+
+
+def _place(source: Path, destination: Path, link: bool) -> FanoutResult:
+    """Copy (or hard-link) the encoded file to one destination, atomically."""
+    start = time.perf_counter()
+    tmp_path = destination.with_name(f".{destination.name}.tmp")
+    try:
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        if tmp_path.exists():
+            tmp_path.unlink()
+        linked = False
+        if link:
+            try:
+                os.link(source, tmp_path)
+                linked = True
+            except OSError:
+                pass
+        if not linked:
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, destination)
+        return FanoutResult(destination, True, time.perf_counter() - start, destination.stat().st_size, linked)
+    except Exception as e:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        return FanoutResult(destination, False, time.perf_counter() - start, error=str(e))
+
+
+def write_csv_fanout(df: pd.DataFrame, destinations: Iterable, chunksize: Optional[int] = None,
+                     link: bool = False, workers: int = FANOUT_WORKERS, **csv_options) -> List[FanoutResult]:
+    """
+    Write a DataFrame as CSV to every destination, encoding it once per format.
+
+    Args:
+        df: DataFrame to write
+        destinations: Target file paths; a .gz/.bz2/.zip/.xz/.zst suffix writes
+            a compressed variant (e.g. CDR.csv.gz)
+        chunksize: Rows encoded per chunk (bounds the encoder's memory); all at once if None
+        link: Hard-link destinations on the same volume instead of copying
+            (only for folders that are not synced or edited in place)
+        workers: Number of destinations written at once
+        csv_options: Passed to DataFrame.to_csv (default index=False)
+
+    Returns:
+        One FanoutResult per destination, in the given order
+    """
+    destinations = [Path(d) for d in destinations]
+    csv_options.setdefault('index', False)
+
+    with tempfile.TemporaryDirectory(prefix='fanout_') as folder:
+        encoded = {}
+        for destination in destinations:
+            compression = compression_for(destination)
+            if compression in encoded:
+                continue
+            start = time.perf_counter()
+            encoded[compression] = _serialize(df, Path(folder), compression, chunksize, csv_options,
+                                              archive_name=destination.stem)
+            print(f"Encoded {len(df)} rows as {compression or 'plain'} CSV "
+                  f"({encoded[compression].stat().st_size / 1e6:.1f} MB) in {time.perf_counter() - start:.2f}s")
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            results = list(executor.map(
+                lambda d: _place(encoded[compression_for(d)], d, link),
+                destinations,
+            ))
+
+    for result in results:
+        print(f"  {result}")
+    return results
@@ -0,0 +1,155 @@
+"""
+Local cache of parsed source files.
+
+Each source file is fingerprinted by size, modification time and content hash.
+The parsed DataFrame is pickled under the cache folder and recorded in a JSON
+manifest, so an unchanged file can be served from the cache on the next run
+instead of being parsed again.
+"""
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import pandas as pd
+
+# Root folder for all local caches (override with AUTOMATION_CACHE_DIR)
+CACHE_DIR = Path(os.getenv('AUTOMATION_CACHE_DIR', Path(__file__).resolve().parents[2] / '.automation_cache'))
+
+
+def file_hash(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Compute the SHA-256 hash of a file's content.
+    
+    Args:
+        file_path: Path to the file
+        chunk_size: Number of bytes read per chunk
+        
+    Returns:
+        Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(file_path: Path) -> Dict:
+    """
+    Build the manifest entry (size, mtime, content hash) for a file.
+    """
+    stat = os.stat(file_path)
+    return {
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'sha256': file_hash(file_path),
+    }
+
+
+class FrameCache:
+    """
+    Manifest-backed cache of DataFrames parsed from source files.
+    
+    A file is a cache hit when its size and mtime match the manifest, or when
+    only the mtime changed but the content hash is the same (e.g. OneDrive
+    touching the file during sync). Everything else is a miss.
+    """
+
+    def __init__(self, name: str, version: str = '', cache_dir: Path = CACHE_DIR):
+        self.folder = Path(cache_dir) / name
+        self.manifest_path = self.folder / 'manifest.json'
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.entries = self._load_manifest()
+
+    def _load_manifest(self) -> Dict:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # A different version (e.g. changed column template) invalidates every entry
+        if manifest.get('version') != self.version:
+            return {}
+        return manifest.get('files', {})
+
+    def lookup(self, file_path: Path) -> Tuple[bool, Optional[pd.DataFrame]]:
+        """
+        Look up the cached frame for a source file.
+        
+        Args:
+            file_path: Path to the source file
+            
+        Returns:
+            Tuple of (hit, DataFrame). The DataFrame is None on a miss, and also
+            on a hit for a file that was cached as empty.
+        """
+        key = str(Path(file_path).resolve())
+        entry = self.entries.get(key)
+        if entry is not None:
+            try:
+                stat = os.stat(file_path)
+                unchanged = stat.st_size == entry['size'] and (
+                    stat.st_mtime == entry['mtime'] or file_hash(file_path) == entry['sha256']
+                )
+                if unchanged:
+                    entry['mtime'] = stat.st_mtime
+                    df = None
+                    if entry.get('frame'):
+                        df = pd.read_pickle(self.folder / entry['frame'])
+                    self.hits += 1
+                    return True, df
+            except (OSError, KeyError, ValueError, EOFError):
+                pass
+        self.misses += 1
+        return False, None
+
+    def store(self, file_path: Path, df: Optional[pd.DataFrame]) -> None:
+        """
+        Record a freshly parsed frame for a source file.
+        
+        Args:
+            file_path: Path to the source file
+            df: Parsed DataFrame, or None if the file had no data
+        """
+        key = str(Path(file_path).resolve())
+        entry = file_fingerprint(file_path)
+        entry['frame'] = None
+        if df is not None:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            frame_name = f"{entry['sha256']}.pkl"
+            tmp_path = self.folder / f"{frame_name}.tmp"
+            df.to_pickle(tmp_path)
+            os.replace(tmp_path, self.folder / frame_name)
+            entry['frame'] = frame_name
+        self.entries[key] = entry
+
+    def save(self, keep_files=None) -> None:
+        """
+        Write the manifest to disk and drop cached frames that are no longer referenced.
+        
+        Args:
+            keep_files: Optional list of source paths still present; entries for
+                other files are removed from the manifest
+        """
+        if keep_files is not None:
+            keep = {str(Path(f).resolve()) for f in keep_files}
+            self.entries = {k: v for k, v in self.entries.items() if k in keep}
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'files': self.entries}, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+        referenced = {entry['frame'] for entry in self.entries.values() if entry.get('frame')}
+        for frame_file in self.folder.glob('*.pkl'):
+            if frame_file.name not in referenced:
+                try:
+                    frame_file.unlink()
+                except OSError:
+                    pass
@@ -0,0 +1,150 @@
+"""
+Typed hand-off of frames between the steps of one daily run.
+
+A step publishes a frame as an uncompressed Arrow IPC file in the run folder
+(one folder per day under the cache folder), next to a JSON manifest naming
+the deliverable it was written with (e.g. the logistics workbook, with its
+size and modification time). The next step memory-maps the Arrow file, so
+dates, numbers and identifiers keep their types and nothing is parsed again;
+it falls back to its Excel input when there is no hand-off, pyarrow is not
+installed, or the deliverable has changed since (re-run, edited by hand).
+"""
+import os
+import json
+import shutil
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+import pandas as pd
+
+from common.file_cache import CACHE_DIR
+from common.arrow import PARQUET_SUPPORTED, to_arrow_table
+
+# Folder of the current run's hand-off files (default: <cache>/runs/YYYY-MM-DD)
+RUN_DIR = os.getenv('AUTOMATION_RUN_DIR')
+
+# Days of run folders kept under the cache folder
+HANDOFF_KEEP_DAYS = int(os.getenv('HANDOFF_KEEP_DAYS', '7'))
+
+# Hand-off name of the Outbound_logistics_report frame (logistics-report -> bmo-report)
+OUTBOUND_REPORT_HANDOFF = 'outbound_logistics_report'
+
+
+def run_dir(day: Optional[date] = None) -> Path:
+    """
+    Folder of the hand-off files of one run.
+
+    Args:
+        day: Day of the run (default today); ignored when AUTOMATION_RUN_DIR is set
+
+    Returns:
+        Path of the run folder (not created)
+    """
+    if RUN_DIR:
+        return Path(RUN_DIR)
+    return CACHE_DIR / 'runs' / (day or date.today()).isoformat()
+
+
+def _describe(source) -> Optional[Dict]:
+    """Path, size and mtime of the deliverable a frame was published with."""
+    if source is None:
+        return None
+    stat = os.stat(source)
+    return {'path': str(Path(source).resolve()), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def _prune_runs(keep_days: int = HANDOFF_KEEP_DAYS) -> None:
+    """Remove dated run folders older than keep_days."""
+    oldest = date.today() - timedelta(days=keep_days)
+    for folder in (CACHE_DIR / 'runs').glob('????-??-??'):
+        try:
+            if date.fromisoformat(folder.name) < oldest:
+                shutil.rmtree(folder, ignore_errors=True)
+        except ValueError:
+            continue
+
+
+def publish_frame(df: pd.DataFrame, name: str, source=None, folder: Optional[Path] = None) -> Optional[Path]:
+    """
+    Publish a frame for the next step of the run (atomically).
+
+    Args:
+        df: Frame to hand off
+        name: Hand-off name (file stem), e.g. 'outbound_logistics'
+        source: Deliverable written from the same frame; a consumer only uses the
+            hand-off while that file is unchanged
+        folder: Run folder (default run_dir())
+
+    Returns:
+        Path of the Arrow file, or None when pyarrow is not installed or the write failed
+    """
+    if not PARQUET_SUPPORTED:
+        return None
+    import pyarrow as pa
+
+    folder = Path(folder) if folder else run_dir()
+    data_path = folder / f"{name}.arrow"
+    manifest_path = folder / f"{name}.json"
+    try:
+        folder.mkdir(parents=True, exist_ok=True)
+        table = to_arrow_table(df)
+        tmp_path = data_path.with_suffix('.arrow.tmp')
+        # Uncompressed, so readers can memory-map it without copying
+        with pa.OSFile(str(tmp_path), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, data_path)
+
+        manifest = {
+            'name': name,
+            'rows': len(df),
+            'columns': list(map(str, df.columns)),
+            'source': _describe(source),
+            'written': datetime.now().isoformat(),
+        }
+        tmp_path = manifest_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+    except (OSError, pa.ArrowException) as e:
+        print(f"Could not publish {name} to {folder}: {e}")
+        return None
+
+    if not RUN_DIR and folder == run_dir():
+        _prune_runs()
+    print(f"Published {name} ({len(df)} rows) to {data_path}")
+    return data_path
+
+
+def load_frame(name: str, source=None, folder: Optional[Path] = None) -> Optional[pd.DataFrame]:
+    """
+    Load a frame published earlier in the run, memory-mapped.
+
+    Args:
+        name: Hand-off name used by publish_frame
+        source: Deliverable the caller would otherwise read; the hand-off is only
+            used if it was published with this file, unchanged since
+        folder: Run folder (default run_dir())
+
+    Returns:
+        The published frame, or None when there is no usable hand-off
+    """
+    if not PARQUET_SUPPORTED:
+        return None
+    import pyarrow as pa
+
+    folder = Path(folder) if folder else run_dir()
+    data_path = folder / f"{name}.arrow"
+    try:
+        with open(folder / f"{name}.json", 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if source is not None and manifest.get('source') != _describe(source):
+            print(f"Hand-off {name} was published with another version of {source}; not using it")
+            return None
+        with pa.memory_map(str(data_path), 'r') as mapped:
+            table = pa.ipc.open_file(mapped).read_all()
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+    df = table.to_pandas(split_blocks=True)
+    print(f"Loaded {name} ({len(df)} rows) from {data_path}")
+    return df
@@ -0,0 +1,164 @@
+"""
+Persistent cache of column-mapping plans, keyed by header layout.
+
+The warehouses send the same few header layouts every day. The plan resolved
+for a layout (which source column feeds which template column) is stored on
+disk under its header signature, so a repeat layout is mapped with a single
+precomputed reindex. A layout that has not been seen before is recorded as a
+schema-drift event, together with its difference to the closest known layout.
+"""
+import os
+import json
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from common.file_cache import CACHE_DIR
+
+# A plan is a list of (source column position, template column) pairs
+HeaderPlan = List[Tuple[int, str]]
+
+
+def header_signature(headers: List[str]) -> str:
+    """
+    Build the signature of a header layout (order and exact spelling matter).
+
+    Args:
+        headers: Raw header texts of a sheet
+
+    Returns:
+        Hex digest identifying the layout
+    """
+    return hashlib.sha256(json.dumps([str(h) for h in headers]).encode('utf-8')).hexdigest()
+
+
+def layout_diff(headers: List[str], known_headers: List[str]) -> Dict[str, List[str]]:
+    """
+    Compare a header layout with a known one.
+
+    Returns:
+        Dict with the headers 'added' to and 'removed' from the known layout
+    """
+    current = [str(h) for h in headers]
+    known = [str(h) for h in known_headers]
+    return {
+        'added': [h for h in current if h not in known],
+        'removed': [h for h in known if h not in current],
+    }
+
+
+class HeaderPlanCache:
+    """
+    JSON-backed store of header layouts and their resolved mapping plans.
+
+    Plans are only valid for one template, so the cache is versioned like
+    FrameCache: a different version starts from an empty store.
+    """
+
+    def __init__(self, name: str, version: str = '', cache_dir: Path = CACHE_DIR):
+        self.folder = Path(cache_dir) / name
+        self.path = self.folder / 'layouts.json'
+        self.drift_log_path = self.folder / 'schema_drift.jsonl'
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.layouts = self._load()
+
+    def _load(self) -> Dict:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if stored.get('version') != self.version:
+            return {}
+        return stored.get('layouts', {})
+
+    def plans(self) -> Dict[str, HeaderPlan]:
+        """
+        Snapshot of signature -> plan, small enough to hand to worker processes.
+        """
+        return {signature: [tuple(step) for step in layout['plan']] for signature, layout in self.layouts.items()}
+
+    def get(self, headers: List[str]) -> Optional[HeaderPlan]:
+        """
+        Look up the plan for a header layout, counting hits and misses.
+        """
+        layout = self.layouts.get(header_signature(headers))
+        if layout is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        layout['last_seen'] = datetime.now().isoformat()
+        return [tuple(step) for step in layout['plan']]
+
+    def closest(self, headers: List[str]) -> Optional[Dict]:
+        """
+        Find the known layout sharing the most headers with the given one.
+        """
+        current = {str(h) for h in headers}
+        best = None
+        best_score = -1.0
+        for layout in self.layouts.values():
+            known = set(layout['headers'])
+            union = current | known
+            score = len(current & known) / len(union) if union else 1.0
+            if score > best_score:
+                best, best_score = layout, score
+        return best
+
+    def add(self, headers: List[str], plan: HeaderPlan, source: str = '') -> Optional[Dict]:
+        """
+        Store the plan of a new header layout.
+
+        Args:
+            headers: Raw header texts of the sheet
+            plan: Resolved (source position, template column) pairs
+            source: Name of the file the layout was first seen in
+
+        Returns:
+            The schema-drift event (also appended to the drift log), or None if
+            the layout was already known
+        """
+        signature = header_signature(headers)
+        if signature in self.layouts:
+            return None
+
+        mapped_positions = {position for position, _ in plan}
+        event = {
+            'time': datetime.now().isoformat(),
+            'source': source,
+            'signature': signature,
+            'mapped_columns': len(plan),
+            'unmapped_headers': [str(h) for i, h in enumerate(headers) if i not in mapped_positions],
+        }
+        closest = self.closest(headers)
+        if closest is not None:
+            event['closest_source'] = closest['source']
+            event.update(layout_diff(headers, closest['headers']))
+
+        self.layouts[signature] = {
+            'headers': [str(h) for h in headers],
+            'plan': [list(step) for step in plan],
+            'source': source,
+            'first_seen': event['time'],
+            'last_seen': event['time'],
+        }
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+        with open(self.drift_log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+        return event
+
+    def save(self) -> None:
+        """
+        Write the known layouts to disk.
+        """
+        self.folder.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'layouts': self.layouts}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,122 @@
+"""
+Vectorized cleaning of container, release and invoice numbers.
+
+The scripts used to clean identifiers one cell at a time (a generator over the
+characters, or re.sub per value). These helpers work on whole columns: with
+pyarrow installed, the ASCII values (nearly all of them) are trimmed by
+Arrow's compute kernels and the special characters are dropped with a byte
+lookup table over the Arrow string buffer; the few values with other characters
+(e.g. Chinese invoice numbers) and installs without pyarrow use the
+precompiled Python patterns, which follow str.isalnum / str.isspace exactly,
+so both paths give the same result.
+
+Numbers that went through a float column (2500012345.0) lose the trailing .0
+before anything else, instead of the dot being dropped and the zero kept
+(25000123450).
+"""
+import re
+import numpy as np
+import pandas as pd
+
+from common.arrow import PARQUET_SUPPORTED
+
+# Integral numbers written as floats: "2500012345.0"
+FLOAT_SUFFIX = re.compile(r'^([+-]?\d+)\.0+$')
+
+# Everything except letters, digits and whitespace (as str.isalnum / str.isspace)
+NON_ALNUM = re.compile(r'[^\w\s]|_')
+
+# Everything except ASCII letters, digits and the space
+NON_ASCII_ALNUM = re.compile(r'[^A-Za-z0-9 ]+')
+
+# The same for ASCII text in Arrow: characters str.isspace accepts, and the bytes each pattern keeps
+ASCII_WHITESPACE = ''.join(chr(b) for b in range(128) if chr(b).isspace())
+KEEP_ALNUM = np.array([b < 128 and (chr(b).isalnum() or chr(b).isspace()) for b in range(256)])
+KEEP_ASCII_ALNUM = np.array([b < 128 and (chr(b).isalnum() or b == ord(' ')) for b in range(256)])
+
+
+def _python_id_text(value: str) -> str:
+    return FLOAT_SUFFIX.sub(r'\1', value.strip())
+
+
+def _python_clean(value: str, pattern: re.Pattern) -> str:
+    return pattern.sub('', _python_id_text(value)).strip()
+
+
+def _keep_bytes(array, keep: np.ndarray):
+    """
+    Drop the bytes not marked in keep from every string of an Arrow string
+    array without nulls (character-exact for ASCII strings only).
+    """
+    import pyarrow as pa
+
+    _, offset_buffer, data_buffer = array.buffers()
+    offsets = np.frombuffer(offset_buffer, dtype=np.int32)[array.offset:array.offset + len(array) + 1]
+    data = np.frombuffer(data_buffer, dtype=np.uint8)[offsets[0]:offsets[-1]] if data_buffer else np.empty(0, np.uint8)
+    kept = keep[data]
+    kept_before = np.concatenate([[0], np.cumsum(kept, dtype=np.int64)])
+    new_offsets = kept_before[offsets - offsets[0]].astype(np.int32)
+    return pa.StringArray.from_buffers(len(array), pa.py_buffer(new_offsets), pa.py_buffer(data[kept]))
+
+
+def _apply(values: pd.Series, clean_python, clean_arrow) -> pd.Series:
+    """
+    Run the Arrow kernels on ASCII values and the Python patterns on the rest
+    (all values without pyarrow); missing values are left as they were.
+    """
+    missing = values.isna()
+    text = values.astype(str)
+    if PARQUET_SUPPORTED:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        array = pc.fill_null(pa.array(text, type=pa.string(), from_pandas=True), '')
+        result = clean_arrow(array, pc).to_numpy(zero_copy_only=False).astype(object)
+        other = ~pc.string_is_ascii(array).to_numpy(zero_copy_only=False) & ~missing.to_numpy()
+        if other.any():
+            result[other] = [clean_python(value) for value in text.to_numpy(dtype=object)[other]]
+        cleaned = pd.Series(result, index=values.index, dtype=object)
+    else:
+        cleaned = pd.Series([clean_python(value) if not gap else None for value, gap in zip(text, missing)],
+                            index=values.index, dtype=object)
+    return cleaned.where(~missing, values)
+
+
+def id_text(values: pd.Series) -> pd.Series:
+    """
+    Identifiers as stripped text, without the .0 of float-coerced numbers.
+
+    Args:
+        values: Column of identifiers (text, numbers or a mix)
+
+    Returns:
+        Object column of text, missing values left as they were
+    """
+    def clean_arrow(array, pc):
+        array = pc.utf8_trim(array, ASCII_WHITESPACE)
+        return pc.replace_substring_regex(array, FLOAT_SUFFIX.pattern, r'\1')
+
+    return _apply(values, _python_id_text, clean_arrow)
+
+
+def clean_identifiers(values: pd.Series, ascii_only: bool = False) -> pd.Series:
+    """
+    Remove special characters from identifiers (container / release / invoice numbers).
+
+    Args:
+        values: Column of identifiers
+        ascii_only: Keep only A-Z, a-z, 0-9 and spaces (otherwise any letter, digit
+            or whitespace, e.g. Chinese characters, is kept)
+
+    Returns:
+        Object column of cleaned, stripped text, missing values left as they were
+    """
+    pattern = NON_ASCII_ALNUM if ascii_only else NON_ALNUM
+    keep = KEEP_ASCII_ALNUM if ascii_only else KEEP_ALNUM
+
+    def clean_arrow(array, pc):
+        array = pc.utf8_trim(array, ASCII_WHITESPACE)
+        array = pc.replace_substring_regex(array, FLOAT_SUFFIX.pattern, r'\1')
+        return pc.utf8_trim(_keep_bytes(array, keep), ASCII_WHITESPACE)
+
+    return _apply(values, lambda value: _python_clean(value, pattern), clean_arrow)
@@ -0,0 +1,116 @@
+"""
+Status / outbound date MegaWattage aggregates for the logistics and BMO reports.
+
+The reports used to print their status summaries by filtering the frame again
+for every status (and re-parsing MegaWattage inside each loop). build_summary
+groups the frame once by Current_Status x Outbound_status x outbound day (plus
+any row flags the caller passes, e.g. "row is in the outbound report") and
+keeps the record count and MegaWattage total per group. Every summary the
+reports print (per status, per month, month to date, today) is a roll-up of
+that small frame.
+"""
+from datetime import date
+from typing import Dict, Optional
+import pandas as pd
+
+# Grouping columns taken from the report frame when present
+STATUS_COLUMNS = ['Current_Status', 'Outbound_status']
+
+# Column of the summary holding the outbound date (calendar day)
+DAY_COLUMN = 'day'
+
+
+def build_summary(df: pd.DataFrame, date_column: Optional[str] = None,
+                  value_column: str = 'MegaWattage_numeric',
+                  flags: Optional[Dict[str, pd.Series]] = None) -> pd.DataFrame:
+    """
+    Aggregate a report frame into records / MegaWattage per status and day.
+
+    Args:
+        df: Report frame
+        date_column: Outbound date column (datetime, date objects or text);
+            the day is left empty when None or missing
+        value_column: Numeric MegaWattage column (parsed once by the caller)
+        flags: Boolean row masks (aligned with df) kept as extra grouping columns
+
+    Returns:
+        DataFrame with the grouping columns, 'records' and 'megawattage'
+    """
+    keys = pd.DataFrame(index=df.index)
+    for col in STATUS_COLUMNS:
+        if col in df.columns:
+            keys[col] = df[col]
+    if date_column and date_column in df.columns:
+        days = df[date_column]
+        if not pd.api.types.is_datetime64_any_dtype(days):
+            days = pd.to_datetime(days, errors='coerce')
+        keys[DAY_COLUMN] = days.dt.normalize()
+    else:
+        keys[DAY_COLUMN] = pd.NaT
+    for name, mask in (flags or {}).items():
+        keys[name] = mask.reindex(df.index, fill_value=False).astype(bool)
+
+    if value_column in df.columns:
+        keys['megawattage'] = pd.to_numeric(df[value_column], errors='coerce')
+    else:
+        keys['megawattage'] = 0.0
+
+    group_columns = [col for col in keys.columns if col != 'megawattage']
+    grouped = keys.groupby(group_columns, dropna=False, observed=True, sort=False)['megawattage']
+    summary = grouped.agg(['size', 'sum']).rename(columns={'size': 'records', 'sum': 'megawattage'})
+    return summary.reset_index()
+
+
+def in_month(summary: pd.DataFrame, year: int, month: Optional[int] = None) -> pd.Series:
+    """Rows of the summary whose day falls in the given year (and month)."""
+    days = summary[DAY_COLUMN]
+    mask = days.dt.year == year
+    if month is not None:
+        mask &= days.dt.month == month
+    return mask
+
+
+def between_days(summary: pd.DataFrame, start: date, end: date) -> pd.Series:
+    """Rows of the summary whose day is within [start, end]."""
+    days = summary[DAY_COLUMN]
+    return (days >= pd.Timestamp(start)) & (days <= pd.Timestamp(end))
+
+
+def totals(summary: pd.DataFrame, by: str, where: Optional[pd.Series] = None) -> pd.DataFrame:
+    """
+    Records and MegaWattage per value of one grouping column.
+
+    Args:
+        summary: Result of build_summary
+        by: Grouping column to roll up to (e.g. 'Current_Status')
+        where: Boolean mask over the summary rows to include
+
+    Returns:
+        DataFrame indexed by the column's values (missing values left out),
+        most records first
+    """
+    if where is not None:
+        summary = summary[where]
+    rolled = summary.groupby(by, observed=True)[['records', 'megawattage']].sum()
+    return rolled.sort_values('records', ascending=False, kind='stable')
+
+
+def megawattage(summary: pd.DataFrame, where: Optional[pd.Series] = None) -> float:
+    """Total MegaWattage of the summary rows matching the mask."""
+    if where is not None:
+        summary = summary[where]
+    return float(summary['megawattage'].sum())
+
+
+def record_count(summary: pd.DataFrame, where: Optional[pd.Series] = None) -> int:
+    """Number of report rows behind the summary rows matching the mask."""
+    if where is not None:
+        summary = summary[where]
+    return int(summary['records'].sum())
+
+
+def print_totals(rolled: pd.DataFrame, title: str) -> None:
+    """Print a roll-up from totals() as the reports show it."""
+    print(title)
+    for status, row in rolled.iterrows():
+        print(f"  {status}: {int(row['records'])} records, Total MegaWattage: {float(row['megawattage']):.2f} MW")
@@ -0,0 +1,237 @@
+"""
+Vectorized status rules for current_report.
+
+The rules used to run as row-wise df.apply passes that parsed the same date
+strings again on every row. Here every date column is parsed once per distinct
+value (with the same scalar pd.to_datetime call, so odd values behave exactly
+as before) and the statuses are picked with np.select over whole columns.
+
+Parsing outcomes per value:
+- missing: None / NaN
+- unparsable: pd.to_datetime raised or gave NaT
+- a date: compared as a datetime64 day against today
+"""
+from datetime import datetime
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# Years whose Agreed Delivery dates are placeholders and get blanked
+PLACEHOLDER_AGREED_YEARS = [2001, 2021, 2024]
+
+# Outbounded rows before this year are not carried into current_report
+FIRST_REPORTED_YEAR = 2025
+
+# Dates as the ETL writes them
+ISO_DAY = r'\d{4}-\d{2}-\d{2}'
+
+
+def _parse_values(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse distinct non-missing values the way a scalar pd.to_datetime call does.
+
+    Strings are parsed in bulk (plain YYYY-MM-DD, as the ETL writes them, with
+    a fixed format, other strings with format='mixed', which parses each
+    element on its own); other values, and strings the bulk call cannot
+    handle (e.g. mixed UTC offsets), go through pd.to_datetime one by one.
+
+    Returns:
+        Tuple of (unparsable mask, datetime64[D] calendar day, NaT if unparsable)
+    """
+    days = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[D]')
+    failed = np.zeros(len(values), dtype=bool)
+
+    as_series = pd.Series(values, dtype=object)
+    is_text = as_series.map(lambda v: isinstance(v, str)).to_numpy()
+    iso = is_text & as_series.astype(str).str.fullmatch(ISO_DAY).to_numpy()
+    one_by_one = ~is_text
+
+    for mask, fmt in ((iso, '%Y-%m-%d'), (is_text & ~iso, 'mixed')):
+        if not mask.any():
+            continue
+        try:
+            parsed = pd.to_datetime(as_series[mask], format=fmt, errors='coerce')
+            if getattr(parsed.dt, 'tz', None) is not None:
+                # Calendar day of the value as written (a UTC offset does not move the day)
+                parsed = parsed.dt.tz_localize(None)
+        except (ValueError, TypeError):
+            one_by_one |= mask
+            continue
+        days[mask] = parsed.to_numpy(dtype='datetime64[D]')
+        failed[mask] = parsed.isna().to_numpy()
+
+    for i in np.flatnonzero(one_by_one):
+        try:
+            parsed = pd.to_datetime(values[i])
+        except Exception:
+            failed[i] = True
+            continue
+        if pd.isna(parsed):
+            failed[i] = True
+            continue
+        days[i] = np.datetime64(parsed.date(), 'D')
+    return failed, days
+
+
+def parse_dates(series: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Parse a column of raw date values, once per distinct value.
+
+    Args:
+        series: Raw values (strings, Timestamps, None, ...)
+
+    Returns:
+        Tuple of (missing mask, unparsable mask, datetime64[D] day of each
+        parsed value; NaT where missing or unparsable)
+    """
+    codes, uniques = pd.factorize(series.astype(object), use_na_sentinel=True)
+    missing = codes == -1
+    if len(uniques) == 0:
+        return missing, np.zeros(len(codes), dtype=bool), np.full(len(codes), np.datetime64('NaT'), dtype='datetime64[D]')
+
+    failed, days = _parse_values(np.asarray(uniques, dtype=object))
+    safe_codes = np.where(missing, 0, codes)
+    return missing, failed[safe_codes] & ~missing, np.where(missing, np.datetime64('NaT'), days[safe_codes])
+
+
+def _is_epoch(series: pd.Series) -> np.ndarray:
+    """Values equal to pd.Timestamp(0) (datetimes only; strings never compare equal)."""
+    codes, uniques = pd.factorize(series.astype(object), use_na_sentinel=True)
+    epoch = np.array([bool(value == pd.Timestamp(0)) for value in uniques], dtype=bool)
+    if len(uniques) == 0:
+        return np.zeros(len(codes), dtype=bool)
+    return np.where(codes == -1, False, epoch[np.where(codes == -1, 0, codes)])
+
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    if name in df.columns:
+        return df[name]
+    return pd.Series(None, index=df.index, dtype=object)
+
+
+def current_status(outbound: Tuple[np.ndarray, np.ndarray, np.ndarray], inbound: pd.Series,
+                   today: np.datetime64) -> np.ndarray:
+    """
+    On Sea / In-Stock / Outbounded from the inbound and the parsed outbound dates.
+    """
+    out_missing, out_failed, out_day = outbound
+    in_missing = inbound.isna().to_numpy()
+    conditions = [
+        out_missing & in_missing,
+        out_missing,
+        out_failed,
+        out_day > today,
+    ]
+    choices = ["On Sea", "In-Stock", "Outbounded", "In-Stock"]
+    return np.select(conditions, choices, default="Outbounded")
+
+
+def outbound_class(outbound: Tuple[np.ndarray, np.ndarray, np.ndarray], epoch: np.ndarray,
+                   today: np.datetime64) -> np.ndarray:
+    """
+    not-outbounded / outbound-planned / outbounded from the parsed outbound date.
+    """
+    out_missing, out_failed, out_day = outbound
+    conditions = [
+        out_missing | epoch,
+        out_failed,
+        out_day > today,
+    ]
+    choices = ["not-outbounded", "not-outbounded", "outbound-planned"]
+    return np.select(conditions, choices, default="outbounded")
+
+
+def release_status(release_date: pd.Series, status: np.ndarray) -> np.ndarray:
+    """
+    Released when there is a release date or the goods already left.
+    """
+    released = release_date.notna().to_numpy() | (status == "Outbounded")
+    return np.where(released, "Released", "Not released")
+
+
+def delivery_status(ref1: pd.Series) -> np.ndarray:
+    """
+    Partial_delivery when a Ref1 occurs on several rows, else Full_delivery.
+    """
+    codes, uniques = pd.factorize(ref1, use_na_sentinel=True)
+    found = codes >= 0
+    counts = np.bincount(codes[found], minlength=len(uniques))
+    return np.where(found & (counts[np.where(found, codes, 0)] > 1), "Partial_delivery", "Full_delivery")
+
+
+def outbounded_before(outbound_status: np.ndarray, outbound: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                      year: int = FIRST_REPORTED_YEAR) -> np.ndarray:
+    """
+    Rows already outbounded before the given year.
+    """
+    _, _, out_day = outbound
+    before = out_day < np.datetime64(f"{year}-01-01", 'D')  # NaT compares False
+    return (outbound_status == "outbounded") & before
+
+
+def fix_agreed_delivery_date(agreed: pd.Series) -> pd.Series:
+    """
+    Blank out empty and placeholder-year Agreed Delivery dates ('' as before).
+    """
+    codes, uniques = pd.factorize(agreed.astype(object), use_na_sentinel=True)
+    values = np.asarray(uniques, dtype=object)
+    failed, days = _parse_values(values)
+    years = days.astype('datetime64[Y]').astype(int) + 1970
+    blank = np.array([str(value).strip() == "" for value in values], dtype=bool)
+    blank |= ~failed & np.isin(years, PLACEHOLDER_AGREED_YEARS)
+
+    missing = codes == -1
+    to_blank = missing | (blank[np.where(missing, 0, codes)] if len(uniques) else False)
+    fixed = agreed.astype(object).copy()
+    fixed[to_blank] = ""
+    return fixed
+
+
+def date_statuses(df: pd.DataFrame, today: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Current_Status, Outbound_status and Release_Status, the columns that
+    depend on today's date.
+
+    Args:
+        df: Rows with the Outbound / Inbound / Release date columns
+        today: Reference date (default: now)
+
+    Returns:
+        DataFrame with the three status columns, same index as df
+    """
+    today = np.datetime64((today or datetime.now()).date(), 'D')
+    raw_outbound = _column(df, 'Outbound date')
+    outbound = parse_dates(raw_outbound)
+    status = current_status(outbound, _column(df, 'Inbound date'), today)
+    return pd.DataFrame({
+        'Current_Status': status,
+        'Outbound_status': outbound_class(outbound, _is_epoch(raw_outbound), today),
+        'Release_Status': release_status(_column(df, 'Release date'), status),
+    }, index=df.index)
+
+
+def apply_status_rules(df: pd.DataFrame, today: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Add Current_Status, Outbound_status, Release_Status and Delivery_Status,
+    drop rows outbounded before FIRST_REPORTED_YEAR and fix the Agreed
+    Delivery date.
+
+    Args:
+        df: Rows of daily_report with Ref1 already built
+        today: Reference date (default: now)
+
+    Returns:
+        New DataFrame with the status columns
+    """
+    df = df.copy()
+    statuses = date_statuses(df, today)
+    for col in statuses.columns:
+        df[col] = statuses[col]
+    df['Delivery_Status'] = delivery_status(df['Ref1'])
+
+    outbound = parse_dates(_column(df, 'Outbound date'))
+    df = df[~outbounded_before(df['Outbound_status'].to_numpy(), outbound)]
+
+    if 'Agreed Delivery date' in df.columns:
+        df['Agreed Delivery date'] = fix_agreed_delivery_date(df['Agreed Delivery date'])
+    return df
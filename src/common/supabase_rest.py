@@ -0,0 +1,486 @@
+"""
+Pooled PostgREST client for bulk reads and writes on the Supabase tables.
+
+Records are JSON-encoded once, packed into batches of roughly
+TARGET_BATCH_BYTES and sent by a bounded thread pool over one keep-alive
+connection pool. Every batch is retried on its own with exponential backoff.
+Reads page by id (keyset) over several id ranges at once.
+The same code works against any PostgREST-compatible server, which is what
+the benchmark uses.
+"""
+import os
+import json
+import math
+import time
+import logging
+from datetime import date, datetime
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+import httpx
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Number of batches sent concurrently
+UPLOAD_WORKERS = int(os.getenv('SUPABASE_UPLOAD_WORKERS', '4'))
+
+# Target JSON payload size per request, in bytes
+TARGET_BATCH_BYTES = int(os.getenv('SUPABASE_BATCH_BYTES', str(512 * 1024)))
+
+# Upper bound on rows per request, whatever their size
+MAX_BATCH_ROWS = 5000
+
+# Attempts per batch before the upload is aborted
+MAX_ATTEMPTS = 4
+
+# Number of id ranges read concurrently by fetch_frame
+FETCH_WORKERS = int(os.getenv('SUPABASE_FETCH_WORKERS', '4'))
+
+# Rows per page when reading (PostgREST's default max-rows is 1000)
+FETCH_PAGE_SIZE = 1000
+
+
+class UploadError(Exception):
+    """Raised when a batch still fails after all retries."""
+
+
+@dataclass
+class UploadStats:
+    """Summary of one upload."""
+    rows: int = 0
+    batches: int = 0
+    bytes: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    def add(self, other: 'UploadStats') -> None:
+        """Accumulate the stats of another upload into this one."""
+        self.rows += other.rows
+        self.batches += other.batches
+        self.bytes += other.bytes
+        self.retries += other.retries
+        self.seconds += other.seconds
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.rows} rows in {self.batches} batches "
+                f"({self.bytes / 1024 / 1024:.1f} MB) in {self.seconds:.1f}s, "
+                f"{self.rows_per_sec:.0f} rows/sec")
+
+
+def create_rest_client(url: Optional[str] = None, key: Optional[str] = None,
+                       pool_size: int = UPLOAD_WORKERS, timeout: float = 60.0) -> httpx.Client:
+    """
+    Create a keep-alive HTTP client for the project's PostgREST endpoint.
+
+    Args:
+        url: Supabase project URL (defaults to SUPABASE_URL)
+        key: Supabase API key (defaults to SUPABASE_KEY)
+        pool_size: Number of connections kept alive
+        timeout: Request timeout in seconds
+
+    Returns:
+        httpx.Client with base URL and auth headers set
+    """
+    url = url or os.getenv('SUPABASE_URL')
+    key = key or os.getenv('SUPABASE_KEY')
+    if not url or not key:
+        raise ValueError("Missing Supabase credentials")
+
+    return httpx.Client(
+        base_url=f"{url.rstrip('/')}/rest/v1",
+        headers={
+            'apikey': key,
+            'Authorization': f"Bearer {key}",
+            'Content-Type': 'application/json',
+        },
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        timeout=timeout,
+    )
+
+
+def _json_default(value):
+    """Serialize the non-JSON types that come out of pandas."""
+    if pd.isna(value):
+        return None
+    if hasattr(value, 'item'):  # numpy scalars
+        return value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_record(record: Dict) -> bytes:
+    """
+    Encode one record as JSON, turning NaN/NaT into null.
+    """
+    clean = {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in record.items()}
+    return json.dumps(clean, default=_json_default, allow_nan=False, ensure_ascii=False).encode('utf-8')
+
+
+def pack_batches(encoded: List[bytes], target_bytes: int = TARGET_BATCH_BYTES,
+                 max_rows: int = MAX_BATCH_ROWS) -> List[List[bytes]]:
+    """
+    Group encoded records into batches of about target_bytes each.
+    """
+    batches = []
+    current = []
+    current_size = 0
+    for item in encoded:
+        if current and (current_size + len(item) > target_bytes or len(current) >= max_rows):
+            batches.append(current)
+            current = []
+            current_size = 0
+        current.append(item)
+        current_size += len(item) + 1
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _request(client: httpx.Client, method: str, path: str, params, headers: Optional[Dict] = None,
+             body: Optional[bytes] = None, attempts: int = MAX_ATTEMPTS, idempotent: bool = True):
+    """
+    Send one request, retrying on network errors, 429 and 5xx.
+
+    A request that is not idempotent (a plain insert) is only retried when the
+    server cannot have applied it: on 429 and when the connection could not be
+    opened. After a read timeout or a 5xx the rows may already be committed,
+    and sending them again would insert them twice.
+
+    Returns:
+        Tuple of (response, number of retries that were needed)
+    """
+    for attempt in range(attempts):
+        try:
+            response = client.request(method, path, content=body, params=params, headers=headers)
+            if response.status_code < 400:
+                return response, attempt
+            retryable = response.status_code == 429 or (idempotent and response.status_code >= 500)
+            error = f"HTTP {response.status_code}: {response.text[:500]}"
+        except httpx.TransportError as e:
+            retryable = idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+            error = str(e)
+
+        if not retryable or attempt == attempts - 1:
+            raise UploadError(error)
+        logger.warning(f"Retrying {method} {path} after error: {error}")
+        time.sleep(2 ** attempt)
+    raise UploadError(f"{method} {path} failed")
+
+
+def _send_batch(client: httpx.Client, method: str, path: str, body: bytes, params: Dict,
+                headers: Dict, attempts: int, idempotent: bool = True) -> int:
+    """
+    Send one write request with retries.
+
+    Returns:
+        Number of retries that were needed
+    """
+    _, retries = _request(client, method, path, params, headers, body, attempts, idempotent)
+    return retries
+
+
+def upload_records(table: str, records: Iterable[Dict], client: Optional[httpx.Client] = None,
+                   workers: int = UPLOAD_WORKERS, target_bytes: int = TARGET_BATCH_BYTES,
+                   max_rows: int = MAX_BATCH_ROWS, on_conflict: Optional[str] = None,
+                   attempts: int = MAX_ATTEMPTS) -> UploadStats:
+    """
+    Insert (or upsert) records into a table.
+
+    Args:
+        table: Target table name
+        records: Records to send (dicts of column -> value)
+        client: Client from create_rest_client; one is created (and closed) if omitted
+        workers: Number of batches in flight at once
+        target_bytes: Target payload size per request
+        max_rows: Maximum rows per request
+        on_conflict: Comma-separated key columns; turns the insert into an upsert
+        attempts: Attempts per batch (a plain insert is only retried when it
+            cannot have reached the table, see _request)
+
+    Returns:
+        UploadStats for the whole upload
+
+    Raises:
+        UploadError: If a batch fails after all attempts
+    """
+    own_client = client is None
+    if own_client:
+        client = create_rest_client(pool_size=workers)
+
+    stats = UploadStats()
+    start = time.perf_counter()
+
+    encoded = [encode_record(record) for record in records]
+    batches = pack_batches(encoded, target_bytes, max_rows)
+
+    params = {}
+    prefer = ['return=minimal']
+    if on_conflict:
+        params['on_conflict'] = on_conflict
+        prefer.append('resolution=merge-duplicates')
+    headers = {'Prefer': ','.join(prefer)}
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {}
+            for batch in batches:
+                body = b'[' + b','.join(batch) + b']'
+                future = executor.submit(_send_batch, client, 'POST', f"/{table}", body, params, headers, attempts,
+                                         bool(on_conflict))
+                futures[future] = (len(batch), len(body))
+            for future in as_completed(futures):
+                try:
+                    stats.retries += future.result()
+                except UploadError:
+                    for pending in futures:
+                        pending.cancel()
+                    raise
+                rows, size = futures[future]
+                stats.rows += rows
+                stats.bytes += size
+                stats.batches += 1
+    finally:
+        stats.seconds = time.perf_counter() - start
+        if own_client:
+            client.close()
+
+    return stats
+
+
+def in_filter(values: Iterable) -> str:
+    """
+    Build a PostgREST in.(...) filter, quoting every value.
+    """
+    quoted = []
+    for value in values:
+        text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        quoted.append(f'"{text}"')
+    return f"in.({','.join(quoted)})"
+
+
+def like_any_filter(patterns: Iterable[str]) -> str:
+    """
+    Build a PostgREST like(any).{...} filter ('*' is the wildcard), quoting every pattern.
+    """
+    quoted = []
+    for pattern in patterns:
+        text = str(pattern).replace('\\', '\\\\').replace('"', '\\"')
+        quoted.append(f'"{text}"')
+    return f"like(any).{{{','.join(quoted)}}}"
+
+
+def select_list(columns) -> str:
+    """
+    Build a PostgREST select list, quoting names with spaces or punctuation.
+
+    Args:
+        columns: '*' or a list of column names
+    """
+    if isinstance(columns, str):
+        return columns
+    quoted = []
+    for col in columns:
+        if col.replace('_', '').isalnum():
+            quoted.append(col)
+        else:
+            quoted.append('"' + col.replace('"', '\\"') + '"')
+    return ','.join(quoted)
+
+
+def _id_bounds(client: httpx.Client, table: str, filters: Dict[str, str]) -> Optional[Tuple[int, int]]:
+    """Smallest and largest id matching the filters, or None for no rows."""
+    bounds = []
+    for direction in ('asc', 'desc'):
+        params = {'select': 'id', 'order': f"id.{direction}", 'limit': 1}
+        params.update(filters)
+        response, _ = _request(client, 'GET', f"/{table}", params)
+        rows = response.json()
+        if not rows:
+            return None
+        bounds.append(int(rows[0]['id']))
+    return bounds[0], bounds[1]
+
+
+def _fetch_id_range(client: httpx.Client, table: str, select: str, filters: Dict[str, str],
+                    low: int, high: int, page_size: int) -> List[pd.DataFrame]:
+    """
+    Read the rows with low <= id <= high, page by page, keyed on the last id seen.
+    """
+    frames = []
+    last = low - 1
+    while True:
+        params = [('select', select), ('order', 'id'), ('limit', page_size),
+                  ('id', f"gt.{last}"), ('id', f"lte.{high}")]
+        params.extend(filters.items())
+        response, _ = _request(client, 'GET', f"/{table}", params)
+        page = response.json()
+        if not page:
+            break
+        frames.append(pd.DataFrame.from_records(page))
+        if len(page) < page_size:
+            break
+        last = int(page[-1]['id'])
+    return frames
+
+
+def fetch_frame(table: str, columns='*', filters: Optional[Dict[str, str]] = None,
+                client: Optional[httpx.Client] = None, workers: int = FETCH_WORKERS,
+                page_size: int = FETCH_PAGE_SIZE) -> pd.DataFrame:
+    """
+    Read all rows of a table matching the filters into a DataFrame.
+
+    The id span of the matching rows is split into ranges that are read
+    concurrently; inside a range, pages are keyed on id (id > last id seen)
+    instead of OFFSET, so deep pages cost the same as the first one. Pages are
+    turned into DataFrames as they arrive and concatenated once, in id order.
+
+    Args:
+        table: Table name
+        columns: '*' or the list of columns to read (id is always read)
+        filters: Extra query parameters, e.g. {'deleted_at': 'is.null'}
+        client: Client from create_rest_client; one is created (and closed) if omitted
+        workers: Number of id ranges read at once
+        page_size: Rows per request
+
+    Returns:
+        DataFrame of the rows ordered by id (empty, with the requested columns, if none match)
+    """
+    filters = dict(filters or {})
+    wanted = None if isinstance(columns, str) else list(columns)
+    if wanted is not None and 'id' not in wanted:
+        select = select_list(['id'] + wanted)
+    else:
+        select = select_list(columns)
+
+    own_client = client is None
+    if own_client:
+        client = create_rest_client(pool_size=workers)
+
+    try:
+        bounds = _id_bounds(client, table, filters)
+        if bounds is None:
+            return pd.DataFrame(columns=wanted or [])
+
+        low, high = bounds
+        ranges = max(1, workers) * 4
+        step = max(page_size, math.ceil((high - low + 1) / ranges))
+        spans = [(start, min(start + step - 1, high)) for start in range(low, high + 1, step)]
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            results = list(executor.map(
+                lambda span: _fetch_id_range(client, table, select, filters, span[0], span[1], page_size),
+                spans,
+            ))
+    finally:
+        if own_client:
+            client.close()
+
+    frames = [frame for range_frames in results for frame in range_frames]
+    if not frames:
+        return pd.DataFrame(columns=wanted or [])
+    df = pd.concat(frames, ignore_index=True)
+    if wanted is not None:
+        df = df[wanted]
+    return df
+
+
+def fetch_matching(table: str, columns, column: str, values: Iterable, filters: Optional[Dict[str, str]] = None,
+                   client: Optional[httpx.Client] = None, make_filter=in_filter, chunk_size: int = 200) -> pd.DataFrame:
+    """
+    Read the rows whose column matches one of the values, chunk_size values per
+    request (keeps the URL short).
+
+    Args:
+        table: Table name
+        columns: List of columns to read (id is always read)
+        column: Column matched against the values
+        values: Values to look for
+        filters: Extra query parameters applied to every chunk
+        client: Client from create_rest_client; one is created (and closed) if omitted
+        make_filter: Builds the filter of one chunk (in_filter, like_any_filter)
+        chunk_size: Values per request
+
+    Returns:
+        DataFrame of the matching rows, each row once (empty, with the requested columns, if none match)
+    """
+    values = sorted(set(values))
+    wanted = ['id'] + [col for col in columns if col != 'id']
+    frames = []
+    for i in range(0, len(values), chunk_size):
+        chunk_filters = dict(filters or {})
+        chunk_filters[column] = make_filter(values[i:i + chunk_size])
+        frames.append(fetch_frame(table, wanted, chunk_filters, client=client))
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=wanted)
+    return pd.concat(frames, ignore_index=True).drop_duplicates('id').sort_values('id', ignore_index=True)
+
+
+def update_records(table: str, values: Dict, key_column: str, keys: List, client: Optional[httpx.Client] = None,
+                   chunk_size: int = 200, attempts: int = MAX_ATTEMPTS) -> int:
+    """
+    Set the same column values on every row whose key is in keys.
+
+    Args:
+        table: Table name
+        values: Column values to set, e.g. {'deleted_at': '2025-01-01T00:00:00'}
+        key_column: Column matched against keys
+        keys: Key values of the rows to update
+        client: Client from create_rest_client; one is created (and closed) if omitted
+        chunk_size: Keys per request (keeps the URL short)
+        attempts: Attempts per request
+
+    Returns:
+        Number of keys sent
+    """
+    own_client = client is None
+    if own_client:
+        client = create_rest_client()
+
+    body = encode_record(values)
+    headers = {'Prefer': 'return=minimal'}
+    try:
+        for i in range(0, len(keys), chunk_size):
+            params = {key_column: in_filter(keys[i:i + chunk_size])}
+            _send_batch(client, 'PATCH', f"/{table}", body, params, headers, attempts)
+    finally:
+        if own_client:
+            client.close()
+    return len(keys)
+
+
+def delete_records(table: str, key_column: str, keys: List, client: Optional[httpx.Client] = None,
+                   chunk_size: int = 200, attempts: int = MAX_ATTEMPTS) -> int:
+    """
+    Delete every row whose key is in keys.
+
+    Args:
+        table: Table name
+        key_column: Column matched against keys
+        keys: Key values of the rows to delete
+        client: Client from create_rest_client; one is created (and closed) if omitted
+        chunk_size: Keys per request (keeps the URL short)
+        attempts: Attempts per request
+
+    Returns:
+        Number of keys sent
+    """
+    own_client = client is None
+    if own_client:
+        client = create_rest_client()
+
+    headers = {'Prefer': 'return=minimal'}
+    try:
+        for i in range(0, len(keys), chunk_size):
+            params = {key_column: in_filter(keys[i:i + chunk_size])}
+            _send_batch(client, 'DELETE', f"/{table}", b'', params, headers, attempts)
+    finally:
+        if own_client:
+            client.close()
+    return len(keys)
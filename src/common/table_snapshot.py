@@ -0,0 +1,166 @@
+"""
+Local Parquet snapshots of Supabase tables that rarely change.
+
+A snapshot is the full table as last read, stored as a Parquet file under the
+cache folder together with a small JSON manifest (largest id, latest update
+timestamp, time of the last full read). Syncing only asks the API for rows
+with a larger id, or a newer update timestamp when the table has such a
+column, and merges them in by id. The Parquet file is read memory-mapped, so
+an unchanged table costs one local read instead of a full download.
+
+Rows deleted or edited in place (without an update timestamp) are only picked
+up by a full refresh, which runs every SNAPSHOT_FULL_REFRESH_DAYS days.
+
+Snapshots need pyarrow; without it load_table simply reads the whole table.
+"""
+import os
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+import httpx
+import pandas as pd
+
+from common.arrow import PARQUET_SUPPORTED, to_arrow_table
+from common.file_cache import CACHE_DIR
+from common.supabase_rest import fetch_frame
+
+# Days after which a snapshot is rebuilt from a full read
+SNAPSHOT_FULL_REFRESH_DAYS = int(os.getenv('SNAPSHOT_FULL_REFRESH_DAYS', '7'))
+
+
+class TableSnapshot:
+    """
+    Parquet snapshot of one table, kept current with delta reads by id.
+    """
+
+    def __init__(self, table: str, updated_column: Optional[str] = None, cache_dir: Path = CACHE_DIR):
+        self.table = table
+        self.updated_column = updated_column
+        self.folder = Path(cache_dir) / 'snapshots'
+        self.data_path = self.folder / f"{table}.parquet"
+        self.manifest_path = self.folder / f"{table}.json"
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # A snapshot synced with another update column cannot be continued
+        if manifest.get('updated_column') != self.updated_column or not self.data_path.exists():
+            return {}
+        return manifest
+
+    def refresh_due(self, refresh_days: int = SNAPSHOT_FULL_REFRESH_DAYS) -> bool:
+        """
+        True when there is no snapshot or its last full read is too old.
+        """
+        if not self.manifest.get('last_full_refresh'):
+            return True
+        last_full = datetime.fromisoformat(self.manifest['last_full_refresh'])
+        return datetime.now() - last_full >= timedelta(days=refresh_days)
+
+    def read(self) -> pd.DataFrame:
+        """
+        Read the snapshot, memory-mapped. Integer columns with gaps come back
+        as Python ints and None, as they do from the API.
+        """
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(self.data_path, memory_map=True)
+        return table.to_pandas(integer_object_nulls=True)
+
+    def write(self, df: pd.DataFrame, full_refresh: bool) -> None:
+        """
+        Replace the snapshot file and manifest (atomically).
+        """
+        import pyarrow.parquet as pq
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.data_path.with_suffix('.parquet.tmp')
+        pq.write_table(to_arrow_table(df), tmp_path)
+        os.replace(tmp_path, self.data_path)
+
+        manifest = {
+            'table': self.table,
+            'updated_column': self.updated_column,
+            'rows': len(df),
+            'max_id': int(df['id'].max()) if not df.empty else 0,
+            'max_updated': None,
+            'last_full_refresh': self.manifest.get('last_full_refresh'),
+            'last_sync': datetime.now().isoformat(),
+        }
+        if self.updated_column and not df.empty and df[self.updated_column].notna().any():
+            latest = pd.to_datetime(df[self.updated_column], utc=True, format='ISO8601').max()
+            manifest['max_updated'] = latest.isoformat()
+        if full_refresh:
+            manifest['last_full_refresh'] = manifest['last_sync']
+
+        tmp_path = self.manifest_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        self.manifest = manifest
+
+    def delta_filter(self) -> Dict[str, str]:
+        """
+        PostgREST filter for rows newer than the snapshot.
+        """
+        newer = [f"id.gt.{self.manifest.get('max_id', 0)}"]
+        if self.updated_column and self.manifest.get('max_updated'):
+            newer.append(f'{self.updated_column}.gt."{self.manifest["max_updated"]}"')
+        if len(newer) == 1:
+            return {'id': newer[0][len('id.'):]}
+        return {'or': f"({','.join(newer)})"}
+
+    def sync(self, client: Optional[httpx.Client] = None,
+             refresh_days: int = SNAPSHOT_FULL_REFRESH_DAYS) -> pd.DataFrame:
+        """
+        Bring the snapshot up to date and return the whole table.
+
+        Args:
+            client: Client from create_rest_client; one is created per read if omitted
+            refresh_days: Days after which the table is read in full again
+
+        Returns:
+            DataFrame of all rows ordered by id
+        """
+        if self.refresh_due(refresh_days):
+            df = fetch_frame(self.table, client=client)
+            print(f"Snapshot of {self.table}: full read, {len(df)} rows")
+            self.write(df, full_refresh=True)
+            return self.read()
+
+        snapshot = self.read()
+        delta = fetch_frame(self.table, filters=self.delta_filter(), client=client)
+        if delta.empty:
+            print(f"Snapshot of {self.table}: up to date, {len(snapshot)} rows read locally")
+            return snapshot
+
+        kept = snapshot[~snapshot['id'].isin(delta['id'])]
+        df = pd.concat([kept, delta], ignore_index=True).sort_values('id', ignore_index=True)
+        print(f"Snapshot of {self.table}: {len(delta)} new or changed rows fetched, "
+              f"{len(kept)} read locally")
+        self.write(df, full_refresh=False)
+        return self.read()
+
+
+def load_table(table: str, updated_column: Optional[str] = None, client: Optional[httpx.Client] = None,
+               cache_dir: Path = CACHE_DIR) -> pd.DataFrame:
+    """
+    Read a table through its local snapshot (or in full when pyarrow is missing).
+
+    Args:
+        table: Table name
+        updated_column: Timestamp column bumped on every change, if the table has one
+        client: Client from create_rest_client
+        cache_dir: Root cache folder
+
+    Returns:
+        DataFrame of all rows ordered by id
+    """
+    if not PARQUET_SUPPORTED:
+        return fetch_frame(table, client=client)
+    return TableSnapshot(table, updated_column, cache_dir).sync(client)
@@ -11,8 +11,13 @@ Python Version: 3.8+
 
 import pandas as pd
 import re
+import sys
 import logging
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+from common.excel import read_excel
 
 
 # ============================================================================
@@ -145,7 +150,7 @@ class DataLoader:
         
         try:
             # Read the "Simple List" sheet (has File Name (no extension) and File Type)
-            df = pd.read_excel(file_path, sheet_name="Simple List")
+            df = read_excel(file_path, sheet_name="Simple List")
             
             logging.info(f"Loaded {len(df)} files from extracted data")
             
@@ -182,7 +187,7 @@ class DataLoader:
         
         try:
             # Read target Excel file
-            df = pd.read_excel(file_path)
+            df = read_excel(file_path)
             
             if df.empty:
                 logging.warning("Target Excel file is empty")
@@ -1,4 +1,5 @@
 import os
+import sys
 import pandas as pd
 from pathlib import Path
 import pyodbc
@@ -7,6 +8,9 @@ import logging
 from datetime import datetime
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+from common.dates import DATE_COLUMNS, convert_date_column
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -245,46 +249,6 @@ def read_excel_files(source_folder: str, template_headers: List[str]) -> tuple[p
     return combined_df, files_processed
 
 
-def convert_date_column(series: pd.Series) -> pd.Series:
-    """
-    Convert date column handling both string dates and Excel serial numbers.
-    
-    Args:
-        series: Pandas Series containing date values
-        
-    Returns:
-        Series with properly formatted date strings (YYYY-MM-DD)
-    """
-    def parse_mixed_date(date_val):
-        if pd.isna(date_val) or date_val is None or date_val == '':
-            return None
-        
-        # If it's already a datetime object, format it
-        if isinstance(date_val, (pd.Timestamp, datetime)):
-            return date_val.strftime('%Y-%m-%d')
-        
-        # If it's a number, treat as Excel serial date
-        if isinstance(date_val, (int, float)):
-            try:
-                # Excel's epoch starts at 1899-12-30
-                converted_date = pd.to_datetime(date_val, origin='1899-12-30', unit='D')
-                return converted_date.strftime('%Y-%m-%d')
-            except:
-                return None
-        
-        # Otherwise, try to parse as string
-        try:
-            parsed_date = pd.to_datetime(date_val, format='mixed', dayfirst=True, errors='coerce')
-            if pd.notna(parsed_date):
-                return parsed_date.strftime('%Y-%m-%d')
-        except:
-            pass
-        
-        return None
-    
-    return series.apply(parse_mixed_date)
-
-
 def prepare_data_for_database(df: pd.DataFrame) -> pd.DataFrame:
     """
     Prepare DataFrame for SQL Server insertion.
@@ -299,22 +263,7 @@ def prepare_data_for_database(df: pd.DataFrame) -> pd.DataFrame:
     df_clean = df.where(pd.notnull(df), None)
     
     # Transform date columns
-    date_columns = [
-        'Outbound date',
-        'Agreed Delivery date',
-        'Delivery date',
-        'ETD date POL',
-        'ATD date POL',
-        'ETA date',
-        'ATA date',
-        'Import date',
-        'Planned Inbound date',
-        'Inbound date',
-        'Release date from port (ATA date)',
-        'Container Returned date',
-        'Release date',
-        'date CMR sent to JASolar'
-    ]
+    date_columns = DATE_COLUMNS
     
     for col in date_columns:
         if col in df_clean.columns: